@@ -3,4 +3,6 @@
 __author__ = 'Bruce Frank Wong'
 
 
-from .exchange_crawler import crawl_shfe_futures_daily_data
+from .exchange_crawler import crawl_shfe_futures_daily_data, crawl_daily_data, crawl_futures_daily_data
+from .registry import ExchangePlugin, register_exchange, get_exchange_plugin, get_registered_exchanges, get_first_date
+from .orchestrator import CrawlProgress, crawl_exchanges
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Content-addressed archive of the raw responses from exchanges.
+
+The archive lives in <Package path>/data/archive:
+    objects/<digest[:2]>/<digest>.gz
+        The gzip compressed raw body, <digest> is the SHA-256 of the raw body.
+        An identical body is stored only once.
+    manifest/<exchange symbol>.csv
+        The manifest index, column:
+            date
+            digest
+            size
+        One row for each archived day. If a day archived more than once, the last row wins.
+"""
+
+
+from typing import Dict, List, Optional
+from datetime import date
+from pathlib import Path
+import csv
+import gzip
+import hashlib
+import threading
+
+from ..config import PACKAGE_PATH
+from ..utility import make_path_existed, atomic_write
+
+
+MANIFEST_FIELDS: List[str] = ['date', 'digest', 'size']
+
+
+def get_default_archive_path() -> Path:
+    return PACKAGE_PATH.joinpath('data', 'archive')
+
+
+def get_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class RawArchive(object):
+    """
+    The archive of the raw responses, keyed by exchange and date. Thread safe.
+    """
+    def __init__(self, path: Optional[Path] = None):
+        """
+        :param path: <Path>. the root of the archive, default <Package path>/data/archive.
+        """
+        self.path: Path = path if path is not None else get_default_archive_path()
+        self.manifest: Dict[str, Dict[date, str]] = {}
+        self.lock = threading.Lock()
+
+    def get_object_path(self, digest: str) -> Path:
+        return self.path.joinpath('objects', digest[:2], f'{digest}.gz')
+
+    def get_manifest_path(self, exchange: str) -> Path:
+        return self.path.joinpath('manifest', f'{exchange}.csv')
+
+    def load_manifest(self, exchange: str) -> Dict[date, str]:
+        """
+        Load the manifest of an exchange, cached after the first loading.
+        :param exchange: <str>. exchange symbol.
+        :return: <dict>. key is the date, and value is the digest.
+        """
+        if exchange not in self.manifest.keys():
+            result: Dict[date, str] = {}
+            manifest_file: Path = self.get_manifest_path(exchange)
+            if manifest_file.exists():
+                with open(manifest_file, mode='r', encoding='utf-8', newline='') as f:
+                    for row in csv.DictReader(f):
+                        result[date.fromisoformat(row['date'])] = row['digest']
+            self.manifest[exchange] = result
+        return self.manifest[exchange]
+
+    def put(self, exchange: str, day: date, content: bytes) -> str:
+        """
+        Archive the raw response of an exchange, for a single day.
+        :param exchange: <str>. exchange symbol.
+        :param day: <datetime.date>.
+        :param content: <bytes>. the raw body.
+        :return: <str>. the digest.
+        """
+        digest: str = get_digest(content)
+        object_file: Path = self.get_object_path(digest)
+        if not object_file.exists():
+            with atomic_write(object_file, mode='wb') as f:
+                f.write(gzip.compress(content))
+
+        with self.lock:
+            manifest: Dict[date, str] = self.load_manifest(exchange)
+            if manifest.get(day) != digest:
+                manifest_file: Path = self.get_manifest_path(exchange)
+                make_path_existed(manifest_file.parent)
+                is_new: bool = not manifest_file.exists()
+                with open(manifest_file, mode='a', encoding='utf-8', newline='') as f:
+                    writer = csv.DictWriter(f, MANIFEST_FIELDS)
+                    if is_new:
+                        writer.writeheader()
+                    writer.writerow({'date': day, 'digest': digest, 'size': len(content)})
+                manifest[day] = digest
+        return digest
+
+    def get(self, exchange: str, day: date) -> Optional[bytes]:
+        """
+        Get the raw response of an exchange, for a single day.
+        :param exchange: <str>. exchange symbol.
+        :param day: <datetime.date>.
+        :return: <bytes>, or None if not archived.
+        """
+        with self.lock:
+            digest: Optional[str] = self.load_manifest(exchange).get(day)
+        if digest is None:
+            return None
+        return self.get_by_digest(digest)
+
+    def get_by_digest(self, digest: str) -> bytes:
+        with open(self.get_object_path(digest), mode='rb') as f:
+            return gzip.decompress(f.read())
+
+    def has(self, exchange: str, day: date) -> bool:
+        with self.lock:
+            return day in self.load_manifest(exchange).keys()
+
+    def get_day_list(self, exchange: str, begin: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        """
+        Get the archived days of an exchange, between <begin> and <end> (both included), in ascending order.
+        :param exchange: <str>. exchange symbol.
+        :param begin: <datetime.date>. default no limit.
+        :param end: <datetime.date>. default no limit.
+        :return: <list>.
+        """
+        with self.lock:
+            day_list: List[date] = sorted(self.load_manifest(exchange).keys())
+        return [
+            day for day in day_list
+            if (begin is None or day >= begin) and (end is None or day <= end)
+        ]
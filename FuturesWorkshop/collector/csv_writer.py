@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Buffered writer of the product csv files, for a crawl session.
+
+The crawled rows are held in memory per product, and flushed in bulk when the number of rows buffered
+reaches the budget, or when the writer closed. Each product csv file is rewritten through a temporary
+file and renamed, so a crash never leaves a half-written product file.
+
+If a quote store given, such as <storage/sqlite_store.py>, the rows of each day added are inserted into it too,
+at once.
+
+The rows of a product csv file are unique on (product, delivery, date), and sorted by (date, delivery).
+Flushing merges the new rows into the file in a single streaming pass, a new row replaces the existing
+row with the same key. A file not sorted, or with duplicated keys, is repaired in memory when written.
+"""
+
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import date
+from pathlib import Path
+import csv
+
+import numpy as np
+
+from ..utility import make_path_existed, atomic_write
+from ..definition import FuturesDailyData
+from .stored_day_index import StoredDayIndex
+from .parser import columns_to_row_list, daily_data_to_columns
+from .metrics import CrawlMetrics, measure
+
+
+class BufferedCsvWriter(object):
+    def __init__(self,
+                 csv_path: Path,
+                 max_buffered_rows: int = 200000,
+                 index: Optional[StoredDayIndex] = None,
+                 flushed_callback: Optional[Callable[[List[date]], None]] = None,
+                 metrics: Optional[CrawlMetrics] = None,
+                 quote_store: Optional[Any] = None
+                 ):
+        """
+        :param csv_path: <Path>. where the product csv files saved.
+        :param max_buffered_rows: <int>. flush when the number of rows buffered reaches it.
+        :param index: <StoredDayIndex>. if given, the days added are marked in it after flushed, with data or not,
+            except today without data, which may be published later.
+        :param flushed_callback: <Callable>. if given, called with all the days added, with data or not, after flushed.
+        :param metrics: <CrawlMetrics>. if given, the flushing is measured in it.
+        :param quote_store: <SqliteQuoteStore>. if given, the rows of each day added are inserted into it too.
+        """
+        self.csv_path: Path = csv_path
+        self.max_buffered_rows: int = max_buffered_rows
+        self.index: Optional[StoredDayIndex] = index
+        self.flushed_callback: Optional[Callable[[List[date]], None]] = flushed_callback
+        self.metrics: Optional[CrawlMetrics] = metrics
+        self.quote_store: Optional[Any] = quote_store
+
+        self.buffer: Dict[str, List[List[Any]]] = {}
+        self.buffered_rows: int = 0
+        # (day, has data)
+        self.buffered_days: List[Tuple[date, bool]] = []
+
+    def add(self, data: Dict[str, List[FuturesDailyData]], day: Optional[date] = None) -> None:
+        """
+        Add the crawled data of a day.
+        :param data: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
+        :param day: <datetime.date>. the day crawled, marked in the index after flushed.
+        :return:
+        """
+        for product, quote in data.items():
+            if product not in self.buffer.keys():
+                self.buffer[product] = []
+            self.buffer[product].extend(
+                [
+                    item.product,
+                    item.delivery,
+                    item.date,
+                    item.open,
+                    item.high,
+                    item.low,
+                    item.close,
+                    item.settlement,
+                    item.volume,
+                    item.open_interest,
+                ]
+                for item in quote
+            )
+            self.buffered_rows += len(quote)
+        if self.quote_store is not None:
+            with measure(self.metrics, 'write'):
+                self.quote_store.add_columns(daily_data_to_columns(data), day)
+        if day is not None:
+            self.buffered_days.append((day, bool(data)))
+        if self.buffered_rows >= self.max_buffered_rows:
+            self.flush()
+
+    def add_columns(self, columns: Dict[str, np.ndarray], day: Optional[date] = None) -> None:
+        """
+        Add the crawled data of a day, in columns.
+        :param columns: <dict>. the columns, see <parser.py>.
+        :param day: <datetime.date>. the day crawled, marked in the index after flushed.
+        :return:
+        """
+        row_list: List[List[Any]] = columns_to_row_list(columns)
+        for row in row_list:
+            if row[0] not in self.buffer.keys():
+                self.buffer[row[0]] = []
+            self.buffer[row[0]].append(row)
+        self.buffered_rows += len(row_list)
+        if self.quote_store is not None:
+            with measure(self.metrics, 'write'):
+                self.quote_store.add_columns(columns, day)
+        if day is not None:
+            self.buffered_days.append((day, bool(row_list)))
+        if self.buffered_rows >= self.max_buffered_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered rows into the product csv files.
+        :return:
+        """
+        if self.buffer:
+            make_path_existed(self.csv_path)
+            with measure(self.metrics, 'write'):
+                for product, row_list in self.buffer.items():
+                    self.write_product(product, row_list)
+        self.buffer = {}
+        self.buffered_rows = 0
+
+        if self.buffered_days:
+            if self.index is not None:
+                today: date = date.today()
+                self.index.update([day for day, has_data in self.buffered_days if has_data or day < today])
+            if self.flushed_callback is not None:
+                self.flushed_callback([day for day, has_data in self.buffered_days])
+        self.buffered_days = []
+
+    def write_product(self, product: str, row_list: List[List[Any]]) -> None:
+        """
+        Upsert rows into a product csv file.
+        :param product: <str>. product symbol.
+        :param row_list: <list>. the rows, in the order of FuturesDailyData.fields().
+        :return:
+        """
+        upsert_csv_file(self.csv_path.joinpath(f'{product}.csv'), row_list)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'BufferedCsvWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class UnsortedCsvFileError(Exception):
+    pass
+
+
+def get_row_key(row: List[Any]) -> Tuple[str, str]:
+    """
+    Get the sort key of a row, in the order of FuturesDailyData.fields(), which is (date, delivery).
+    :param row:
+    :return:
+    """
+    return str(row[2]), str(row[1])
+
+
+def merge_sorted_rows(existing: Iterator[List[str]], new_row_list: List[List[Any]]) -> Iterator[List[Any]]:
+    """
+    Merge the new rows into the existing rows, both sorted by key. A new row replaces the existing row with
+    the same key.
+    :param existing: the existing rows, sorted by key, keys unique.
+    :param new_row_list: the new rows, sorted by key, keys unique.
+    :return: the merged rows, sorted by key.
+    """
+    i: int = 0
+    last_key: Optional[Tuple[str, str]] = None
+    for row in existing:
+        key = get_row_key(row)
+        if last_key is not None and key <= last_key:
+            raise UnsortedCsvFileError()
+        last_key = key
+        while i < len(new_row_list) and get_row_key(new_row_list[i]) < key:
+            yield new_row_list[i]
+            i += 1
+        if i < len(new_row_list) and get_row_key(new_row_list[i]) == key:
+            yield new_row_list[i]
+            i += 1
+        else:
+            yield row
+    while i < len(new_row_list):
+        yield new_row_list[i]
+        i += 1
+
+
+def upsert_csv_file(csv_file: Path, row_list: List[List[Any]]) -> None:
+    """
+    Upsert rows into a product csv file, through a temporary file and rename.
+    :param csv_file: <Path>.
+    :param row_list: <list>. the rows, in the order of FuturesDailyData.fields(). If keys duplicated, the last wins.
+    :return:
+    """
+    new_row_list: List[List[Any]] = sorted({get_row_key(row): row for row in row_list}.values(), key=get_row_key)
+    header: List[str] = FuturesDailyData.fields()
+
+    try:
+        with atomic_write(csv_file, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            if csv_file.exists():
+                with open(csv_file, mode='r', encoding='utf-8', newline='') as f_existing:
+                    reader = csv.reader(f_existing)
+                    next(reader, None)
+                    writer.writerows(merge_sorted_rows(reader, new_row_list))
+            else:
+                writer.writerows(new_row_list)
+    except UnsortedCsvFileError:
+        # Repair the file: load it, the last row wins for duplicated keys, and sort.
+        with open(csv_file, mode='r', encoding='utf-8', newline='') as f_existing:
+            reader = csv.reader(f_existing)
+            next(reader, None)
+            merged: Dict[Tuple[str, str], List[Any]] = {get_row_key(row): row for row in reader}
+        merged.update((get_row_key(row), row) for row in new_row_list)
+        with atomic_write(csv_file, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(merged[key] for key in sorted(merged.keys()))
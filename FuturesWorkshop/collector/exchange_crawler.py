@@ -22,19 +22,62 @@ The csv files saved in <Package path>\\data\\<exchange symbol>\\<product symbol>
 """
 
 
-from typing import Any, Callable, Dict, List, Tuple, Optional, NoReturn
+from typing import Awaitable, Callable, Dict, List, Tuple, Optional, NoReturn
 from datetime import date, timedelta
-import json
+from functools import partial
 from pathlib import Path
-import csv
-import sqlite3
-from lxml import etree
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 
-import requests
+import numpy as np
 
-from ..config import PACKAGE_PATH, CONFIGS
-from ..utility import make_path_existed, is_holiday
+from ..config import PACKAGE_PATH
+from ..utility import make_path_existed
+from ..trading_calendar import get_trading_calendar
 from ..definition import FuturesDailyData
+from .transport import HttpTransport, AsyncHttpTransport
+from .rate_limiter import RateLimiter
+from .metrics import CrawlMetrics, measure
+from .archive import RawArchive
+from .stored_day_index import StoredDayIndex
+from .csv_writer import BufferedCsvWriter
+from .journal import CrawlJournal, PLANNED, IN_FLIGHT, FAILED
+from .parser import get_empty_columns, parse_kx_columns, parse_cffex_columns, columns_to_daily_data
+from .registry import ExchangePlugin, register_exchange, get_exchange_plugin, get_first_date
+from ..storage.sqlite_store import SqliteQuoteStore
+
+
+# The url of the futures daily quote data file, and the date format used in the url.
+DAILY_DATA_URL: Dict[str, str] = {
+    'SHFE': 'http://www.shfe.com.cn/data/dailydata/kx/kx{day}.dat',
+    'CFFEX': 'http://www.cffex.com.cn/sj/hqsj/rtj/{day}/index.xml',
+    'INE': 'http://www.ine.cn/data/dailydata/kx/kx{day}.dat',
+}
+DAILY_DATA_URL_DATE_FORMAT: Dict[str, str] = {
+    'SHFE': '%Y%m%d',
+    'CFFEX': '%Y%m/%d',
+    'INE': '%Y%m%d',
+}
+
+# The INE products, which are listed in the SHFE kx*.dat file too.
+INE_PRODUCT: List[str] = ['sc', 'nr', 'lu', 'bc']
+
+# The rate limiter of the exchange hosts, shared by all the transports of the crawlers in a process.
+rate_limiter: RateLimiter = RateLimiter()
+
+# The transport shared by the crawlers, if no transport passed in.
+default_transport: Optional[HttpTransport] = None
+
+
+def get_default_transport() -> HttpTransport:
+    """
+    Get the transport shared by the crawlers, create it if not yet.
+    :return: <HttpTransport>.
+    """
+    global default_transport
+    if default_transport is None:
+        default_transport = HttpTransport(rate_limiter=rate_limiter)
+    return default_transport
 
 
 def save_as_csv(data: Dict[str, List[FuturesDailyData]], csv_path: Path) -> NoReturn:
@@ -44,198 +87,210 @@ def save_as_csv(data: Dict[str, List[FuturesDailyData]], csv_path: Path) -> NoRe
     :param csv_path:
     :return:
     """
-    make_path_existed(csv_path)
-    for product, quote in data.items():
-        csv_file = csv_path.joinpath(f'{product}.csv')
-        if csv_file.exists():
-            mode = 'a+'
-        else:
-            mode = 'w'
-        with open(csv_file, mode=mode, encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, FuturesDailyData.fields())
-            if mode == 'w':
-                writer.writeheader()
-            for item in quote:
-                writer.writerow(item.to_dict())
+    with BufferedCsvWriter(csv_path) as writer:
+        writer.add(data)
+
+
+def get_daily_data_url(exchange: str, day: date) -> str:
+    """
+    Get the url of the futures daily quote data file of an exchange, for a single day.
+    :param exchange: <str>. exchange symbol.
+    :param day: <datetime.date>.
+    :return: <str>.
+    """
+    return DAILY_DATA_URL[exchange].format(day=day.strftime(DAILY_DATA_URL_DATE_FORMAT[exchange]))
 
 
-def crawl_shfe_futures_daily_data(day: date) -> Dict[str, List[FuturesDailyData]]:
+def parse_shfe_futures_daily_columns(day: date, content: bytes) -> Dict[str, np.ndarray]:
     """
-    Crawl futures daily quote data from SHFE site, for a single day.
+    Parse futures daily quote data responded by SHFE site into columns, for a single day.
     :param day: <datetime.date>.
+    :param content: <bytes>. the body of the kx*.dat file.
+    :return: <dict>. the columns, see <parser.py>.
+    """
+    # The INE products are listed in the SHFE file too, skip them.
+    return parse_kx_columns(day, content, INE_PRODUCT)
+
+
+def parse_shfe_futures_daily_data(day: date, content: bytes) -> Dict[str, List[FuturesDailyData]]:
+    """
+    Parse futures daily quote data responded by SHFE site, for a single day.
+    :param day: <datetime.date>.
+    :param content: <bytes>. the body of the kx*.dat file.
     :return: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
     """
-    url: str = 'http://www.shfe.com.cn/data/dailydata/kx/kx{day}.dat'
-    result: Dict[str, List] = {}
-    response = requests.get(url.format(day=day.strftime('%Y%m%d')))
-    if response.status_code == 200:
-        data = json.loads(response.text)
-        for i in range(len(data['o_curinstrument'])):
-            info = data['o_curinstrument'][i]
-            if info['DELIVERYMONTH'] == '小计' or \
-                    info['DELIVERYMONTH'] == 'efp' or \
-                    info['PRODUCTID'] == '总计' or \
-                    info['PRODUCTID'] == '总计1' or \
-                    info['PRODUCTID'] == '总计2':
-                continue
-
-            symbol = info['PRODUCTID'].split('_', 1)[0]
-            # Skip INE product.
-            if symbol in ['sc', 'nr', 'lu', 'bc']:
-                continue
-
-            if symbol not in result.keys():
-                result[symbol] = []
-            result[symbol].append(
-                FuturesDailyData(
-                    product=symbol,
-                    delivery=info['DELIVERYMONTH'],
-                    date=day,
-                    open=info['OPENPRICE'],
-                    high=info['HIGHESTPRICE'],
-                    low=info['LOWESTPRICE'],
-                    close=info['CLOSEPRICE'],
-                    settlement=info['SETTLEMENTPRICE'],
-                    volume=info['VOLUME'],
-                    open_interest=info['OPENINTEREST']
-                )
-            )
-    else:
-        print(response.status_code)
-    return result
+    return columns_to_daily_data(parse_shfe_futures_daily_columns(day, content))
 
 
-def crawl_cffex_futures_daily_data(day: date) -> Dict[str, List[FuturesDailyData]]:
+def parse_cffex_futures_daily_columns(day: date, content: bytes) -> Dict[str, np.ndarray]:
     """
-    Crawl futures daily quote data from CFFEX site, for a single day.
+    Parse futures daily quote data responded by CFFEX site into columns, for a single day.
     :param day: <datetime.date>.
+    :param content: <bytes>. the body of the index.xml file.
+    :return: <dict>. the columns, see <parser.py>.
+    """
+    return parse_cffex_columns(day, content)
+
+
+def parse_cffex_futures_daily_data(day: date, content: bytes) -> Dict[str, List[FuturesDailyData]]:
+    """
+    Parse futures daily quote data responded by CFFEX site, for a single day.
+    :param day: <datetime.date>.
+    :param content: <bytes>. the body of the index.xml file.
     :return: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
     """
-    url: str = 'http://www.cffex.com.cn/sj/hqsj/rtj/{day}/index.xml'
-    result: Dict[str, List[FuturesDailyData]] = {}
-    data: Dict[str, Any] = {}
-    response = requests.get(url.format(day=day.strftime('%Y%m/%d')))
-    if response.status_code == 200:
-        xml = response.text.encode('utf-8')
-        parser = etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8')
-        root = etree.fromstring(xml, parser=parser)
-        for element in root:
-            for attribute in element:
-                if attribute.text is not None:
-                    data[attribute.tag] = attribute.text.strip()
-                else:
-                    data[attribute.tag] = None
-            if '-' in data['instrumentid']:
-                continue
-            else:
-                symbol = data['productid']
-                if symbol not in result.keys():
-                    result[symbol] = []
-                result[symbol].append(
-                    FuturesDailyData(
-                        product=symbol,
-                        delivery=data['expiredate'][2:6],
-                        date=day,
-                        open=data['openprice'],
-                        high=data['highestprice'],
-                        low=data['lowestprice'],
-                        close=data['closeprice'],
-                        settlement=data['settlementprice'],
-                        volume=data['volume'],
-                        open_interest=data['openinterest']
-                    )
-                )
-        return result
+    return columns_to_daily_data(parse_cffex_futures_daily_columns(day, content))
 
 
-def crawl_ine_futures_daily_data(day: date) -> Dict[str, List[FuturesDailyData]]:
+def parse_ine_futures_daily_columns(day: date, content: bytes) -> Dict[str, np.ndarray]:
     """
-    Crawl futures daily quote data from INE site, for a single day.
+    Parse futures daily quote data responded by INE site into columns, for a single day.
     :param day: <datetime.date>.
+    :param content: <bytes>. the body of the kx*.dat file.
+    :return: <dict>. the columns, see <parser.py>.
+    """
+    return parse_kx_columns(day, content)
+
+
+def parse_ine_futures_daily_data(day: date, content: bytes) -> Dict[str, List[FuturesDailyData]]:
+    """
+    Parse futures daily quote data responded by INE site, for a single day.
+    :param day: <datetime.date>.
+    :param content: <bytes>. the body of the kx*.dat file.
     :return: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
     """
-    url: str = 'http://www.ine.cn/data/dailydata/kx/kx{day}.dat'
-    result: Dict[str, List] = {}
-    response = requests.get(url.format(day=day.strftime('%Y%m%d')))
-    if response.status_code == 200:
-        data = json.loads(response.text)
-        for i in range(len(data['o_curinstrument'])):
-            info = data['o_curinstrument'][i]
-            if info['DELIVERYMONTH'] == '小计' or \
-                    info['DELIVERYMONTH'] == 'efp' or \
-                    info['PRODUCTID'] == '总计' or \
-                    info['PRODUCTID'] == '总计1' or \
-                    info['PRODUCTID'] == '总计2':
-                continue
-
-            symbol = info['PRODUCTID'].split('_', 1)[0]
-            if symbol not in result.keys():
-                result[symbol] = []
-            result[symbol].append(
-                FuturesDailyData(
-                    product=symbol,
-                    delivery=info['DELIVERYMONTH'],
-                    date=day,
-                    open=info['OPENPRICE'],
-                    high=info['HIGHESTPRICE'],
-                    low=info['LOWESTPRICE'],
-                    close=info['CLOSEPRICE'],
-                    settlement=info['SETTLEMENTPRICE'],
-                    volume=info['VOLUME'],
-                    open_interest=info['OPENINTEREST']
-                )
-            )
-    else:
-        print(response.status_code)
+    return columns_to_daily_data(parse_ine_futures_daily_columns(day, content))
+
+
+# The exchanges supported, each supplies only the url building and the parser.
+register_exchange(
+    ExchangePlugin(
+        'SHFE', partial(get_daily_data_url, 'SHFE'), parse_shfe_futures_daily_columns, 8
+    )
+)
+register_exchange(
+    ExchangePlugin(
+        'CFFEX', partial(get_daily_data_url, 'CFFEX'), parse_cffex_futures_daily_columns, 4
+    )
+)
+register_exchange(
+    ExchangePlugin(
+        'INE', partial(get_daily_data_url, 'INE'), parse_ine_futures_daily_columns, 8
+    )
+)
+
+
+def crawl_daily_columns(
+        plugin: ExchangePlugin,
+        day: date,
+        transport: Optional[HttpTransport] = None,
+        archive: Optional[RawArchive] = None,
+        metrics: Optional[CrawlMetrics] = None
+) -> Dict[str, np.ndarray]:
+    """
+    The pipeline of a single day: fetch, archive and parse into columns.
+    :param plugin: <ExchangePlugin>.
+    :param day: <datetime.date>.
+    :param transport: <HttpTransport>. default the shared one.
+    :param archive: <RawArchive>. if given, the raw response is archived.
+    :param metrics: <CrawlMetrics>. if given, the crawl is measured in it.
+    :return: <dict>. the columns, see <parser.py>, empty if the exchange published no data for the day.
+    """
+    result: Dict[str, np.ndarray] = get_empty_columns()
+    if transport is None:
+        transport = get_default_transport()
+    with measure(metrics, 'fetch'):
+        content = transport.get(plugin.get_url(day))
+    if content is not None:
+        if metrics is not None:
+            metrics.add_payload(len(content))
+        if archive is not None:
+            with measure(metrics, 'archive'):
+                archive.put(plugin.exchange, day, content)
+        with measure(metrics, 'parse'):
+            result = plugin.parse_columns(day, content)
+    if metrics is not None:
+        metrics.add_day(len(result['product']))
     return result
 
 
-def crawl_dce_futures_daily_data(day: date) -> Dict[str, List[FuturesDailyData]]:
+def crawl_daily_data(
+        exchange: str,
+        day: date,
+        transport: Optional[HttpTransport] = None,
+        archive: Optional[RawArchive] = None,
+        metrics: Optional[CrawlMetrics] = None
+) -> Dict[str, List[FuturesDailyData]]:
     """
-    Crawl futures daily quote data from DCE site, for a single day.
-    :param day:
-    :return:
+    Crawl futures daily quote data from an exchange site, for a single day.
+    :param exchange: <str>. exchange symbol, registered in <registry.py>.
+    :param day: <datetime.date>.
+    :param transport: <HttpTransport>. default the shared one.
+    :param archive: <RawArchive>. if given, the raw response is archived.
+    :param metrics: <CrawlMetrics>. if given, the crawl is measured in it.
+    :return: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
     """
-    # The site used JavaScript confuse. Find the way out.
-    pass
+    return columns_to_daily_data(crawl_daily_columns(get_exchange_plugin(exchange), day, transport, archive, metrics))
 
 
-def crawl_czce_futures_daily_data(day: date) -> Dict[str, List[FuturesDailyData]]:
+def crawl_shfe_futures_daily_data(
+        day: date,
+        transport: Optional[HttpTransport] = None,
+        archive: Optional[RawArchive] = None,
+        metrics: Optional[CrawlMetrics] = None
+) -> Dict[str, List[FuturesDailyData]]:
     """
-    Crawl futures daily quote data from CZCE site, for a single day..
-    :param day:
-    :return:
+    Crawl futures daily quote data from SHFE site, for a single day. See <crawl_daily_data>.
     """
-    # The site used JavaScript confuse. Find the way out.
-    pass
+    return crawl_daily_data('SHFE', day, transport, archive, metrics)
+
+
+def crawl_cffex_futures_daily_data(
+        day: date,
+        transport: Optional[HttpTransport] = None,
+        archive: Optional[RawArchive] = None,
+        metrics: Optional[CrawlMetrics] = None
+) -> Dict[str, List[FuturesDailyData]]:
+    """
+    Crawl futures daily quote data from CFFEX site, for a single day. See <crawl_daily_data>.
+    """
+    return crawl_daily_data('CFFEX', day, transport, archive, metrics)
+
+
+def crawl_ine_futures_daily_data(
+        day: date,
+        transport: Optional[HttpTransport] = None,
+        archive: Optional[RawArchive] = None,
+        metrics: Optional[CrawlMetrics] = None
+) -> Dict[str, List[FuturesDailyData]]:
+    """
+    Crawl futures daily quote data from INE site, for a single day. See <crawl_daily_data>.
+    """
+    return crawl_daily_data('INE', day, transport, archive, metrics)
 
 
 def check_date(exchange: str, begin: date = None, end: date = None) -> Tuple[date, date]:
     """
     Check the parameters date begin and date end. Raise error if parameters not valid.
-    :param exchange:
+    :param exchange: <str>. exchange symbol, its first date see <registry.get_first_date>.
     :param begin:
     :param end:
     :return:
     """
     date_begin: date
     date_end: date
-    first_date: Dict[str, date] = {
-        'SHFE': date(2002, 1, 7),
-        'DCE': date(2007, 1, 4),
-        'CZCE': date(2005, 4, 29),
-        'CFFEX': date(2010, 4, 16),
-        'INE': date(2018, 3, 26),
-    }
+    first_date: Optional[date] = get_first_date(exchange)
+    if first_date is None and begin is None:
+        raise ValueError(f'Parameter <begin> is required, cause of the first date of exchange <{exchange}> unknown.')
 
     if begin is not None and end is not None and end < begin:
         raise ValueError(
             f'Parameter <end> is earlier than parameter <begin>.'
         )
     elif begin is not None:
-        if begin < first_date[exchange]:
+        if first_date is not None and begin < first_date:
             raise ValueError(
-                f'Parameter <begin> should not be earlier than {first_date[exchange].strftime("%Y-%m-%d")}, '
+                f'Parameter <begin> should not be earlier than {first_date.strftime("%Y-%m-%d")}, '
                 f'cause of exchange <{exchange}> no earlier data provided.'
             )
         elif begin > date.today():
@@ -243,9 +298,9 @@ def check_date(exchange: str, begin: date = None, end: date = None) -> Tuple[dat
                 f'Parameter <begin> should not be later than today ({date.today()}).'
             )
     elif end is not None:
-        if end < first_date[exchange]:
+        if first_date is not None and end < first_date:
             raise ValueError(
-                f'Parameter <end> should not be earlier than {first_date[exchange].strftime("%Y-%m-%d")}, '
+                f'Parameter <end> should not be earlier than {first_date.strftime("%Y-%m-%d")}, '
                 f'cause of exchange <{exchange}> no earlier data provided.'
             )
         elif end > date.today():
@@ -253,7 +308,7 @@ def check_date(exchange: str, begin: date = None, end: date = None) -> Tuple[dat
                 f'Parameter <end> should not be later than today ({date.today()}).'
             )
     if begin is None:
-        date_begin = first_date[exchange]
+        date_begin = first_date
     else:
         date_begin = begin
     if end is None:
@@ -263,42 +318,365 @@ def check_date(exchange: str, begin: date = None, end: date = None) -> Tuple[dat
     return date_begin, date_end
 
 
+def get_crawling_days(begin: date, end: date) -> List[date]:
+    """
+    Get the days to crawl, which are the days between <begin> and <end> (both included) except holidays.
+    :param begin:
+    :param end:
+    :return:
+    """
+    return get_trading_calendar().get_trading_days(begin, end)
+
+
+async def fetch_futures_daily_data_async(
+        transport: AsyncHttpTransport,
+        semaphore: asyncio.Semaphore,
+        exchange: str,
+        day: date,
+        metrics: Optional[CrawlMetrics] = None,
+        acquired: Optional[Callable[[date], Awaitable[None]]] = None
+) -> Optional[bytes]:
+    """
+    Fetch the futures daily quote data file of an exchange, for a single day.
+    :param transport: <AsyncHttpTransport>.
+    :param semaphore: <asyncio.Semaphore>. limit the number of requests in flight.
+    :param exchange: <str>. exchange symbol.
+    :param day: <datetime.date>.
+    :param metrics: <CrawlMetrics>. if given, the fetch is measured in it, not the time waiting for <semaphore>.
+    :param acquired: <Callable>. if given, awaited with the day once <semaphore> acquired, before the request sent.
+    :return: <bytes>, or None if the exchange published no data for the day.
+    """
+    async with semaphore:
+        if acquired is not None:
+            await acquired(day)
+        with measure(metrics, 'fetch'):
+            return await transport.get(get_exchange_plugin(exchange).get_url(day))
+
+
+async def crawl_futures_daily_data_async(
+        exchange: str,
+        day_list: List[date],
+        csv_path: Path,
+        concurrency: int,
+        archive: Optional[RawArchive] = None,
+        index: Optional[StoredDayIndex] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        journal: Optional[CrawlJournal] = None,
+        job_id: Optional[int] = None,
+        metrics: Optional[CrawlMetrics] = None,
+        quote_store: Optional[SqliteQuoteStore] = None
+) -> NoReturn:
+    """
+    Crawl futures daily data from a single exchange concurrently, with asyncio.
+    The responses are parsed in the default executor, off the event loop, and the results are saved in date order.
+    :param exchange: <str>. exchange symbol, registered in <registry.py>.
+    :param day_list: <list>. the days to crawl, in ascending order.
+    :param csv_path: <Path>. where the csv files saved.
+    :param concurrency: <int>. the maximum number of requests in flight.
+    :param archive: <RawArchive>. if given, the raw responses are archived.
+    :param index: <StoredDayIndex>. if given, the saved days are marked in it.
+    :param progress: <Callable>. if given, called with (days done, days total) after each day saved.
+    :param journal: <CrawlJournal>. if given, the days of the job <job_id> are journaled, and a failed day is
+        recorded in it instead of stopping the crawl.
+    :param job_id: <int>.
+    :param metrics: <CrawlMetrics>. if given, the crawl is measured in it.
+    :param quote_store: <SqliteQuoteStore>. if given, the rows of each day saved in it too.
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    plugin: ExchangePlugin = get_exchange_plugin(exchange)
+
+    def archive_a_day(day: date, content: bytes) -> None:
+        with measure(metrics, 'archive'):
+            archive.put(plugin.exchange, day, content)
+
+    def parse_a_day(day: date, content: bytes) -> Dict[str, np.ndarray]:
+        with measure(metrics, 'parse'):
+            return plugin.parse_columns(day, content)
+
+    async def mark_in_flight(day: date) -> None:
+        # The journal commits, keep it off the event loop.
+        await loop.run_in_executor(None, journal.mark_in_flight, job_id, day)
+
+    async def crawl_a_day(
+            day_index: int,
+            day: date,
+            acquired: Optional[Callable[[date], Awaitable[None]]] = None
+    ) -> Tuple[int, Optional[Dict[str, np.ndarray]]]:
+        content = await fetch_futures_daily_data_async(
+            transport, semaphore, plugin.exchange, day, metrics, acquired
+        )
+        result: Dict[str, np.ndarray] = get_empty_columns()
+        if content is not None:
+            if metrics is not None:
+                metrics.add_payload(len(content))
+            if archive is not None:
+                await loop.run_in_executor(None, archive_a_day, day, content)
+            result = await loop.run_in_executor(None, parse_a_day, day, content)
+        if metrics is not None:
+            metrics.add_day(len(result['product']))
+        return day_index, result
+
+    async def crawl_a_day_journaled(day_index: int, day: date) -> Tuple[int, Optional[Dict[str, np.ndarray]]]:
+        # Marked in flight only when its request is about to be sent, the days waiting stay planned.
+        try:
+            return await crawl_a_day(day_index, day, mark_in_flight)
+        except Exception as e:
+            await loop.run_in_executor(None, journal.mark_failed, job_id, day, f'{type(e).__name__}: {e}')
+            return day_index, None
+
+    # Results arrive in any order. Hold them until all the earlier days are saved.
+    # A failed day, journaled, is None and skipped.
+    finished: Dict[int, Optional[Dict[str, np.ndarray]]] = {}
+    next_index: int = 0
+    crawl: Callable = crawl_a_day
+    flushed_callback: Optional[Callable[[List[date]], None]] = None
+    if journal is not None:
+        crawl = crawl_a_day_journaled
+        flushed_callback = lambda day_list_flushed: journal.mark_done(job_id, day_list_flushed)
+    with BufferedCsvWriter(
+            csv_path, index=index, flushed_callback=flushed_callback, metrics=metrics, quote_store=quote_store
+    ) as writer:
+        async with AsyncHttpTransport(pool_size=concurrency, rate_limiter=rate_limiter) as transport:
+            task_list = [asyncio.ensure_future(crawl(i, day)) for i, day in enumerate(day_list)]
+            for task in asyncio.as_completed(task_list):
+                day_index, columns = await task
+                finished[day_index] = columns
+                while next_index in finished:
+                    columns = finished.pop(next_index)
+                    if columns is not None:
+                        # <add_columns> flushes to disk when the buffer is full, so keep it off the event loop too.
+                        await loop.run_in_executor(None, writer.add_columns, columns, day_list[next_index])
+                    next_index += 1
+                    if progress is not None:
+                        progress(next_index, len(day_list))
+
+
+def parse_archived_futures_daily_data(
+        archive_path: Path,
+        exchange: str,
+        day: date,
+        digest: Optional[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Parse the archived futures daily quote data of an exchange into columns, for a single day.
+    Run in worker processes. The digest is resolved from the manifest by the caller, so the workers never read
+    the manifest.
+    :param archive_path: <Path>. the root of the archive.
+    :param exchange: <str>. exchange symbol.
+    :param day: <datetime.date>.
+    :param digest: <str>. the digest of the raw response of the day, None if not archived.
+    :return: <dict>. the columns, see <parser.py>.
+    """
+    if digest is None:
+        return get_empty_columns()
+    content: bytes = RawArchive(archive_path).get_by_digest(digest)
+    return get_exchange_plugin(exchange).parse_columns(day, content)
+
+
+def reparse_futures_daily_data(
+        exchange: str,
+        day_list: List[date],
+        csv_path: Path,
+        archive: RawArchive,
+        max_workers: Optional[int] = None,
+        index: Optional[StoredDayIndex] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        metrics: Optional[CrawlMetrics] = None
+) -> NoReturn:
+    """
+    Rebuild the product csv rows of an exchange from the archived raw responses, no network I/O.
+    The days are parsed in a process pool, and the rows rebuilt replace the stored rows with the same key.
+    :param exchange: <str>. exchange symbol.
+    :param day_list: <list>. the archived days to parse, in ascending order.
+    :param csv_path: <Path>. where the csv files saved.
+    :param archive: <RawArchive>.
+    :param max_workers: <int>. the number of worker processes, default the number of processors.
+    :param index: <StoredDayIndex>. if given, the days parsed are marked in it.
+    :param progress: <Callable>. if given, called with (days done, days total) after each day parsed.
+    :param metrics: <CrawlMetrics>. if given, the rows and the writing are measured in it. The parsing, in the
+        worker processes, is not.
+    :return:
+    """
+    with archive.lock:
+        manifest: Dict[date, str] = dict(archive.load_manifest(exchange))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+            BufferedCsvWriter(csv_path, index=index, metrics=metrics) as writer:
+        result_iterator = executor.map(
+            parse_archived_futures_daily_data,
+            [archive.path] * len(day_list),
+            [exchange] * len(day_list),
+            day_list,
+            [manifest.get(day) for day in day_list],
+            chunksize=32
+        )
+        for n, (day, columns) in enumerate(zip(day_list, result_iterator), start=1):
+            if metrics is not None:
+                metrics.add_day(len(columns['product']))
+            writer.add_columns(columns, day)
+            if progress is not None:
+                progress(n, len(day_list))
+
+
 def crawl_futures_daily_data(
         exchange: str,
         begin: Optional[date] = None,
         end: Optional[date] = None,
-) -> NoReturn:
+        use_async: bool = False,
+        concurrency: Optional[int] = None,
+        use_archive: bool = True,
+        from_archive: bool = False,
+        max_workers: Optional[int] = None,
+        incremental: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+        use_journal: bool = False,
+        retry_failed: bool = False,
+        metrics_file: Optional[Path] = None,
+        use_sqlite: bool = False,
+) -> CrawlMetrics:
     """
     Crawl futures daily data from a single exchange.
-    :param exchange:
+    :param exchange: <str>. exchange symbol, registered in <registry.py>.
     :param begin:
     :param end:
-    :return:
+    :param use_async: <bool>. crawl with asyncio, many days concurrently.
+    :param concurrency: <int>. the maximum number of requests in flight in asyncio mode, default the concurrency
+        of the exchange plugin.
+    :param use_archive: <bool>. archive the raw responses, see <archive.py>.
+    :param from_archive: <bool>. re-parse the archived raw responses instead of crawling, and rebuild the csv rows
+        of the days archived.
+    :param max_workers: <int>. the number of worker processes when re-parsing, default the number of processors.
+    :param incremental: <bool>. crawl only the days not stored yet, see <stored_day_index.py>. If <begin> is None,
+        start from the day after the last stored day.
+    :param progress: <Callable>. if given, called with (days done, days total) after each day.
+    :param use_journal: <bool>. journal the crawl job, see <journal.py>. An unfinished job of the same <exchange>,
+        <begin> and <end> is resumed, crawling only the days not done. A failed day is recorded in the journal
+        instead of stopping the crawl.
+    :param retry_failed: <bool>. with <use_journal>, crawl the failed days of the last job again too.
+    :param metrics_file: <Path>. if given, the metrics of the crawl dumped in it, in json.
+    :param use_sqlite: <bool>. save the rows in the SQLite store too, see <storage/sqlite_store.py>.
+    :return: <CrawlMetrics>. the metrics of the crawl, its summary printed at the end.
     """
-    crawler: Dict[str, Callable] = {
-        'SHFE': crawl_shfe_futures_daily_data,
-        'DCE': crawl_dce_futures_daily_data,
-        'CZCE': crawl_czce_futures_daily_data,
-        'CFFEX': crawl_cffex_futures_daily_data,
-        'INE': crawl_ine_futures_daily_data,
-    }
-
     exchange_symbol: str = exchange.upper()
-    if exchange_symbol not in ['SHFE', 'DCE', 'CZCE', 'CFFEX', 'INE']:
-        raise ValueError(f"<exchange> should be in ['SHFE', 'DCE', 'CZCE', 'CFFEX', 'INE']")
+    plugin: ExchangePlugin = get_exchange_plugin(exchange_symbol)
+    if concurrency is not None and concurrency < 1:
+        raise ValueError('Parameter <concurrency> should be a positive integer.')
 
     date_begin: date
     date_end: date
     date_begin, date_end = check_date(exchange_symbol, begin, end)
+    metrics: CrawlMetrics = CrawlMetrics(exchange_symbol)
 
     downloaded_path: Path = PACKAGE_PATH.joinpath('data', exchange_symbol, 'daily')
     make_path_existed(downloaded_path)
-
-    n: int
-    day: date
-    for n in range((date_end - date_begin).days + 1):
-        day = begin + timedelta(days=n)
-        if is_holiday(day):
-            continue
-        crawled_data = crawler[exchange_symbol](day)
-        save_as_csv(crawled_data, downloaded_path)
+    index: StoredDayIndex = StoredDayIndex(downloaded_path.parent)
+
+    archive: Optional[RawArchive] = None
+    if use_archive or from_archive:
+        archive = RawArchive(PACKAGE_PATH.joinpath('data', 'archive'))
+
+    if from_archive:
+        reparse_futures_daily_data(
+            exchange_symbol,
+            archive.get_day_list(exchange_symbol, date_begin, date_end),
+            downloaded_path,
+            archive,
+            max_workers,
+            index,
+            progress,
+            metrics
+        )
+        report_crawl_metrics(metrics, metrics_file)
+        return metrics
+
+    if incremental and begin is None:
+        watermark: Optional[date] = index.get_watermark()
+        if watermark is not None:
+            date_begin = max(date_begin, watermark + timedelta(days=1))
+    day_list: List[date] = get_crawling_days(date_begin, date_end)
+    if incremental:
+        day_list = index.get_missing_days(day_list)
+
+    journal: Optional[CrawlJournal] = None
+    job_id: Optional[int] = None
+    flushed_callback: Optional[Callable[[List[date]], None]] = None
+    if use_journal:
+        journal = CrawlJournal(PACKAGE_PATH.joinpath('data', 'journal.sqlite3'))
+        job_id = journal.find_job(exchange_symbol, begin, end, [PLANNED, IN_FLIGHT])
+        if job_id is not None:
+            # The days in flight were interrupted, plan them again.
+            journal.replan(job_id, [IN_FLIGHT, FAILED] if retry_failed else [IN_FLIGHT])
+        elif retry_failed:
+            job_id = journal.find_job(exchange_symbol, begin, end, [FAILED])
+            if job_id is not None:
+                journal.replan(job_id, [FAILED])
+        if job_id is None:
+            job_id = journal.create_job(exchange_symbol, begin, end, day_list)
+        day_list = journal.get_day_list(job_id, [PLANNED])
+        flushed_callback = lambda day_list_flushed: journal.mark_done(job_id, day_list_flushed)
+
+    quote_store: Optional[SqliteQuoteStore] = None
+    if use_sqlite:
+        quote_store = SqliteQuoteStore(PACKAGE_PATH.joinpath('data', 'quote.sqlite3'))
+
+    try:
+        if use_async:
+            asyncio.run(
+                crawl_futures_daily_data_async(
+                    exchange_symbol,
+                    day_list,
+                    downloaded_path,
+                    concurrency if concurrency is not None else plugin.concurrency,
+                    archive,
+                    index,
+                    progress,
+                    journal,
+                    job_id,
+                    metrics,
+                    quote_store
+                )
+            )
+        else:
+            day: date
+            with HttpTransport(rate_limiter=rate_limiter) as transport, \
+                    BufferedCsvWriter(
+                        downloaded_path,
+                        index=index,
+                        flushed_callback=flushed_callback,
+                        metrics=metrics,
+                        quote_store=quote_store
+                    ) as writer:
+                for n, day in enumerate(day_list, start=1):
+                    if journal is None:
+                        writer.add_columns(crawl_daily_columns(plugin, day, transport, archive, metrics), day)
+                    else:
+                        journal.mark_in_flight(job_id, day)
+                        try:
+                            columns = crawl_daily_columns(plugin, day, transport, archive, metrics)
+                        except Exception as e:
+                            journal.mark_failed(job_id, day, f'{type(e).__name__}: {e}')
+                        else:
+                            writer.add_columns(columns, day)
+                    if progress is not None:
+                        progress(n, len(day_list))
+    finally:
+        if journal is not None:
+            journal.close()
+        if quote_store is not None:
+            quote_store.close()
+        report_crawl_metrics(metrics, metrics_file)
+    return metrics
+
+
+def report_crawl_metrics(metrics: CrawlMetrics, metrics_file: Optional[Path] = None) -> None:
+    """
+    Print the summary of the metrics of a crawl, and dump them if <metrics_file> given.
+    :param metrics: <CrawlMetrics>.
+    :param metrics_file: <Path>.
+    :return:
+    """
+    metrics.finish()
+    print(metrics.summary())
+    if metrics_file is not None:
+        metrics.dump(metrics_file)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+The journal of crawl jobs, backed by SQLite.
+
+A job is a crawl of an exchange, for the <begin> and <end> requested. It is made of units, one for each
+(exchange, day) planned, in one of the status:
+    planned     not crawled yet.
+    in_flight   being crawled. Found in a job restarted, it means the crawl was interrupted, so it is planned again.
+    done        the data saved.
+    failed      crawling failed, the error recorded. Crawled again only if asked.
+
+The journal file saved in <Package path>\\data\\journal.sqlite3
+"""
+
+
+from typing import Dict, Iterable, List, Optional
+from datetime import date, datetime
+from pathlib import Path
+import sqlite3
+import threading
+
+from ..utility import make_path_existed
+
+
+PLANNED: str = 'planned'
+IN_FLIGHT: str = 'in_flight'
+DONE: str = 'done'
+FAILED: str = 'failed'
+
+
+class CrawlJournal(object):
+    """
+    The journal of crawl jobs. Thread safe.
+    """
+    def __init__(self, journal_file: Path):
+        make_path_existed(journal_file.parent)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(journal_file), check_same_thread=False)
+        with self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS job ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'exchange TEXT NOT NULL, '
+                'begin TEXT NOT NULL, '
+                'end TEXT NOT NULL, '
+                'created_at TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS unit ('
+                'job_id INTEGER NOT NULL REFERENCES job(id), '
+                'day TEXT NOT NULL, '
+                'status TEXT NOT NULL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, '
+                'error TEXT, '
+                'updated_at TEXT NOT NULL, '
+                'PRIMARY KEY (job_id, day))'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS unit_status ON unit (job_id, status)')
+
+    def find_job(
+            self,
+            exchange: str,
+            begin: Optional[date],
+            end: Optional[date],
+            status_list: Iterable[str]
+    ) -> Optional[int]:
+        """
+        Find the last job of the exchange and the requested dates, which has units in any of the status.
+        :param exchange: <str>. exchange symbol.
+        :param begin: <datetime.date>. the <begin> requested, None if not.
+        :param end: <datetime.date>. the <end> requested, None if not.
+        :param status_list: the status.
+        :return: <int>. the job id, or None if not found.
+        """
+        status_list = list(status_list)
+        with self.lock:
+            row = self.connection.execute(
+                f'SELECT job.id FROM job WHERE exchange = ? AND begin = ? AND end = ? AND EXISTS ('
+                f'SELECT 1 FROM unit WHERE unit.job_id = job.id '
+                f'AND unit.status IN ({", ".join("?" * len(status_list))})'
+                f') ORDER BY job.id DESC LIMIT 1',
+                [exchange, self.to_text(begin), self.to_text(end), *status_list]
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def create_job(self, exchange: str, begin: Optional[date], end: Optional[date], day_list: List[date]) -> int:
+        """
+        Create a job, with a planned unit for each day.
+        :param exchange: <str>. exchange symbol.
+        :param begin: <datetime.date>. the <begin> requested, None if not.
+        :param end: <datetime.date>. the <end> requested, None if not.
+        :param day_list: the days planned.
+        :return: <int>. the job id.
+        """
+        now: str = datetime.now().isoformat()
+        with self.lock, self.connection:
+            job_id: int = self.connection.execute(
+                'INSERT INTO job (exchange, begin, end, created_at) VALUES (?, ?, ?, ?)',
+                [exchange, self.to_text(begin), self.to_text(end), now]
+            ).lastrowid
+            self.connection.executemany(
+                'INSERT INTO unit (job_id, day, status, updated_at) VALUES (?, ?, ?, ?)',
+                [(job_id, day.isoformat(), PLANNED, now) for day in day_list]
+            )
+        return job_id
+
+    def get_day_list(self, job_id: int, status_list: Iterable[str]) -> List[date]:
+        """
+        Get the days of a job in any of the status, in ascending order.
+        :param job_id: <int>.
+        :param status_list: the status.
+        :return: <list>.
+        """
+        status_list = list(status_list)
+        with self.lock:
+            row_list = self.connection.execute(
+                f'SELECT day FROM unit WHERE job_id = ? AND status IN ({", ".join("?" * len(status_list))}) '
+                f'ORDER BY day',
+                [job_id, *status_list]
+            ).fetchall()
+        return [date.fromisoformat(row[0]) for row in row_list]
+
+    def get_summary(self, job_id: int) -> Dict[str, int]:
+        """
+        Get the number of units of a job in each status.
+        :param job_id: <int>.
+        :return: <dict>. key is the status, and value is the number of units.
+        """
+        result: Dict[str, int] = {PLANNED: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        with self.lock:
+            for status, count in self.connection.execute(
+                    'SELECT status, COUNT(*) FROM unit WHERE job_id = ? GROUP BY status', [job_id]
+            ):
+                result[status] = count
+        return result
+
+    def get_error(self, job_id: int, day: date) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT error FROM unit WHERE job_id = ? AND day = ?', [job_id, day.isoformat()]
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def replan(self, job_id: int, status_list: Iterable[str]) -> None:
+        """
+        Plan the units of a job in any of the status again.
+        :param job_id: <int>.
+        :param status_list: the status.
+        :return:
+        """
+        status_list = list(status_list)
+        with self.lock, self.connection:
+            self.connection.execute(
+                f'UPDATE unit SET status = ?, updated_at = ? '
+                f'WHERE job_id = ? AND status IN ({", ".join("?" * len(status_list))})',
+                [PLANNED, datetime.now().isoformat(), job_id, *status_list]
+            )
+
+    def mark_in_flight(self, job_id: int, day: date) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE unit SET status = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ? AND day = ?',
+                [IN_FLIGHT, datetime.now().isoformat(), job_id, day.isoformat()]
+            )
+
+    def mark_done(self, job_id: int, day_list: Iterable[date]) -> None:
+        now: str = datetime.now().isoformat()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'UPDATE unit SET status = ?, error = NULL, updated_at = ? WHERE job_id = ? AND day = ?',
+                [(DONE, now, job_id, day.isoformat()) for day in day_list]
+            )
+
+    def mark_failed(self, job_id: int, day: date, error: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE unit SET status = ?, error = ?, updated_at = ? WHERE job_id = ? AND day = ?',
+                [FAILED, error, datetime.now().isoformat(), job_id, day.isoformat()]
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'CrawlJournal':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @staticmethod
+    def to_text(day: Optional[date]) -> str:
+        return day.isoformat() if day is not None else ''
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Instrumentation of a crawl, to tell whether it is network-bound, parse-bound or disk-bound.
+
+For each exchange crawled, recorded:
+    the time of each stage, in a latency histogram:
+        fetch       the HTTP request, with retries, and the gzip decoding.
+        archive     archiving the raw response.
+        parse       decoding the json or xml payload, into rows.
+        write       flushing the rows into the product csv files.
+    the payload sizes, in bytes.
+    the rows per day.
+    the errors, counted by stage and exception type.
+    the busy time of each bound, network (fetch), parse, or disk (archive and write), the wall-clock time with any
+    of its stages in progress. The requests overlapped in asyncio mode are counted once, so the bounds compare
+    fairly whatever the concurrency.
+The summary is a readable text, and the dump a json file.
+"""
+
+
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import threading
+import json
+import time
+
+
+# The upper bounds of the latency histogram buckets, in seconds. The last bucket is unbounded.
+LATENCY_BUCKETS: List[float] = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0]
+
+STAGES: List[str] = ['fetch', 'archive', 'parse', 'write']
+
+# The bound of each stage.
+STAGE_BOUNDS: Dict[str, str] = {'fetch': 'network', 'parse': 'parse', 'archive': 'disk', 'write': 'disk'}
+
+
+class Histogram(object):
+    """
+    A histogram of values, in fixed buckets.
+    """
+    def __init__(self, buckets: List[float]):
+        """
+        :param buckets: <list>. the upper bounds of the buckets, ascending.
+        """
+        self.buckets: List[float] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        i: int = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def get_percentile(self, percent: float) -> float:
+        """
+        Get the percentile, estimated as the upper bound of its bucket, and the maximum at most.
+        :param percent: <float>. in (0, 100].
+        :return: <float>. 0 if no value added.
+        """
+        if not self.count:
+            return 0.0
+        rank: float = self.count * percent / 100
+        accumulated: int = 0
+        for i, count in enumerate(self.counts):
+            accumulated += count
+            if accumulated >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.get_percentile(50),
+            'p90': self.get_percentile(90),
+            'p99': self.get_percentile(99),
+            'buckets': self.buckets,
+            'counts': self.counts,
+        }
+
+
+class CrawlMetrics(object):
+    """
+    The metrics of crawling an exchange. Thread safe.
+    """
+    def __init__(self, exchange: str):
+        self.exchange: str = exchange
+        self.lock = threading.Lock()
+        self.begin_time: float = time.perf_counter()
+        self.end_time: Optional[float] = None
+
+        self.latency: Dict[str, Histogram] = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.payload_bytes: int = 0
+        self.payload_count: int = 0
+        self.day_count: int = 0
+        self.empty_day_count: int = 0
+        self.row_count: int = 0
+        self.max_rows_per_day: int = 0
+        self.errors: Dict[str, int] = {}
+        # bound: the stages in progress, when they began, and the busy time.
+        self.in_progress: Dict[str, int] = {bound: 0 for bound in STAGE_BOUNDS.values()}
+        self.busy_begin: Dict[str, float] = {bound: 0.0 for bound in STAGE_BOUNDS.values()}
+        self.busy: Dict[str, float] = {bound: 0.0 for bound in STAGE_BOUNDS.values()}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """
+        Measure the time of a stage, and count the error raised in it.
+        :param stage: <str>. see STAGES.
+        :return:
+        """
+        bound: str = STAGE_BOUNDS[stage]
+        begin: float = time.perf_counter()
+        with self.lock:
+            if self.in_progress[bound] == 0:
+                self.busy_begin[bound] = begin
+            self.in_progress[bound] += 1
+        try:
+            yield
+        except Exception as e:
+            self.add_error(stage, e)
+            raise
+        finally:
+            end: float = time.perf_counter()
+            with self.lock:
+                self.latency[stage].add(end - begin)
+                self.in_progress[bound] -= 1
+                if self.in_progress[bound] == 0:
+                    self.busy[bound] += end - self.busy_begin[bound]
+
+    def add_error(self, stage: str, error: Exception) -> None:
+        key: str = f'{stage}: {type(error).__name__}'
+        with self.lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def add_payload(self, size: int) -> None:
+        with self.lock:
+            self.payload_bytes += size
+            self.payload_count += 1
+
+    def add_day(self, rows: int) -> None:
+        """
+        Record a day crawled.
+        :param rows: <int>. the number of rows parsed, 0 if no data published.
+        :return:
+        """
+        with self.lock:
+            self.day_count += 1
+            self.empty_day_count += rows == 0
+            self.row_count += rows
+            self.max_rows_per_day = max(self.max_rows_per_day, rows)
+
+    def finish(self) -> None:
+        self.end_time = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end_time if self.end_time is not None else time.perf_counter()) - self.begin_time
+
+    def get_bound(self) -> str:
+        """
+        Get the bound most of the wall-clock time spent in.
+        :return: <str>. 'network', 'parse' or 'disk', or '' if nothing measured.
+        """
+        if not any(self.busy.values()):
+            return ''
+        return max(self.busy.keys(), key=lambda k: self.busy[k])
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'exchange': self.exchange,
+                'elapsed': self.elapsed,
+                'days': self.day_count,
+                'empty_days': self.empty_day_count,
+                'rows': self.row_count,
+                'rows_per_day': self.row_count / self.day_count if self.day_count else 0.0,
+                'max_rows_per_day': self.max_rows_per_day,
+                'payloads': self.payload_count,
+                'payload_bytes': self.payload_bytes,
+                'bytes_per_second': self.payload_bytes / self.elapsed if self.elapsed > 0 else 0.0,
+                'latency': {stage: histogram.to_dict() for stage, histogram in self.latency.items()},
+                'errors': dict(self.errors),
+                'busy': dict(self.busy),
+                'bound': self.get_bound(),
+            }
+
+    def summary(self) -> str:
+        """
+        Get a readable summary.
+        :return: <str>.
+        """
+        d: Dict[str, Any] = self.to_dict()
+        line_list: List[str] = [
+            f'{self.exchange}: {d["days"]} days ({d["empty_days"]} empty) in {d["elapsed"]:.2f}s, '
+            f'{d["rows"]} rows ({d["rows_per_day"]:.1f}/day, max {d["max_rows_per_day"]}), '
+            f'{d["payload_bytes"] / 1024:.1f} KiB ({d["bytes_per_second"] / 1024:.1f} KiB/s)',
+        ]
+        for stage, histogram in self.latency.items():
+            if histogram.count:
+                line_list.append(
+                    f'    {stage:<8} n={histogram.count:<6} total={histogram.total:.3f}s '
+                    f'mean={histogram.mean * 1000:.1f}ms p50={histogram.get_percentile(50) * 1000:.1f}ms '
+                    f'p90={histogram.get_percentile(90) * 1000:.1f}ms p99={histogram.get_percentile(99) * 1000:.1f}ms '
+                    f'max={histogram.max * 1000:.1f}ms'
+                )
+        if d['errors']:
+            line_list.append('    errors   ' + ', '.join(f'{key} x{count}' for key, count in d['errors'].items()))
+        if d['bound']:
+            line_list.append(f'    mostly {d["bound"]}-bound')
+        return '\n'.join(line_list)
+
+    def dump(self, json_file: Path) -> None:
+        """
+        Dump the metrics into a json file.
+        :param json_file: <Path>.
+        :return:
+        """
+        json_file.write_text(json.dumps(self.to_dict(), indent=2), encoding='utf-8')
+
+
+def measure(metrics: Optional[CrawlMetrics], stage: str) -> ContextManager:
+    """
+    Measure a stage, if metrics given.
+    :param metrics: <CrawlMetrics>.
+    :param stage: <str>.
+    :return: a context manager.
+    """
+    return metrics.measure(stage) if metrics is not None else nullcontext()
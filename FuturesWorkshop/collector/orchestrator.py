@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Crawl futures daily data from many exchanges at once.
+
+Each exchange is crawled by <crawl_futures_daily_data> in its own worker process, so the parsing of
+SHFE, INE and CFFEX overlaps. The workers report the days done through a queue, and the aggregate
+progress is passed to a callback in the calling process. No Qt needed.
+"""
+
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from multiprocessing.context import BaseContext
+import multiprocessing
+import queue
+import time
+
+from .exchange_crawler import crawl_futures_daily_data
+
+
+class CrawlProgress(object):
+    """
+    The aggregate progress of crawling many exchanges.
+    """
+    def __init__(self, exchange_list: Iterable[str]):
+        self.begin_time: float = time.perf_counter()
+        self.done: Dict[str, int] = {exchange: 0 for exchange in exchange_list}
+        self.total: Dict[str, int] = {exchange: 0 for exchange in self.done.keys()}
+        self.finished: Dict[str, bool] = {exchange: False for exchange in self.done.keys()}
+        self.error: Dict[str, Optional[str]] = {exchange: None for exchange in self.done.keys()}
+
+    def update(self, exchange: str, done: int, total: int) -> None:
+        self.done[exchange] = done
+        self.total[exchange] = total
+
+    def finish(self, exchange: str, error: Optional[str] = None) -> None:
+        self.finished[exchange] = True
+        self.error[exchange] = error
+
+    @property
+    def days_done(self) -> int:
+        return sum(self.done.values())
+
+    @property
+    def days_total(self) -> int:
+        return sum(self.total.values())
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.begin_time
+
+    @property
+    def days_per_second(self) -> float:
+        elapsed: float = self.elapsed
+        return self.days_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def is_finished(self) -> bool:
+        return all(self.finished.values())
+
+    def __str__(self) -> str:
+        exchange_progress: str = ', '.join(
+            f'{exchange} {self.done[exchange]}/{self.total[exchange]}'
+            f'{" failed" if self.error[exchange] is not None else ""}'
+            for exchange in self.done.keys()
+        )
+        return f'{exchange_progress}; {self.days_done}/{self.days_total} days, ' \
+               f'{self.days_per_second:.1f} days/s, {self.elapsed:.1f}s'
+
+    def __repr__(self) -> str:
+        return f'<CrawlProgress({self})>'
+
+
+def crawl_exchange_in_worker(
+        exchange: str,
+        begin: Optional[date],
+        end: Optional[date],
+        progress_queue: Any,
+        options: Dict[str, Any]
+) -> None:
+    """
+    Crawl a single exchange, run in a worker process.
+    :param exchange: <str>. exchange symbol.
+    :param begin:
+    :param end:
+    :param progress_queue: a queue shared with the calling process, (exchange, done, total) put after each day.
+    :param options: the other keyword arguments for <crawl_futures_daily_data>.
+    :return:
+    """
+    def progress(done: int, total: int) -> None:
+        progress_queue.put((exchange, done, total))
+
+    crawl_futures_daily_data(exchange, begin, end, progress=progress, **options)
+
+
+def crawl_exchanges(
+        exchange_list: Iterable[str],
+        begin: Optional[date] = None,
+        end: Optional[date] = None,
+        progress_callback: Optional[Callable[[CrawlProgress], None]] = None,
+        interval: float = 0.5,
+        mp_context: Optional[BaseContext] = None,
+        **options
+) -> CrawlProgress:
+    """
+    Crawl futures daily data from many exchanges, each in its own worker process.
+    A failed exchange does not stop the others, its error is recorded in the result.
+    :param exchange_list: the exchange symbols.
+    :param begin: see <crawl_futures_daily_data>.
+    :param end: see <crawl_futures_daily_data>.
+    :param progress_callback: <Callable>. if given, called with the <CrawlProgress> when progress made, at most once
+        every <interval> seconds, and once when all finished.
+    :param interval: <float>. in seconds.
+    :param mp_context: <BaseContext>. the multiprocessing context of the workers, default the platform default.
+        Use the 'spawn' context when called from a process running other threads, such as a Qt application.
+    :param options: the other keyword arguments for <crawl_futures_daily_data>, such as use_async or incremental.
+    :return: <CrawlProgress>. the final progress.
+    """
+    exchange_symbol_list: List[str] = list(dict.fromkeys(exchange.upper() for exchange in exchange_list))
+    result: CrawlProgress = CrawlProgress(exchange_symbol_list)
+    if not exchange_symbol_list:
+        return result
+
+    def drain(progress_queue: Any) -> bool:
+        updated: bool = False
+        while True:
+            try:
+                exchange, done, total = progress_queue.get_nowait()
+            except queue.Empty:
+                return updated
+            result.update(exchange, done, total)
+            updated = True
+
+    if mp_context is None:
+        mp_context = multiprocessing.get_context()
+    with mp_context.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=len(exchange_symbol_list), mp_context=mp_context) as executor:
+        progress_queue = manager.Queue()
+        future_dict: Dict[Future, str] = {
+            executor.submit(crawl_exchange_in_worker, exchange, begin, end, progress_queue, options): exchange
+            for exchange in exchange_symbol_list
+        }
+        pending = set(future_dict.keys())
+        while pending:
+            done_set, pending = wait(pending, timeout=interval, return_when=FIRST_COMPLETED)
+            updated: bool = drain(progress_queue)
+            for future in done_set:
+                error: Optional[BaseException] = future.exception()
+                result.finish(future_dict[future], None if error is None else f'{type(error).__name__}: {error}')
+                updated = True
+            if updated and pending and progress_callback is not None:
+                progress_callback(result)
+        drain(progress_queue)
+
+    if progress_callback is not None:
+        progress_callback(result)
+    return result
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Columnar parsers of the futures daily quote data responded by exchanges.
+
+A parser turns a payload directly into columns, a dict of NumPy arrays of the same length:
+    product         <U>, product symbol
+    delivery        <U>, delivery month, such as '2105'
+    date            datetime64[D]
+    open            float64
+    high            float64
+    low             float64
+    close           float64
+    settlement      float64
+    volume          float64
+    open_interest   float64
+The numeric columns are float64, so a missing value is NaN, and saved as an empty csv cell.
+"""
+
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from datetime import date
+from io import BytesIO
+import json
+
+import numpy as np
+from lxml import etree
+
+from ..definition import FuturesDailyData
+
+
+PRICE_FIELDS: List[str] = ['open', 'high', 'low', 'close', 'settlement', 'volume', 'open_interest']
+
+# The keys in the kx*.dat payload of SHFE and INE.
+KX_KEYS: Dict[str, str] = {
+    'product': 'PRODUCTID',
+    'delivery': 'DELIVERYMONTH',
+    'open': 'OPENPRICE',
+    'high': 'HIGHESTPRICE',
+    'low': 'LOWESTPRICE',
+    'close': 'CLOSEPRICE',
+    'settlement': 'SETTLEMENTPRICE',
+    'volume': 'VOLUME',
+    'open_interest': 'OPENINTEREST',
+}
+
+# The subtotal rows in the kx*.dat payload.
+KX_SUBTOTAL_DELIVERY: List[str] = ['小计', 'efp']
+KX_SUBTOTAL_PRODUCT: List[str] = ['总计', '总计1', '总计2']
+
+
+def to_float_array(value_list: Sequence[Any]) -> np.ndarray:
+    """
+    Convert the values to a float64 array, None and empty string to NaN.
+    :param value_list:
+    :return:
+    """
+    return np.array(
+        [np.nan if value is None or value == '' else value for value in value_list],
+        dtype=np.float64
+    )
+
+
+def get_empty_columns() -> Dict[str, np.ndarray]:
+    result: Dict[str, np.ndarray] = {
+        'product': np.array([], dtype=np.str_),
+        'delivery': np.array([], dtype=np.str_),
+        'date': np.array([], dtype='datetime64[D]'),
+    }
+    for field in PRICE_FIELDS:
+        result[field] = np.array([], dtype=np.float64)
+    return result
+
+
+def parse_kx_columns(day: date, content: bytes, excluded_product: Iterable[str] = ()) -> Dict[str, np.ndarray]:
+    """
+    Parse the kx*.dat payload of SHFE or INE into columns.
+    :param day: <datetime.date>.
+    :param content: <bytes>. the body of the kx*.dat file.
+    :param excluded_product: the product symbols to skip.
+    :return: <dict>. the columns, see the module docstring.
+    """
+    row_list: List[Dict[str, Any]] = json.loads(content)['o_curinstrument']
+    if not row_list:
+        return get_empty_columns()
+
+    raw: Dict[str, List[Any]] = {field: [row[key] for row in row_list] for field, key in KX_KEYS.items()}
+    product_id: np.ndarray = np.array(raw['product'], dtype=np.str_)
+    delivery: np.ndarray = np.char.strip(np.array(raw['delivery'], dtype=np.str_))
+    # The product id is like 'rb_f'.
+    product: np.ndarray = np.char.partition(product_id, '_')[:, 0]
+
+    mask: np.ndarray = ~(
+        np.isin(delivery, KX_SUBTOTAL_DELIVERY) |
+        np.isin(product_id, KX_SUBTOTAL_PRODUCT) |
+        np.isin(product, list(excluded_product))
+    )
+
+    result: Dict[str, np.ndarray] = {
+        'product': product[mask],
+        'delivery': delivery[mask],
+        'date': np.full(np.count_nonzero(mask), np.datetime64(day, 'D')),
+    }
+    for field in PRICE_FIELDS:
+        result[field] = to_float_array(raw[field])[mask]
+    return result
+
+
+# The tags in the index.xml payload of CFFEX.
+CFFEX_TAGS: Dict[str, str] = {
+    'open': 'openprice',
+    'high': 'highestprice',
+    'low': 'lowestprice',
+    'close': 'closeprice',
+    'settlement': 'settlementprice',
+    'volume': 'volume',
+    'open_interest': 'openinterest',
+}
+
+
+def parse_cffex_columns(day: date, content: bytes) -> Dict[str, np.ndarray]:
+    """
+    Parse the index.xml payload of CFFEX into columns, streaming.
+    Each record element is read into a fresh dict and cleared once parsed, so the memory stays flat.
+    The options, whose instrument id contains '-', are skipped.
+    :param day: <datetime.date>.
+    :param content: <bytes>. the body of the index.xml file.
+    :return: <dict>. the columns, see the module docstring.
+    """
+    product: List[str] = []
+    delivery: List[str] = []
+    raw: Dict[str, List[Optional[str]]] = {field: [] for field in CFFEX_TAGS.keys()}
+
+    for event, element in etree.iterparse(BytesIO(content), events=('end',), recover=True, encoding='utf-8'):
+        parent = element.getparent()
+        # A record is a child of the root element.
+        if parent is None or parent.getparent() is not None:
+            continue
+
+        record: Dict[str, Optional[str]] = {
+            child.tag: child.text.strip() if child.text is not None else None for child in element
+        }
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+
+        instrument_id: str = record.get('instrumentid') or ''
+        if '-' in instrument_id or record.get('productid') is None:
+            continue
+        product.append(record['productid'])
+        delivery.append((record.get('expiredate') or '')[2:6])
+        for field, tag in CFFEX_TAGS.items():
+            raw[field].append(record.get(tag))
+
+    if not product:
+        return get_empty_columns()
+    result: Dict[str, np.ndarray] = {
+        'product': np.array(product, dtype=np.str_),
+        'delivery': np.array(delivery, dtype=np.str_),
+        'date': np.full(len(product), np.datetime64(day, 'D')),
+    }
+    for field in PRICE_FIELDS:
+        result[field] = to_float_array(raw[field])
+    return result
+
+
+def column_to_list(column: np.ndarray) -> List[Any]:
+    """
+    Convert a column to a list of Python values, as saved in csv files.
+    float: NaN to empty string, integral value to int.
+    datetime64: to <datetime.date>.
+    :param column:
+    :return:
+    """
+    if column.dtype.kind == 'f':
+        return ['' if x != x else int(x) if x.is_integer() else x for x in column.tolist()]
+    return column.tolist()
+
+
+def columns_to_row_list(columns: Dict[str, np.ndarray]) -> List[List[Any]]:
+    """
+    Convert columns to rows, in the order of FuturesDailyData.fields().
+    :param columns:
+    :return:
+    """
+    return [list(row) for row in zip(*[column_to_list(columns[field]) for field in FuturesDailyData.fields()])]
+
+
+def columns_to_daily_data(columns: Dict[str, np.ndarray]) -> Dict[str, List[FuturesDailyData]]:
+    """
+    Convert columns to <FuturesDailyData> objects.
+    :param columns:
+    :return: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
+    """
+    result: Dict[str, List[FuturesDailyData]] = {}
+    for row in columns_to_row_list(columns):
+        if row[0] not in result.keys():
+            result[row[0]] = []
+        result[row[0]].append(FuturesDailyData(*row))
+    return result
+
+
+def daily_data_to_columns(data: Dict[str, List[FuturesDailyData]]) -> Dict[str, np.ndarray]:
+    """
+    Convert <FuturesDailyData> objects to columns.
+    :param data: <dict>. key is the product symbol, and value is a list of <FuturesDailyData> object.
+    :return:
+    """
+    item_list: List[FuturesDailyData] = [item for quote in data.values() for item in quote]
+    if not item_list:
+        return get_empty_columns()
+    result: Dict[str, np.ndarray] = {
+        'product': np.array([item.product for item in item_list], dtype=np.str_),
+        'delivery': np.array([item.delivery for item in item_list], dtype=np.str_),
+        'date': np.array([item.date for item in item_list], dtype='datetime64[D]'),
+    }
+    for field in PRICE_FIELDS:
+        result[field] = to_float_array([getattr(item, field) for item in item_list])
+    return result
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Adaptive per-host rate limiter of the crawler transports.
+
+Each host has a token bucket, refilled at <rate> requests per second, holding at most <burst> tokens.
+A request takes a token, and waits if the bucket is empty. The rate adapts to the host, additive increase
+and multiplicative decrease:
+    healthy response (200, 404) fast enough     rate = min(max_rate, rate + increase)
+    HTTP 429, 5xx, connection error, or slow    rate = max(min_rate, rate * decrease)
+The rate decreases at most once a round trip, since the requests in flight report the same congestion.
+A <Retry-After> asked by the host pauses all the requests to it.
+"""
+
+
+from typing import Any, Dict
+from urllib.parse import urlsplit
+import threading
+import time
+
+
+class HostRateLimiter(object):
+    """
+    The adaptive token bucket of a single host. Thread safe.
+    """
+    def __init__(self,
+                 rate: float = 10.0,
+                 burst: float = 10.0,
+                 min_rate: float = 0.5,
+                 max_rate: float = 50.0,
+                 increase: float = 0.5,
+                 decrease: float = 0.5,
+                 slow_latency: float = 5.0,
+                 ):
+        """
+        :param rate: <float>. the initial rate, in requests per second.
+        :param burst: <float>. the capacity of the bucket, in requests.
+        :param min_rate: <float>. in requests per second.
+        :param max_rate: <float>. in requests per second.
+        :param increase: <float>. added to the rate after a healthy response, in requests per second.
+        :param decrease: <float>. the rate multiplied by it after a congested response, between 0 and 1.
+        :param slow_latency: <float>. a response slower than it, in seconds, is taken as congested.
+        """
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError('Parameter <rate> should be in [<min_rate>, <max_rate>], and <min_rate> positive.')
+        if not 0 < decrease < 1:
+            raise ValueError('Parameter <decrease> should be between 0 and 1.')
+        self.rate: float = rate
+        self.burst: float = burst
+        self.min_rate: float = min_rate
+        self.max_rate: float = max_rate
+        self.increase: float = increase
+        self.decrease: float = decrease
+        self.slow_latency: float = slow_latency
+
+        self.lock = threading.Lock()
+        # Negative if reserved by the requests waiting.
+        self.tokens: float = burst
+        self.updated_at: float = time.monotonic()
+        self.decreased_at: float = float('-inf')
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """
+        Take a token for a request.
+        :return: <float>. the delay before the request sent, in seconds.
+        """
+        with self.lock:
+            self.refill(time.monotonic())
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def record(self, latency: float, congested: bool) -> None:
+        """
+        Adapt the rate to a response.
+        :param latency: <float>. in seconds.
+        :param congested: <bool>. HTTP 429, 5xx or connection error responded.
+        :return:
+        """
+        with self.lock:
+            now: float = time.monotonic()
+            self.refill(now)
+            if congested or latency > self.slow_latency:
+                if now - self.decreased_at >= max(latency, 1 / self.rate):
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.decreased_at = now
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Pause the requests to the host, as asked in <Retry-After>.
+        :param seconds: <float>.
+        :return:
+        """
+        with self.lock:
+            self.refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class RateLimiter(object):
+    """
+    The adaptive rate limiters of all the hosts, created on the first request to a host. Thread safe.
+    """
+    def __init__(self, **options: Any):
+        """
+        :param options: the keyword arguments for <HostRateLimiter>.
+        """
+        self.options: Dict[str, Any] = options
+        self.lock = threading.Lock()
+        self.host_dict: Dict[str, HostRateLimiter] = {}
+
+    def get_host_limiter(self, url: str) -> HostRateLimiter:
+        host: str = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.host_dict.keys():
+                self.host_dict[host] = HostRateLimiter(**self.options)
+            return self.host_dict[host]
+
+    def reserve(self, url: str) -> float:
+        return self.get_host_limiter(url).reserve()
+
+    def record(self, url: str, latency: float, congested: bool) -> None:
+        self.get_host_limiter(url).record(latency, congested)
+
+    def pause(self, url: str, seconds: float) -> None:
+        self.get_host_limiter(url).pause(seconds)
+
+    def get_rate(self, url: str) -> float:
+        return self.get_host_limiter(url).rate
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+The registry of the exchanges supported by the crawl pipeline.
+
+An exchange supplies only how to build the url of its daily data file for a day, how to parse the file
+into columns, and the first day its data is provided. The pipeline, in <exchange_crawler.py>, provides the rest
+for all the exchanges alike: fetching with retries and rate limiting, concurrency, archiving, journaling, metrics
+and storing.
+
+The first days of the known exchanges are listed in FIRST_DATE, registered or not.
+"""
+
+
+from typing import Callable, Dict, List, Optional
+from datetime import date
+
+import numpy as np
+
+from ..definition import FuturesDailyData
+from .parser import columns_to_daily_data
+
+
+class ExchangePlugin(object):
+    """
+    What an exchange supplies to the crawl pipeline.
+    """
+    def __init__(self,
+                 exchange: str,
+                 url_builder: Callable[[date], str],
+                 column_parser: Callable[[date, bytes], Dict[str, np.ndarray]],
+                 concurrency: int = 4,
+                 first_date: Optional[date] = None,
+                 ):
+        """
+        :param exchange: <str>. exchange symbol.
+        :param url_builder: <Callable>. get the url of the daily data file for a day.
+        :param column_parser: <Callable>. parse the daily data file of a day into columns, see <parser.py>.
+        :param concurrency: <int>. the maximum number of requests in flight, in asyncio crawl mode.
+        :param first_date: <datetime.date>. the first day the exchange provides data, None if unknown. Used if the
+            exchange not listed in FIRST_DATE.
+        """
+        self.exchange: str = exchange
+        self.url_builder: Callable[[date], str] = url_builder
+        self.column_parser: Callable[[date, bytes], Dict[str, np.ndarray]] = column_parser
+        self.concurrency: int = concurrency
+        self.first_date: Optional[date] = first_date
+
+    def get_url(self, day: date) -> str:
+        return self.url_builder(day)
+
+    def parse_columns(self, day: date, content: bytes) -> Dict[str, np.ndarray]:
+        return self.column_parser(day, content)
+
+    def parse(self, day: date, content: bytes) -> Dict[str, List[FuturesDailyData]]:
+        return columns_to_daily_data(self.column_parser(day, content))
+
+    def __repr__(self) -> str:
+        return f'<ExchangePlugin({self.exchange})>'
+
+
+REGISTRY: Dict[str, ExchangePlugin] = {}
+
+# The first day each known exchange provides data.
+FIRST_DATE: Dict[str, date] = {
+    'SHFE': date(2002, 1, 7),
+    'DCE': date(2007, 1, 4),
+    'CZCE': date(2005, 4, 29),
+    'CFFEX': date(2010, 4, 16),
+    'INE': date(2018, 3, 26),
+}
+
+
+def register_exchange(plugin: ExchangePlugin) -> ExchangePlugin:
+    """
+    Register an exchange, replacing the one registered with the same symbol.
+    :param plugin: <ExchangePlugin>.
+    :return: <ExchangePlugin>. the plugin registered.
+    """
+    REGISTRY[plugin.exchange.upper()] = plugin
+    return plugin
+
+
+def get_exchange_plugin(exchange: str) -> ExchangePlugin:
+    """
+    Get the plugin of an exchange. Raise ValueError if the exchange not registered.
+    :param exchange: <str>. exchange symbol.
+    :return: <ExchangePlugin>.
+    """
+    plugin = REGISTRY.get(exchange.upper())
+    if plugin is None:
+        raise ValueError(f'Exchange <{exchange.upper()}> is not supported, supported: {list(REGISTRY.keys())}.')
+    return plugin
+
+
+def get_registered_exchanges() -> List[str]:
+    return list(REGISTRY.keys())
+
+
+def get_first_date(exchange: str) -> Optional[date]:
+    """
+    Get the first day an exchange provides data, from FIRST_DATE, or from its plugin if not listed.
+    Raise ValueError if the exchange neither listed nor registered.
+    :param exchange: <str>. exchange symbol.
+    :return: <datetime.date>. None if unknown.
+    """
+    first_date: Optional[date] = FIRST_DATE.get(exchange.upper())
+    if first_date is None:
+        first_date = get_exchange_plugin(exchange).first_date
+    return first_date
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+The index of the days already stored in the product csv files of an exchange, used by incremental crawl. The days
+crawled without data, such as the exchange responded nothing or HTTP 404, are recorded too, so they are not crawled
+again.
+
+The index file saved in <Package path>\\data\\<exchange symbol>\\stored_days.csv
+    column:
+        date
+If the index file not existed, it is built once from the <date> column of the product csv files, the days without
+data lost.
+"""
+
+
+from typing import Iterable, List, Optional, Set
+from datetime import date
+from pathlib import Path
+import csv
+
+from ..utility import atomic_write
+
+
+class StoredDayIndex(object):
+    def __init__(self, exchange_path: Path):
+        """
+        :param exchange_path: <Path>. <Package path>\\data\\<exchange symbol>.
+        """
+        self.exchange_path: Path = exchange_path
+        self.index_file: Path = exchange_path.joinpath('stored_days.csv')
+        self.day_set: Optional[Set[date]] = None
+
+    def load(self) -> Set[date]:
+        """
+        Load the stored days, cached after the first loading.
+        :return: <set>.
+        """
+        if self.day_set is None:
+            if self.index_file.exists():
+                with open(self.index_file, mode='r', encoding='utf-8', newline='') as f:
+                    self.day_set = {date.fromisoformat(row['date']) for row in csv.DictReader(f)}
+            else:
+                self.rebuild(self.scan_csv_files())
+        return self.day_set
+
+    def scan_csv_files(self) -> Set[date]:
+        """
+        Scan the <date> column of the product csv files.
+        :return: <set>.
+        """
+        result: Set[date] = set()
+        csv_path: Path = self.exchange_path.joinpath('daily')
+        if csv_path.exists():
+            for csv_file in csv_path.glob('*.csv'):
+                with open(csv_file, mode='r', encoding='utf-8', newline='') as f:
+                    result.update(date.fromisoformat(row['date']) for row in csv.DictReader(f))
+        return result
+
+    def rebuild(self, day_set: Iterable[date]) -> None:
+        """
+        Replace the index with <day_set>.
+        :param day_set:
+        :return:
+        """
+        self.day_set = set(day_set)
+        with atomic_write(self.index_file, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['date'])
+            writer.writerows([day.isoformat()] for day in sorted(self.day_set))
+
+    def add(self, day: date) -> None:
+        """
+        Mark a day as stored.
+        :param day:
+        :return:
+        """
+        day_set: Set[date] = self.load()
+        if day in day_set:
+            return
+        with open(self.index_file, mode='a', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerow([day.isoformat()])
+        day_set.add(day)
+
+    def update(self, day_list: Iterable[date]) -> None:
+        """
+        Mark some days as stored.
+        :param day_list:
+        :return:
+        """
+        day_set: Set[date] = self.load()
+        new_day_list: List[date] = sorted(set(day_list) - day_set)
+        if not new_day_list:
+            return
+        with open(self.index_file, mode='a', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows([day.isoformat()] for day in new_day_list)
+        day_set.update(new_day_list)
+
+    def get_watermark(self) -> Optional[date]:
+        """
+        Get the last stored day.
+        :return: <datetime.date>, or None if nothing stored.
+        """
+        day_set: Set[date] = self.load()
+        return max(day_set) if day_set else None
+
+    def get_missing_days(self, day_list: Iterable[date]) -> List[date]:
+        """
+        Get the days not stored yet, in the order of <day_list>.
+        :param day_list:
+        :return:
+        """
+        day_set: Set[date] = self.load()
+        return [day for day in day_list if day not in day_set]
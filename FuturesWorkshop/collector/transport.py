@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+The HTTP transport used by the exchange crawlers.
+
+Both transports keep a pool of keep-alive connections for each exchange host, set timeouts,
+ask for gzip encoded responses, and retry transient failures (connection errors, timeouts,
+HTTP 429 and 5xx) with exponential backoff and full jitter:
+    delay = random(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+A response of HTTP 404 means the exchange published no data for the url, None is returned.
+Any other failure raises <TransportError>, so a crawl never loses a day silently.
+
+If a <RateLimiter> given, each request waits for a token of its host, and reports the response to adapt
+the rate of the host, see <rate_limiter.py>.
+"""
+
+
+from typing import Dict, Optional, Tuple
+import random
+import time
+import asyncio
+
+import requests
+from requests.adapters import HTTPAdapter
+import aiohttp
+
+from .rate_limiter import RateLimiter
+
+
+# The HTTP status which is worth retrying.
+TRANSIENT_STATUS: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+
+class TransportError(Exception):
+    """
+    Raised when a url could not be fetched, after all the retries.
+    """
+    def __init__(self, url: str, reason: str):
+        super().__init__(f'Failed to fetch <{url}>: {reason}')
+        self.url = url
+        self.reason = reason
+
+
+def get_backoff_delay(attempt: int, backoff_base: float, backoff_max: float) -> float:
+    """
+    Get the delay before retrying, exponential backoff with full jitter.
+    :param attempt: <int>. the number of attempts failed, starts from 0.
+    :param backoff_base: <float>. in seconds.
+    :param backoff_max: <float>. in seconds.
+    :return: <float>. in seconds.
+    """
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+
+def get_retry_after(headers) -> Optional[float]:
+    """
+    Get the delay the server asked for, in the <Retry-After> header.
+    :param headers: the response headers.
+    :return: <float> in seconds, or None if not asked.
+    """
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def record_response(rate_limiter: Optional[RateLimiter], url: str, latency: float, status: Optional[int]) -> None:
+    """
+    Report a response to the rate limiter, if any.
+    :param rate_limiter: <RateLimiter>.
+    :param url: <str>.
+    :param latency: <float>. in seconds.
+    :param status: <int>. the HTTP status, or None if connection error or timeout.
+    :return:
+    """
+    if rate_limiter is None:
+        return
+    if status is None or status in TRANSIENT_STATUS:
+        rate_limiter.record(url, latency, congested=True)
+    elif status in (200, 404):
+        rate_limiter.record(url, latency, congested=False)
+
+
+class HttpTransport(object):
+    """
+    Blocking transport, on a pooled <requests.Session>.
+    """
+    def __init__(self,
+                 timeout: Tuple[float, float] = (5.0, 30.0),
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 pool_size: int = 8,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 ):
+        """
+        :param timeout: <tuple>. (connect timeout, read timeout), in seconds.
+        :param max_retries: <int>. the maximum number of retries for a url.
+        :param backoff_base: <float>. in seconds.
+        :param backoff_max: <float>. in seconds.
+        :param pool_size: <int>. the maximum number of connections kept alive for each host.
+        :param rate_limiter: <RateLimiter>. if given, the requests are rate limited by it.
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url: str) -> Optional[bytes]:
+        """
+        Fetch a url.
+        :param url: <str>.
+        :return: <bytes>, the decoded body, or None if HTTP 404 responded.
+        """
+        attempt: int = 0
+        while True:
+            delay: Optional[float] = None
+            if self.rate_limiter is not None:
+                time.sleep(self.rate_limiter.reserve(url))
+            sent_at: float = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                record_response(self.rate_limiter, url, time.monotonic() - sent_at, None)
+                reason = f'{type(e).__name__}'
+            else:
+                record_response(self.rate_limiter, url, time.monotonic() - sent_at, response.status_code)
+                if response.status_code == 200:
+                    return response.content
+                elif response.status_code == 404:
+                    return None
+                elif response.status_code not in TRANSIENT_STATUS:
+                    raise TransportError(url, f'HTTP {response.status_code}')
+                reason = f'HTTP {response.status_code}'
+                delay = get_retry_after(response.headers)
+
+            if attempt >= self.max_retries:
+                raise TransportError(url, f'{reason}, after {attempt} retries')
+            if delay is None:
+                delay = get_backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            elif self.rate_limiter is not None:
+                # Hold all the requests to the host, this one waits in <reserve> too.
+                self.rate_limiter.pause(url, delay)
+                delay = 0.0
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'HttpTransport':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class AsyncHttpTransport(object):
+    """
+    Asyncio transport, on a pooled <aiohttp.ClientSession>.
+    It should be created and used inside a running event loop.
+    """
+    def __init__(self,
+                 timeout: Tuple[float, float] = (5.0, 30.0),
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 pool_size: int = 8,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 ):
+        """
+        :param timeout: <tuple>. (connect timeout, read timeout), in seconds.
+        :param max_retries: <int>. the maximum number of retries for a url.
+        :param backoff_base: <float>. in seconds.
+        :param backoff_max: <float>. in seconds.
+        :param pool_size: <int>. the maximum number of connections for each host.
+        :param rate_limiter: <RateLimiter>. if given, the requests are rate limited by it.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0, limit_per_host=pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1]),
+            headers=DEFAULT_HEADERS,
+        )
+
+    async def get(self, url: str) -> Optional[bytes]:
+        """
+        Fetch a url.
+        :param url: <str>.
+        :return: <bytes>, the decoded body, or None if HTTP 404 responded.
+        """
+        attempt: int = 0
+        while True:
+            delay: Optional[float] = None
+            if self.rate_limiter is not None:
+                await asyncio.sleep(self.rate_limiter.reserve(url))
+            sent_at: float = time.monotonic()
+            try:
+                async with self.session.get(url) as response:
+                    if response.status == 200:
+                        content: bytes = await response.read()
+                        record_response(self.rate_limiter, url, time.monotonic() - sent_at, response.status)
+                        return content
+                    record_response(self.rate_limiter, url, time.monotonic() - sent_at, response.status)
+                    if response.status == 404:
+                        return None
+                    elif response.status not in TRANSIENT_STATUS:
+                        raise TransportError(url, f'HTTP {response.status}')
+                    reason = f'HTTP {response.status}'
+                    delay = get_retry_after(response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                record_response(self.rate_limiter, url, time.monotonic() - sent_at, None)
+                reason = f'{type(e).__name__}'
+
+            if attempt >= self.max_retries:
+                raise TransportError(url, f'{reason}, after {attempt} retries')
+            if delay is None:
+                delay = get_backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            elif self.rate_limiter is not None:
+                # Hold all the requests to the host, this one waits in <reserve> too.
+                self.rate_limiter.pause(url, delay)
+                delay = 0.0
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def __aenter__(self) -> 'AsyncHttpTransport':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
@@ -82,44 +82,167 @@ The CONFIGS variable is a dict instance:
         'password': str,
     },
 }
+
+The CONFIGS variable is loaded lazily, at the first access, so importing the package costs nothing. It is loaded
+from a compiled snapshot, <Package path>\\data\\configs.snapshot, if the config files are not changed since the
+snapshot saved, judged by their modification times and sizes. Otherwise the config files are parsed, and the
+snapshot saved again. The snapshot is a pickle file, written only by this module.
+
+The csv files known, listed in CSV_SCHEMAS, are loaded by <load_csv> with the converters declared for their columns.
+The type of each cell of the other csv files is guessed from its content.
 """
 
 
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from collections.abc import MutableMapping
 from pathlib import Path
 import csv
 import json
 from datetime import datetime, date, time, timedelta
 import copy
+import math
+import pickle
+import threading
 
 
 # The path of the packages <FuturesWorkshop>
 PACKAGE_PATH: Path = Path(__file__).parent
 
+# The config files loaded by <load_config>.
+CONFIG_TYPES: List[str] = ['exchange', 'product', 'holiday', 'stop_loss', 'user']
+
+# Change it when the structure of CONFIGS changed, to discard the snapshots saved before.
+SNAPSHOT_VERSION: int = 3
+
+
+def to_number(value: str) -> Union[int, float]:
+    return float(value) if '.' in value or 'e' in value.lower() else int(value)
+
 
-def load_csv(csv_file: Path) -> List[Dict[str, Any]]:
-    result: List[Dict[str, Any]] = []
-    temp: Dict[str, Any] = {}
-    with open(csv_file, mode='r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+def to_float(value: str) -> float:
+    """
+    Convert a price, empty string to NaN.
+    """
+    return float(value) if value else math.nan
+
+
+def guess_value(value: str) -> Any:
+    """
+    Convert a cell of the csv files not in CSV_SCHEMAS, by guessing its type.
+    :param value: <str>.
+    :return: datetime, date, time, float, int, or the str unchanged.
+    """
+    try:
+        if '-' in value and ':' in value:
+            return datetime.fromisoformat(value)
+        elif '-' in value and value[0] != '-':
+            return date.fromisoformat(value)
+        elif ':' in value:
+            return time.fromisoformat(value)
+        elif '.' in value:
+            return float(value)
+        else:
+            return int(value)
+    except ValueError:
+        return value
+
+
+# The converters of the columns of the csv files known. The columns not declared are kept as str.
+CSV_SCHEMAS: Dict[str, Dict[str, Callable[[str], Any]]] = {
+    'exchange': {
+        'symbol': str,
+        'name': str,
+    },
+    'product': {
+        'exchange': str,
+        'symbol': str,
+        'name': str,
+        'fluctuation': to_number,
+        'multiplier': int,
+        'trading_section': int,
+        'optional_section': int,
+        'trading_time': str,
+    },
+    'holiday': {
+        'region': str,
+        'begin': date.fromisoformat,
+        'end': date.fromisoformat,
+        'name': str,
+        'url': str,
+    },
+    'stop_loss': {
+        'exchange': str,
+        'product': str,
+        'long': int,
+        'short': int,
+    },
+    'daily': {
+        'product': str,
+        'delivery': str,
+        'date': date.fromisoformat,
+        'open': to_float,
+        'high': to_float,
+        'low': to_float,
+        'close': to_float,
+        'settlement': to_float,
+        'volume': to_float,
+        'open_interest': to_float,
+    },
+}
+
+
+def read_csv_table(csv_file: Path) -> Tuple[List[str], List[tuple]]:
+    """
+    Read a csv file into the header and the columns of raw str. Blank lines are skipped, and short rows padded
+    with ''.
+    :param csv_file: <Path>.
+    :return: <tuple>. (the header, a tuple of the values for each column of the header).
+    """
+    with open(csv_file, mode='r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header: List[str] = next(reader, [])
+        row_list: List[List[str]] = []
         for row in reader:
-            for k, v in row.items():
-                try:
-                    if '-' in v and ':' in v:
-                        x = datetime.fromisoformat(v)
-                    elif '-' in v and v[0] != '-':
-                        x = date.fromisoformat(v)
-                    elif ':' in v:
-                        x = time.fromisoformat(v)
-                    elif '.' in v:
-                        x = float(v)
-                    else:
-                        x = int(v)
-                    temp[k] = x
-                except ValueError:
-                    temp[k] = v
-            result.append(copy.deepcopy(temp))
-    return result
+            if not row:
+                continue
+            if len(row) > len(header):
+                raise ValueError(
+                    f'{csv_file}, line {reader.line_num}: {len(row)} fields, more than the header of {len(header)}.'
+                )
+            if len(row) < len(header):
+                row = row + [''] * (len(header) - len(row))
+            row_list.append(row)
+    if not row_list:
+        return header, [() for _ in header]
+    return header, list(zip(*row_list))
+
+
+def load_csv(csv_file: Path,
+             schema: Union[str, Dict[str, Callable[[str], Any]], None] = None,
+             columnar: bool = False
+             ) -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+    """
+    Load a csv file, converting the cells by the schema.
+    :param csv_file: <Path>.
+    :param schema: <str> or <dict>. the name of a schema in CSV_SCHEMAS, or the converters of the columns. default
+        to guess the type of each cell.
+    :param columnar: <bool>. return the columns instead of the rows.
+    :return: <list> of the rows, each a dict of column: value, or <dict> of column: the list of the values.
+    """
+    if isinstance(schema, str):
+        schema = CSV_SCHEMAS[schema]
+    header, raw = read_csv_table(csv_file)
+
+    column_list: List[List[Any]] = []
+    for name, column in zip(header, raw):
+        if schema is None:
+            column_list.append([guess_value(value) for value in column])
+        else:
+            converter: Callable[[str], Any] = schema.get(name, str)
+            column_list.append(list(column) if converter is str else list(map(converter, column)))
+    if columnar:
+        return dict(zip(header, column_list))
+    return [dict(zip(header, row)) for row in zip(*column_list)]
 
 
 def save_csv(csv_file: Path, header: List[str], data: List[Dict[str, Any]]) -> None:
@@ -158,6 +281,16 @@ def load_config() -> Dict[str, Any]:
     The config files exists in <App path>/settings directory.
     :return: a dict which key is str and value is list.
     """
+    result: Dict[str, Any] = load_shared_config()
+    result.update(load_user_config())
+    return result
+
+
+def load_shared_config() -> Dict[str, Any]:
+    """
+    Load the config files shared by all users, all but <user.json>.
+    :return: the same as <load_config>, without the user part.
+    """
     result: Dict[str, Any] = {
         'exchange': {
             'info': [],
@@ -170,31 +303,22 @@ def load_config() -> Dict[str, Any]:
             'info': [],
         },
         'stop_loss': {},
-        'tq_account': {
-            'account': '',
-            'password': '',
-        },
-        'trading_account': {
-            'broker': '',
-            'account': '',
-            'password': '',
-        }
     }
 
     # exchange.csv
-    result['exchange']['info'] = load_csv(get_config_file_path('exchange'))
+    result['exchange']['info'] = load_csv(get_config_file_path('exchange'), 'exchange')
     for item in result['exchange']['info']:
         result['exchange'][item['symbol']] = []
 
     # holiday.csv
-    result['holiday']['raw'] = load_csv(get_config_file_path('holiday'))
+    result['holiday']['raw'] = load_csv(get_config_file_path('holiday'), 'holiday')
     for item in result['holiday']['raw']:
         for i in range((item['end'] - item['begin']).days + 1):
             day = item['begin'] + timedelta(days=i)
             result['holiday']['expanded'].append(day)
 
     # product.csv
-    for item in load_csv(get_config_file_path('product')):
+    for item in load_csv(get_config_file_path('product'), 'product'):
         result['product']['info'].append(
             {
                 'exchange': item['exchange'],
@@ -226,17 +350,143 @@ def load_config() -> Dict[str, Any]:
             )
 
     # stop_loss.csv
-    for item in load_csv(get_config_file_path('stop_loss')):
+    for item in load_csv(get_config_file_path('stop_loss'), 'stop_loss'):
         result['stop_loss'][item['product']] = {
             'long': item['long'],
             'short': item['short'],
         }
 
-    # user.json
-    result.update(load_json(get_config_file_path('user')))
     return result
 
 
+def load_user_config() -> Dict[str, Any]:
+    """
+    Load <user.json>, not shipped with the package. Copy <user.json.example> to create it. The defaults if missing.
+    :return: <dict>. the accounts.
+    """
+    result: Dict[str, Any] = {
+        'tq_account': {
+            'account': '',
+            'password': '',
+        },
+        'trading_account': {
+            'broker': '',
+            'account': '',
+            'password': '',
+        }
+    }
+    user_file: Path = get_config_file_path('user')
+    if user_file.exists():
+        result.update(load_json(user_file))
+    return result
+
+
+def get_config_stamp() -> Dict[str, List[int]]:
+    """
+    Get the modification times and sizes of the config files in the snapshot, all but <user.json>.
+    :return: <dict>. key is the config type, and value is [mtime in ns, size].
+    """
+    result: Dict[str, List[int]] = {}
+    for config_type in CONFIG_TYPES:
+        if config_type == 'user':
+            continue
+        stat = get_config_file_path(config_type).stat()
+        result[config_type] = [stat.st_mtime_ns, stat.st_size]
+    return result
+
+
+def load_config_snapshot(snapshot_file: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Load the configs from the snapshot if the config files not changed since it saved, otherwise load the config
+    files and save the snapshot. The passwords in <user.json> are kept out of the snapshot, it is loaded every time.
+    :param snapshot_file: <Path>. default <Package path>\\data\\configs.snapshot.
+    :return: the same as <load_config>.
+    """
+    if snapshot_file is None:
+        snapshot_file = PACKAGE_PATH.joinpath('data', 'configs.snapshot')
+    stamp: Dict[str, List[int]] = get_config_stamp()
+    result: Optional[Dict[str, Any]] = None
+    try:
+        with open(snapshot_file, mode='rb') as f:
+            snapshot: Dict[str, Any] = pickle.load(f)
+        if snapshot['version'] == SNAPSHOT_VERSION and snapshot['stamp'] == stamp:
+            result = snapshot['configs']
+    except Exception:
+        # No snapshot, or a broken one: load the config files.
+        pass
+    if result is not None:
+        result.update(load_user_config())
+        return result
+
+    # utility imports this module.
+    from .utility import atomic_write
+    result = load_shared_config()
+    try:
+        with atomic_write(snapshot_file, mode='wb') as f:
+            pickle.dump(
+                {'version': SNAPSHOT_VERSION, 'stamp': stamp, 'configs': result}, f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+    except OSError:
+        # A read-only package runs without the snapshot.
+        pass
+    result.update(load_user_config())
+    return result
+
+
+class LazyConfigs(MutableMapping):
+    """
+    The configs, loaded at the first access. Used as a dict.
+    """
+    def __init__(self, loader: Callable[[], Dict[str, Any]]):
+        """
+        :param loader: <Callable>. load the configs.
+        """
+        self.loader: Callable[[], Dict[str, Any]] = loader
+        self.lock = threading.Lock()
+        self.data: Optional[Dict[str, Any]] = None
+
+    @property
+    def configs(self) -> Dict[str, Any]:
+        if self.data is None:
+            with self.lock:
+                if self.data is None:
+                    self.data = self.loader()
+        return self.data
+
+    @property
+    def loaded(self) -> bool:
+        return self.data is not None
+
+    def reload(self) -> None:
+        """
+        Load the configs again at the next access.
+        :return:
+        """
+        with self.lock:
+            self.data = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self.configs[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.configs[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.configs[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.configs)
+
+    def __len__(self) -> int:
+        return len(self.configs)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return copy.deepcopy(self.configs, memo)
+
+    def __repr__(self) -> str:
+        return f'<LazyConfigs({"loaded" if self.loaded else "not loaded"})>'
+
+
 def save_config() -> None:
     """
     Save the stop settings into the <stop_loss.csv>.
@@ -252,4 +502,4 @@ def save_config() -> None:
 
 
 # The config variable.
-CONFIGS: Dict[str, Any] = load_config()
+CONFIGS: LazyConfigs = LazyConfigs(load_config_snapshot)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+FuturesWorkshop - Main contract module
+
+The main contract of a product on a day is the delivery with the largest open interest, the larger volume if tied,
+and the earlier delivery if tied still. It is computed for all the days of a product at once, by sorting the rows
+of the product on (date, -open interest, -volume, delivery) and taking the first row of each day.
+
+The main contracts of a product are saved in the index file
+<Package path>\\data\\<exchange symbol>\\main_contract\\<product>.csv
+    column:
+        date
+        delivery
+When asked, the index is refreshed incrementally: only the days stored after the last day in the index are
+computed and appended. If days are stored before the last day indexed, such as a gap crawled later, the index is
+rebuilt. Rebuild the index explicitly after the days already indexed are crawled again.
+
+The main contracts of many products over a date range are got at once by <get_main_contract_range>, as a matrix of
+the trading days by the products. The indexes not loaded yet are refreshed in worker processes, in parallel.
+"""
+
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from multiprocessing.context import BaseContext
+import threading
+import csv
+import os
+
+import numpy as np
+
+from .config import PACKAGE_PATH, read_csv_table
+from .utility import atomic_write, get_exchange_symbol_by_product_symbol
+from .storage.loader import DailyLoader, get_daily_loader
+from .trading_calendar import get_trading_calendar
+
+
+def compute_main_contract(columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the main contract of each day, in one pass.
+    :param columns: <dict>. the columns <date>, <delivery>, <open_interest> and <volume> of a product.
+    :return: <tuple>. (the days, datetime64[D] ascending, the deliveries of the main contracts).
+    """
+    if len(columns['date']) == 0:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.str_)
+    # A missing value loses to any value.
+    open_interest: np.ndarray = np.nan_to_num(columns['open_interest'], nan=-1.0)
+    volume: np.ndarray = np.nan_to_num(columns['volume'], nan=-1.0)
+    # np.lexsort sorts by the last key first.
+    order: np.ndarray = np.lexsort((columns['delivery'], -volume, -open_interest, columns['date']))
+    day: np.ndarray = columns['date'][order]
+    first: np.ndarray = np.concatenate([[True], day[1:] != day[:-1]])
+    return day[first], columns['delivery'][order][first]
+
+
+class MainContractIndex(object):
+    """
+    The main contract index files of the products. Thread safe.
+    """
+    def __init__(self, data_path: Path, loader: DailyLoader):
+        """
+        :param data_path: <Path>. <Package path>\\data.
+        :param loader: <DailyLoader>. loads the daily data of the products.
+        """
+        self.data_path: Path = data_path
+        self.loader: DailyLoader = loader
+        self.lock = threading.Lock()
+        # product: (days, deliveries)
+        self.series_dict: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # product: the number of rows stored, when refreshed.
+        self.stored_rows_dict: Dict[str, int] = {}
+
+    def get_index_file(self, product: str) -> Path:
+        exchange: Optional[str] = get_exchange_symbol_by_product_symbol(product)
+        if exchange is None:
+            raise ValueError(f'Unknown product <{product}>.')
+        return self.data_path.joinpath(exchange, 'main_contract', f'{product}.csv')
+
+    def read_index_file(self, product: str) -> Tuple[np.ndarray, np.ndarray]:
+        index_file: Path = self.get_index_file(product)
+        if not index_file.exists():
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.str_)
+        raw: List[tuple] = read_csv_table(index_file)[1]
+        if len(raw) < 2 or not raw[0]:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.str_)
+        return np.array(raw[0], dtype='datetime64[D]'), np.array(raw[1], dtype=np.str_)
+
+    def write_index_file(self, product: str, day: np.ndarray, delivery: np.ndarray, append: bool = False) -> None:
+        """
+        Write the index file of a product, through a temporary file and rename, or append to it.
+        :param product: <str>.
+        :param day: <np.ndarray>. the days, datetime64[D].
+        :param delivery: <np.ndarray>. the deliveries.
+        :param append: <bool>. append to the index file.
+        :return:
+        """
+        index_file: Path = self.get_index_file(product)
+        row_list: List[Tuple[str, str]] = list(zip(np.datetime_as_string(day, unit='D').tolist(), delivery.tolist()))
+        if append and index_file.exists():
+            # Appending is not atomic, only the rewriting goes through a temporary file.
+            with open(index_file, mode='a', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerows(row_list)
+                f.flush()
+                os.fsync(f.fileno())
+            return
+        with atomic_write(index_file, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['date', 'delivery'])
+            writer.writerows(row_list)
+
+    def refresh(self, product: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the main contracts of the days stored after the last day indexed, and append them to the index.
+        :param product: <str>. product symbol.
+        :return: <tuple>. (the days, the deliveries), all indexed.
+        """
+        with self.lock:
+            series: Optional[Tuple[np.ndarray, np.ndarray]] = self.series_dict.get(product)
+            if series is None:
+                series = self.read_index_file(product)
+            day, delivery = series
+
+            stored_day: np.ndarray = self.loader.load(product, fields=['date'])['date']
+            if len(stored_day) != self.stored_rows_dict.get(product):
+                fields: List[str] = ['date', 'delivery', 'open_interest', 'volume']
+                if len(day):
+                    # The number of the days stored, up to the last day indexed.
+                    indexed: np.ndarray = stored_day[:np.searchsorted(stored_day, day[-1], side='right')]
+                    indexed_day_count: int = int(np.count_nonzero(indexed[1:] != indexed[:-1])) + (len(indexed) > 0)
+                    if indexed_day_count != len(day):
+                        day, delivery = compute_main_contract(self.loader.load(product, fields=fields))
+                        self.write_index_file(product, day, delivery)
+                    elif stored_day[-1] > day[-1]:
+                        new_day, new_delivery = compute_main_contract(
+                            self.loader.load(product, day[-1].item() + timedelta(days=1), fields=fields)
+                        )
+                        self.write_index_file(product, new_day, new_delivery, append=True)
+                        day = np.concatenate([day, new_day])
+                        delivery = np.concatenate([delivery, new_delivery])
+                elif len(stored_day):
+                    day, delivery = compute_main_contract(self.loader.load(product, fields=fields))
+                    self.write_index_file(product, day, delivery)
+                self.stored_rows_dict[product] = len(stored_day)
+            self.series_dict[product] = (day, delivery)
+            return day, delivery
+
+    def rebuild(self, product: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the main contracts of all the days stored again.
+        :param product: <str>. product symbol.
+        :return: <tuple>. (the days, the deliveries).
+        """
+        with self.lock:
+            index_file: Path = self.get_index_file(product)
+            if index_file.exists():
+                index_file.unlink()
+            self.series_dict.pop(product, None)
+            self.stored_rows_dict.pop(product, None)
+        return self.refresh(product)
+
+    def get_series(self,
+                   product: str,
+                   begin: Optional[date] = None,
+                   end: Optional[date] = None
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the main contracts of the days between <begin> and <end>, both included.
+        :param product: <str>. product symbol.
+        :param begin: <datetime.date>. default the first day.
+        :param end: <datetime.date>. default the last day.
+        :return: <tuple>. (the days with data, datetime64[D] ascending, the deliveries of the main contracts).
+        """
+        day, delivery = self.refresh(product)
+        i: int = 0 if begin is None else int(np.searchsorted(day, np.datetime64(begin, 'D'), side='left'))
+        j: int = len(day) if end is None else int(np.searchsorted(day, np.datetime64(end, 'D'), side='right'))
+        return day[i:max(i, j)], delivery[i:max(i, j)]
+
+    def get(self, product: str, day: date) -> Optional[str]:
+        """
+        Get the main contract of a product on a day.
+        :param product: <str>. product symbol.
+        :param day: <datetime.date>.
+        :return: <str>. the delivery, None if no data on the day.
+        """
+        _, delivery = self.get_series(product, day, day)
+        return str(delivery[0]) if len(delivery) else None
+
+    def get_range(self,
+                  product_list: Sequence[str],
+                  begin: date,
+                  end: date,
+                  max_workers: Optional[int] = None,
+                  mp_context: Optional[BaseContext] = None
+                  ) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """
+        Get the main contracts of many products on the trading days between <begin> and <end>, both included.
+        The indexes not loaded in this process yet are refreshed in worker processes first, in parallel.
+        :param product_list: the product symbols.
+        :param begin: <datetime.date>.
+        :param end: <datetime.date>.
+        :param max_workers: <int>. the number of worker processes, default the number of processors. 1 to refresh
+            in this process.
+        :param mp_context: <BaseContext>. the multiprocessing context of the workers, default the platform default.
+        :return: <tuple>. (the trading days, datetime64[D] ascending, the products, the deliveries of the main
+            contracts, a matrix of the days by the products, '' if no data).
+        """
+        product_list = list(product_list)
+        for product in product_list:
+            if get_exchange_symbol_by_product_symbol(product) is None:
+                raise ValueError(f'Unknown product <{product}>.')
+        with self.lock:
+            pending: List[str] = list(dict.fromkeys(
+                product for product in product_list if product not in self.series_dict
+            ))
+        if len(pending) > 1 and max_workers != 1:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+                list(executor.map(refresh_main_contract_index, [self.data_path] * len(pending), pending))
+
+        day: np.ndarray = get_trading_calendar().get_trading_days_array(begin, end)
+        series_list: List[Tuple[np.ndarray, np.ndarray]] = [
+            self.get_series(product, begin, end) for product in product_list
+        ]
+        width: int = max([1] + [series[1].dtype.itemsize // 4 for series in series_list])
+        result: np.ndarray = np.full((len(day), len(product_list)), '', dtype=f'<U{width}')
+        for j, (series_day, series_delivery) in enumerate(series_list):
+            i: np.ndarray = np.searchsorted(day, series_day)
+            # The days with data out of the trading calendar are dropped.
+            matched: np.ndarray = i < len(day)
+            matched[matched] = day[i[matched]] == series_day[matched]
+            result[i[matched], j] = series_delivery[matched]
+        return day, product_list, result
+
+
+def refresh_main_contract_index(data_path: Path, product: str) -> int:
+    """
+    Refresh the main contract index of a product. Run in worker processes.
+    :param data_path: <Path>. <Package path>\\data.
+    :param product: <str>. product symbol.
+    :return: <int>. the number of days indexed.
+    """
+    return len(MainContractIndex(data_path, DailyLoader(data_path)).refresh(product)[0])
+
+
+main_contract_index: Optional[MainContractIndex] = None
+
+
+def get_main_contract_index() -> MainContractIndex:
+    """
+    Get the main contract index shared in the process, of <Package path>\\data.
+    :return: <MainContractIndex>.
+    """
+    global main_contract_index
+    if main_contract_index is None:
+        main_contract_index = MainContractIndex(PACKAGE_PATH.joinpath('data'), get_daily_loader())
+    return main_contract_index
+
+
+def get_main_contract_range(product_list: Sequence[str],
+                            begin: date,
+                            end: date,
+                            max_workers: Optional[int] = None,
+                            as_frame: bool = False
+                            ):
+    """
+    Get the main contracts of many products on the trading days between <begin> and <end>, both included.
+    :param product_list: the product symbols.
+    :param begin: <datetime.date>.
+    :param end: <datetime.date>.
+    :param max_workers: <int>. the number of worker processes refreshing the indexes, 1 to refresh in this process.
+    :param as_frame: <bool>. return a <pandas.DataFrame>, indexed by the days, a column for each product.
+    :return: <tuple> or <pandas.DataFrame>. see <MainContractIndex.get_range>.
+    """
+    day, product_list, result = get_main_contract_index().get_range(product_list, begin, end, max_workers)
+    if as_frame:
+        # pandas is imported only when asked, it takes long to import.
+        import pandas as pd
+
+        return pd.DataFrame(result, index=pd.DatetimeIndex(day, name='date'), columns=product_list)
+    return day, product_list, result
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+FuturesWorkshop - Reference data module
+
+The reference data of the exchanges and the products, indexed once from CONFIGS, so every lookup is a dict lookup.
+    exchange symbol <-> exchange name
+    product symbol <-> product name
+    product symbol -> exchange symbol
+    exchange symbol -> product symbols
+    product symbol -> <ProductInfo>, the multiplier, fluctuation and trading sessions.
+The indexes are read only, and the symbols and names interned. The reference data is built again when
+CONFIGS['exchange'] or CONFIGS['product'] is replaced, such as restored by the preference dialog.
+"""
+
+
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+from datetime import time
+from types import MappingProxyType
+import sys
+
+from .config import CONFIGS
+
+
+class ProductInfo(object):
+    """
+    The metadata of a product. Read only.
+    """
+    __slots__ = ('symbol', 'name', 'exchange', 'multiplier', 'fluctuation', 'tick_value', 'sessions')
+
+    def __init__(self,
+                 symbol: str,
+                 name: str,
+                 exchange: str,
+                 multiplier: int,
+                 fluctuation: Union[int, float],
+                 sessions: Tuple[Tuple[time, time], ...]
+                 ):
+        """
+        :param symbol: <str>. product symbol.
+        :param name: <str>. product name.
+        :param exchange: <str>. exchange symbol.
+        :param multiplier: <int>. the contract multiplier.
+        :param fluctuation: <int> or <float>. the minimum price fluctuation.
+        :param sessions: <tuple>. the trading sessions, (open, close) each, in trading order.
+        """
+        object.__setattr__(self, 'symbol', symbol)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'exchange', exchange)
+        object.__setattr__(self, 'multiplier', multiplier)
+        object.__setattr__(self, 'fluctuation', fluctuation)
+        # The value of a tick of a contract.
+        object.__setattr__(self, 'tick_value', multiplier * fluctuation)
+        object.__setattr__(self, 'sessions', sessions)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError('ProductInfo is read only.')
+
+    def __repr__(self) -> str:
+        return f'<ProductInfo(' \
+               f'symbol={self.symbol}, ' \
+               f'exchange={self.exchange}, ' \
+               f'multiplier={self.multiplier}, ' \
+               f'fluctuation={self.fluctuation}' \
+               f')>'
+
+    @property
+    def has_night_session(self) -> bool:
+        return len(self.sessions) > 0 and self.sessions[0][0] >= time(hour=18)
+
+
+class ReferenceData(object):
+    """
+    The indexes of the exchanges and the products.
+    """
+    def __init__(self, configs: Mapping[str, Any]):
+        """
+        :param configs: CONFIGS, or a dict of the same structure.
+        """
+        # The sources, to know when they are replaced.
+        self.exchange_source: Dict[str, Any] = configs['exchange']
+        self.product_source: Dict[str, Any] = configs['product']
+
+        exchange_symbol_list: list = []
+        exchange_name_by_symbol: Dict[str, str] = {}
+        exchange_symbol_by_name: Dict[str, str] = {}
+        for item in self.exchange_source['info']:
+            symbol: str = sys.intern(item['symbol'])
+            name: str = sys.intern(item['name'])
+            exchange_symbol_list.append(symbol)
+            exchange_name_by_symbol[symbol] = name
+            exchange_symbol_by_name.setdefault(name, symbol)
+
+        product_symbol_list: list = []
+        product_name_by_symbol: Dict[str, str] = {}
+        product_symbol_by_name: Dict[str, str] = {}
+        exchange_by_product: Dict[str, str] = {}
+        product_by_exchange: Dict[str, list] = {symbol: [] for symbol in exchange_symbol_list}
+        product_info: Dict[str, ProductInfo] = {}
+        for item in self.product_source['info']:
+            symbol: str = sys.intern(item['symbol'])
+            name: str = sys.intern(item['name'])
+            exchange: str = sys.intern(item['exchange'])
+            product_symbol_list.append(symbol)
+            product_name_by_symbol[symbol] = name
+            product_symbol_by_name.setdefault(name, symbol)
+            exchange_by_product[symbol] = exchange
+            product_by_exchange.setdefault(exchange, []).append(symbol)
+            detail: Optional[Dict[str, Any]] = self.product_source.get(item['symbol'])
+            if detail is not None:
+                product_info[symbol] = ProductInfo(
+                    symbol=symbol,
+                    name=name,
+                    exchange=exchange,
+                    multiplier=detail['multiplier'],
+                    fluctuation=detail['fluctuation'],
+                    sessions=tuple((section['open'], section['close']) for section in detail['trading_time'])
+                )
+
+        self.exchange_symbol_list: Tuple[str, ...] = tuple(exchange_symbol_list)
+        self.exchange_name_list: Tuple[str, ...] = tuple(exchange_name_by_symbol[s] for s in exchange_symbol_list)
+        self.exchange_name_by_symbol: Mapping[str, str] = MappingProxyType(exchange_name_by_symbol)
+        self.exchange_symbol_by_name: Mapping[str, str] = MappingProxyType(exchange_symbol_by_name)
+        self.product_symbol_list: Tuple[str, ...] = tuple(product_symbol_list)
+        self.product_name_list: Tuple[str, ...] = tuple(product_name_by_symbol[s] for s in product_symbol_list)
+        self.product_name_by_symbol: Mapping[str, str] = MappingProxyType(product_name_by_symbol)
+        self.product_symbol_by_name: Mapping[str, str] = MappingProxyType(product_symbol_by_name)
+        self.exchange_by_product: Mapping[str, str] = MappingProxyType(exchange_by_product)
+        self.product_by_exchange: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {exchange: tuple(symbol_list) for exchange, symbol_list in product_by_exchange.items()}
+        )
+        self.product_info: Mapping[str, ProductInfo] = MappingProxyType(product_info)
+
+    def is_built_from(self, configs: Mapping[str, Any]) -> bool:
+        return configs['exchange'] is self.exchange_source and configs['product'] is self.product_source
+
+    def get_product_info(self, product_symbol: str) -> Optional[ProductInfo]:
+        return self.product_info.get(product_symbol)
+
+
+reference_data: Optional[ReferenceData] = None
+
+
+def get_reference_data() -> ReferenceData:
+    """
+    Get the reference data of CONFIGS, built again if CONFIGS['exchange'] or CONFIGS['product'] replaced.
+    :return: <ReferenceData>.
+    """
+    global reference_data
+    if reference_data is None or not reference_data.is_built_from(CONFIGS):
+        reference_data = ReferenceData(CONFIGS)
+    return reference_data
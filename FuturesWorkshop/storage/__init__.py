@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from .column_store import ColumnStore, ColumnFileError, read_column_file, write_column_file
+from .sqlite_store import SqliteQuoteStore
+from .loader import DailyLoader, get_daily_loader, load_daily
+from .cache import FrameCache, get_frame_cache
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+The process-wide cache of the data loaded, bounded by a memory budget.
+
+An entry is keyed by the identity of the file loaded from, (path, mtime, size), and the request, such as the
+product, the date range and the columns. So a file changed is loaded again, and the entries of its old identity
+are dropped at once. When the sizes of the entries exceed the budget, the least recently used ones are evicted.
+A value larger than the budget is not cached.
+
+The values are shared by all the callers, do not modify them.
+"""
+
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import threading
+import sys
+
+import numpy as np
+
+
+DEFAULT_MAX_BYTES: int = 512 * 1024 * 1024
+
+
+def get_value_size(value: Any) -> int:
+    """
+    Get the memory size of a value, in bytes.
+    :param value: a dict of arrays, an array, a DataFrame, or anything else.
+    :return: <int>.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(get_value_size(item) for item in value.values())
+    if hasattr(value, 'memory_usage'):
+        # pandas.DataFrame
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+class FrameCache(object):
+    """
+    LRU cache of the data loaded, bounded by a memory budget. Thread safe.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param max_bytes: <int>. the memory budget, in bytes.
+        """
+        self.max_bytes: int = max_bytes
+        self.lock = threading.Lock()
+        # key: (path, mtime_ns, size, request), value: (value, size)
+        self.entries: 'OrderedDict[Tuple, Tuple[Any, int]]' = OrderedDict()
+        self.current_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @staticmethod
+    def get_key(file: Path, request: Hashable) -> Tuple:
+        stat = file.stat()
+        return str(file.resolve()), stat.st_mtime_ns, stat.st_size, request
+
+    def get_or_load(self, file: Path, request: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get the value cached, or load and cache it.
+        :param file: <Path>. the file loaded from.
+        :param request: hashable. what loaded from the file.
+        :param loader: <Callable>. load the value, called without the lock held.
+        :return: the value.
+        """
+        key: Tuple = self.get_key(file, request)
+        with self.lock:
+            entry: Optional[Tuple[Any, int]] = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value: Any = loader()
+        self.put(key, value)
+        return value
+
+    def put(self, key: Tuple, value: Any) -> None:
+        size: int = get_value_size(value)
+        with self.lock:
+            # The entries of the old identities of the file.
+            for old_key in [k for k in self.entries.keys() if k[0] == key[0] and k[1:3] != key[1:3]]:
+                self.remove(old_key)
+            if size > self.max_bytes:
+                return
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+            self.evict()
+
+    def remove(self, key: Tuple) -> None:
+        value, size = self.entries.pop(key)
+        self.current_bytes -= size
+
+    def evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self.entries:
+            self.remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def discard(self, file: Path) -> None:
+        """
+        Drop the entries loaded from a file, whatever its identity.
+        :param file: <Path>.
+        :return:
+        """
+        path: str = str(file.resolve())
+        with self.lock:
+            for key in [k for k in self.entries.keys() if k[0] == path]:
+                self.remove(key)
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """
+        Change the memory budget, evicting at once if exceeded.
+        :param max_bytes: <int>.
+        :return:
+        """
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the statistics of the cache.
+        :return: <dict>. entries, bytes, max_bytes, hits, misses, evictions and hit_rate.
+        """
+        with self.lock:
+            total: int = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+frame_cache: Optional[FrameCache] = None
+
+
+def get_frame_cache() -> FrameCache:
+    """
+    Get the cache shared in the process.
+    :return: <FrameCache>.
+    """
+    global frame_cache
+    if frame_cache is None:
+        frame_cache = FrameCache()
+    return frame_cache
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Columnar binary store of the futures daily data, read through memory mapping.
+
+A product is saved in one column file <Package path>\\data\\<exchange symbol>\\column\\<product>.col:
+    magic           8 bytes, b'FWCOL001'.
+    header length   4 bytes, little-endian uint32.
+    header          json, utf-8, padded with spaces to the alignment:
+        product     <str>.
+        rows        <int>.
+        columns     <list>. of {name, dtype, offset}, offset from the beginning of the file.
+        source      <dict>. {mtime_ns, size} of the csv file converted from, or null.
+    columns         the raw bytes of each column array, in the order of FuturesDailyData.fields(),
+                    each one starting at a multiple of the alignment.
+The columns are those of the parsers, see <collector/parser.py>, and the rows sorted by (date, delivery), as in
+the product csv files. Reading a column file maps it once, and the columns are read-only views of the mapping,
+so loading the full history of a product copies nothing until the values touched.
+
+The column files are converted from the product csv files, which remain the files written by the crawlers, and
+can be exported back to csv files. A column file is replaced through a temporary file and rename. On Windows, a
+file mapped can not be replaced, so drop the columns read before converting the same product again.
+"""
+
+
+from typing import Any, Dict, List, Optional, Sequence
+from pathlib import Path
+import json
+import csv
+
+import numpy as np
+
+from ..config import read_csv_table
+from ..utility import atomic_write
+from ..definition import FuturesDailyData
+from ..collector.parser import PRICE_FIELDS, to_float_array, get_empty_columns, columns_to_row_list
+
+
+MAGIC: bytes = b'FWCOL001'
+ALIGNMENT: int = 64
+
+
+class ColumnFileError(Exception):
+    pass
+
+
+def align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def sort_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Sort the rows by (date, delivery).
+    :param columns:
+    :return:
+    """
+    order: np.ndarray = np.lexsort((columns['delivery'], columns['date']))
+    return {field: columns[field][order] for field in FuturesDailyData.fields()}
+
+
+def get_source_stat(csv_file: Path) -> Dict[str, int]:
+    stat = csv_file.stat()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def write_column_file(column_file: Path,
+                      product: str,
+                      columns: Dict[str, np.ndarray],
+                      source: Optional[Dict[str, int]] = None
+                      ) -> None:
+    """
+    Write the columns of a product into a column file, through a temporary file and rename.
+    :param column_file: <Path>.
+    :param product: <str>. product symbol.
+    :param columns: <dict>. the columns, see <collector/parser.py>.
+    :param source: <dict>. {mtime_ns, size} of the csv file converted from.
+    :return:
+    """
+    columns = sort_columns(columns)
+    array_list: List[np.ndarray] = []
+    for field in FuturesDailyData.fields():
+        array: np.ndarray = np.ascontiguousarray(columns[field])
+        if array.dtype.kind == 'U':
+            # An empty string column is '<U1', not '<U0'.
+            array = array.astype(f'<U{max(array.dtype.itemsize // 4, 1)}')
+        array_list.append(array)
+
+    # The header length depends on the offsets, which depend on the header length: reserve enough room first.
+    header: Dict[str, Any] = {
+        'product': product,
+        'rows': len(array_list[0]),
+        'columns': [
+            {'name': field, 'dtype': array.dtype.str, 'offset': 0}
+            for field, array in zip(FuturesDailyData.fields(), array_list)
+        ],
+        'source': source,
+    }
+    header_size: int = align(len(MAGIC) + 4 + len(json.dumps(header).encode('utf-8')) + 16 * len(array_list))
+    offset: int = header_size
+    for item, array in zip(header['columns'], array_list):
+        item['offset'] = offset
+        offset = align(offset + array.nbytes)
+    header_bytes: bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (header_size - len(MAGIC) - 4 - len(header_bytes))
+
+    with atomic_write(column_file, mode='wb') as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(4, 'little'))
+        f.write(header_bytes)
+        for item, array in zip(header['columns'], array_list):
+            f.write(b'\0' * (item['offset'] - f.tell()))
+            f.write(array.tobytes())
+
+
+def read_column_header(column_file: Path) -> Dict[str, Any]:
+    """
+    Read the header of a column file.
+    :param column_file: <Path>.
+    :return: <dict>. see the module docstring.
+    """
+    with open(column_file, mode='rb') as f:
+        magic: bytes = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ColumnFileError(f'{column_file} is not a column file.')
+        header_length: int = int.from_bytes(f.read(4), 'little')
+        return json.loads(f.read(header_length))
+
+
+def read_column_file(column_file: Path, fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Read the columns of a column file, as read-only views of its memory mapping.
+    :param column_file: <Path>.
+    :param fields: the columns to read, default all.
+    :return: <dict>. the columns, see <collector/parser.py>.
+    """
+    header: Dict[str, Any] = read_column_header(column_file)
+    if fields is None:
+        fields = FuturesDailyData.fields()
+    rows: int = header['rows']
+    if rows == 0:
+        empty: Dict[str, np.ndarray] = get_empty_columns()
+        return {field: empty[field] for field in fields}
+
+    mapping: np.ndarray = np.memmap(column_file, dtype=np.uint8, mode='r')
+    column_dict: Dict[str, Dict[str, Any]] = {item['name']: item for item in header['columns']}
+    result: Dict[str, np.ndarray] = {}
+    for field in fields:
+        item: Dict[str, Any] = column_dict[field]
+        dtype: np.dtype = np.dtype(item['dtype'])
+        result[field] = mapping[item['offset']:item['offset'] + dtype.itemsize * rows].view(dtype)
+    return result
+
+
+def read_csv_columns(csv_file: Path) -> Dict[str, np.ndarray]:
+    """
+    Read a product csv file into columns.
+    :param csv_file: <Path>.
+    :return: <dict>. the columns, see <collector/parser.py>.
+    """
+    header, raw = read_csv_table(csv_file)
+    if not raw or not raw[0]:
+        return get_empty_columns()
+
+    raw_dict: Dict[str, tuple] = dict(zip(header, raw))
+    result: Dict[str, np.ndarray] = {
+        'product': np.array(raw_dict['product'], dtype=np.str_),
+        'delivery': np.array(raw_dict['delivery'], dtype=np.str_),
+        'date': np.array(raw_dict['date'], dtype='datetime64[D]'),
+    }
+    for field in PRICE_FIELDS:
+        result[field] = to_float_array(raw_dict[field])
+    return result
+
+
+def write_csv_columns(csv_file: Path, columns: Dict[str, np.ndarray]) -> None:
+    """
+    Write columns into a product csv file, through a temporary file and rename.
+    :param csv_file: <Path>.
+    :param columns: <dict>. the columns, see <collector/parser.py>.
+    :return:
+    """
+    with atomic_write(csv_file, encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FuturesDailyData.fields())
+        writer.writerows(columns_to_row_list(sort_columns(columns)))
+
+
+class ColumnStore(object):
+    """
+    The column files of an exchange, converted from its product csv files.
+    """
+    def __init__(self, exchange_path: Path):
+        """
+        :param exchange_path: <Path>. <Package path>\\data\\<exchange symbol>.
+        """
+        self.exchange_path: Path = exchange_path
+        self.csv_path: Path = exchange_path.joinpath('daily')
+        self.column_path: Path = exchange_path.joinpath('column')
+
+    def get_csv_file(self, product: str) -> Path:
+        return self.csv_path.joinpath(f'{product}.csv')
+
+    def get_column_file(self, product: str) -> Path:
+        return self.column_path.joinpath(f'{product}.col')
+
+    def get_products(self) -> List[str]:
+        """
+        Get the products with a column file.
+        :return: <list>. sorted.
+        """
+        if not self.column_path.exists():
+            return []
+        return sorted(column_file.stem for column_file in self.column_path.glob('*.col'))
+
+    def is_stale(self, product: str) -> bool:
+        """
+        Whether the column file of a product is missing, or older than its csv file.
+        :param product: <str>.
+        :return: <bool>.
+        """
+        column_file: Path = self.get_column_file(product)
+        if not column_file.exists():
+            return True
+        csv_file: Path = self.get_csv_file(product)
+        return csv_file.exists() and read_column_header(column_file)['source'] != get_source_stat(csv_file)
+
+    def load(self, product: str, fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Load the columns of a product, memory mapped.
+        :param product: <str>.
+        :param fields: the columns to load, default all.
+        :return: <dict>. the columns, see <collector/parser.py>.
+        """
+        return read_column_file(self.get_column_file(product), fields)
+
+    def save(self, product: str, columns: Dict[str, np.ndarray]) -> None:
+        """
+        Save the columns of a product, not from its csv file.
+        :param product: <str>.
+        :param columns: <dict>.
+        :return:
+        """
+        write_column_file(self.get_column_file(product), product, columns)
+
+    def convert(self, product: str) -> Path:
+        """
+        Convert the csv file of a product into its column file.
+        :param product: <str>.
+        :return: <Path>. the column file.
+        """
+        csv_file: Path = self.get_csv_file(product)
+        source: Dict[str, int] = get_source_stat(csv_file)
+        column_file: Path = self.get_column_file(product)
+        write_column_file(column_file, product, read_csv_columns(csv_file), source)
+        return column_file
+
+    def convert_all(self, stale_only: bool = True) -> List[str]:
+        """
+        Convert the csv files of all the products.
+        :param stale_only: <bool>. skip the products whose column file is up to date.
+        :return: <list>. the products converted.
+        """
+        result: List[str] = []
+        if not self.csv_path.exists():
+            return result
+        for csv_file in sorted(self.csv_path.glob('*.csv')):
+            product: str = csv_file.stem
+            if stale_only and not self.is_stale(product):
+                continue
+            self.convert(product)
+            result.append(product)
+        return result
+
+    def export_csv(self, product: str, csv_file: Optional[Path] = None) -> Path:
+        """
+        Export the column file of a product into a csv file.
+        :param product: <str>.
+        :param csv_file: <Path>. default the product csv file.
+        :return: <Path>. the csv file.
+        """
+        if csv_file is None:
+            csv_file = self.get_csv_file(product)
+        write_csv_columns(csv_file, self.load(product))
+        return csv_file
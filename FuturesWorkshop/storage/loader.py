@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+The loader of the futures daily data, for all the consumers.
+
+A product is loaded from its column file, see <column_store.py>, converted from its csv file first if missing or
+stale. The rows are sorted by (date, delivery), so the <date> column is the date index of the product: the rows of
+a date range are found by binary search on it, and only the rows and the columns requested are touched in the
+memory mapping. A point lookup costs O(log n) plus the bytes needed.
+
+The loader shared in the process caches the results in the frame cache, see <cache.py>. The results cached are
+copied out of the memory mapping, so the cache is charged what they really take, and it keeps no column file mapped:
+a file mapped can not be replaced on Windows, and the column file is replaced when converted again.
+"""
+
+
+from typing import Dict, List, Optional, Sequence
+from datetime import date
+from pathlib import Path
+import threading
+
+import numpy as np
+
+from ..config import PACKAGE_PATH
+from ..utility import get_exchange_symbol_by_product_symbol
+from ..definition import FuturesDailyData
+from ..collector.parser import get_empty_columns
+from .column_store import ColumnStore
+from .cache import FrameCache, get_frame_cache
+
+
+class DailyLoader(object):
+    """
+    Load the futures daily data of the exchanges under a data path. Thread safe.
+    """
+    def __init__(self, data_path: Path, cache: Optional[FrameCache] = None):
+        """
+        :param data_path: <Path>. <Package path>\\data.
+        :param cache: <FrameCache>. if given, the results cached in it.
+        """
+        self.data_path: Path = data_path
+        self.cache: Optional[FrameCache] = cache
+        self.lock = threading.Lock()
+        self.store_dict: Dict[str, ColumnStore] = {}
+
+    def get_column_store(self, exchange: str) -> ColumnStore:
+        store: Optional[ColumnStore] = self.store_dict.get(exchange)
+        if store is None:
+            store = self.store_dict.setdefault(exchange, ColumnStore(self.data_path.joinpath(exchange)))
+        return store
+
+    def get_ready_store(self, product: str, exchange: Optional[str] = None) -> Optional[ColumnStore]:
+        """
+        Get the column store of a product, its column file converted from its csv file first if missing or stale.
+        :param product: <str>. product symbol.
+        :param exchange: <str>. exchange symbol, default the exchange of the product.
+        :return: <ColumnStore>. None if the product has no data.
+        """
+        if exchange is None:
+            exchange = get_exchange_symbol_by_product_symbol(product)
+            if exchange is None:
+                raise ValueError(f'Unknown product <{product}>.')
+        store: ColumnStore = self.get_column_store(exchange)
+        if store.is_stale(product):
+            with self.lock:
+                if store.is_stale(product):
+                    if not store.get_csv_file(product).exists():
+                        return None
+                    if self.cache is not None:
+                        # Free the entries of the old column file at once.
+                        self.cache.discard(store.get_column_file(product))
+                    store.convert(product)
+        return store
+
+    def load(self,
+             product: str,
+             begin: Optional[date] = None,
+             end: Optional[date] = None,
+             deliveries: Optional[Sequence[str]] = None,
+             fields: Optional[Sequence[str]] = None,
+             exchange: Optional[str] = None
+             ) -> Dict[str, np.ndarray]:
+        """
+        Load the rows of a product, sorted by (date, delivery).
+        :param product: <str>. product symbol.
+        :param begin: <datetime.date>. included, default the first day.
+        :param end: <datetime.date>. included, default the last day.
+        :param deliveries: the deliveries, default all.
+        :param fields: the columns, default all.
+        :param exchange: <str>. exchange symbol, default the exchange of the product.
+        :return: <dict>. the columns, see <collector/parser.py>. Read-only.
+        """
+        fields = tuple(fields) if fields is not None else tuple(FuturesDailyData.fields())
+        deliveries = tuple(deliveries) if deliveries is not None else None
+        store: Optional[ColumnStore] = self.get_ready_store(product, exchange)
+        if store is None:
+            empty: Dict[str, np.ndarray] = get_empty_columns()
+            return {field: empty[field] for field in fields}
+        if self.cache is None:
+            return self.read(store, product, begin, end, deliveries, fields)
+        return self.cache.get_or_load(
+            store.get_column_file(product),
+            ('columns', product, begin, end, deliveries, fields),
+            lambda: copy_columns(self.read(store, product, begin, end, deliveries, fields))
+        )
+
+    @staticmethod
+    def read(store: ColumnStore,
+             product: str,
+             begin: Optional[date],
+             end: Optional[date],
+             deliveries: Optional[Sequence[str]],
+             fields: Sequence[str]
+             ) -> Dict[str, np.ndarray]:
+        needed: List[str] = list(dict.fromkeys([*fields, 'date', *(['delivery'] if deliveries is not None else [])]))
+        columns: Dict[str, np.ndarray] = store.load(product, needed)
+        i: int = 0
+        j: int = len(columns['date'])
+        if begin is not None:
+            i = int(np.searchsorted(columns['date'], np.datetime64(begin, 'D'), side='left'))
+        if end is not None:
+            j = max(i, int(np.searchsorted(columns['date'], np.datetime64(end, 'D'), side='right')))
+        if deliveries is not None:
+            mask: np.ndarray = np.isin(columns['delivery'][i:j], np.array(list(deliveries), dtype=np.str_))
+            result: Dict[str, np.ndarray] = {field: columns[field][i:j][mask] for field in fields}
+            for column in result.values():
+                column.flags.writeable = False
+            return result
+        return {field: columns[field][i:j] for field in fields}
+
+    def load_frame(self,
+                   product: str,
+                   begin: Optional[date] = None,
+                   end: Optional[date] = None,
+                   deliveries: Optional[Sequence[str]] = None,
+                   fields: Optional[Sequence[str]] = None,
+                   exchange: Optional[str] = None
+                   ):
+        """
+        Load the rows of a product into a DataFrame, see <load>.
+        :return: <pandas.DataFrame>.
+        """
+        # pandas is imported only when asked, it takes long to import.
+        import pandas as pd
+
+        fields = tuple(fields) if fields is not None else tuple(FuturesDailyData.fields())
+        deliveries = tuple(deliveries) if deliveries is not None else None
+        store: Optional[ColumnStore] = self.get_ready_store(product, exchange)
+        if store is None or self.cache is None:
+            return pd.DataFrame(self.load(product, begin, end, deliveries, fields, exchange))
+        return self.cache.get_or_load(
+            store.get_column_file(product),
+            ('frame', product, begin, end, deliveries, fields),
+            lambda: pd.DataFrame(self.read(store, product, begin, end, deliveries, fields), copy=True)
+        )
+
+
+def copy_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Copy the columns still viewing the memory mapping of a column file, to be cached.
+    :param columns: <dict>. the columns read.
+    :return: <dict>. the columns, none of them mapped. Read-only.
+    """
+    result: Dict[str, np.ndarray] = {}
+    for field, column in columns.items():
+        if column.base is not None:
+            column = np.array(column)
+            column.flags.writeable = False
+        result[field] = column
+    return result
+
+
+daily_loader: Optional[DailyLoader] = None
+
+
+def get_daily_loader() -> DailyLoader:
+    """
+    Get the loader shared in the process, of <Package path>\\data, cached in the frame cache.
+    :return: <DailyLoader>.
+    """
+    global daily_loader
+    if daily_loader is None:
+        daily_loader = DailyLoader(PACKAGE_PATH.joinpath('data'), get_frame_cache())
+    return daily_loader
+
+
+def load_daily(product: str,
+               begin: Optional[date] = None,
+               end: Optional[date] = None,
+               deliveries: Optional[Sequence[str]] = None,
+               fields: Optional[Sequence[str]] = None,
+               as_frame: bool = False
+               ):
+    """
+    Load the futures daily data of a product.
+    :param product: <str>. product symbol.
+    :param begin: <datetime.date>. included, default the first day.
+    :param end: <datetime.date>. included, default the last day.
+    :param deliveries: the deliveries, default all.
+    :param fields: the columns, default all.
+    :param as_frame: <bool>. return a <pandas.DataFrame> instead of a dict of columns.
+    :return: <dict> or <pandas.DataFrame>. sorted by (date, delivery).
+    """
+    if as_frame:
+        return get_daily_loader().load_frame(product, begin, end, deliveries, fields)
+    return get_daily_loader().load(product, begin, end, deliveries, fields)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Optional SQLite store of the futures daily data, for fast range and cross-section queries.
+
+The table <daily> is keyed on (product, delivery, date), without rowid, so the rows of a contract are stored
+together. The covering index <daily_product_date> on (product, date, delivery, <the price fields>) answers the
+queries by product and date, such as "all the contracts of rb on 2020-05-06" or "cu between two dates", from the
+index alone. The index <daily_date> serves the cross-section of all the products on a date.
+A date is saved as text, %Y-%m-%d, and a missing value as NULL.
+
+The crawlers insert the rows of each crawl day with a single <executemany>, in one transaction. The database is
+in WAL mode, so the readers are not blocked by a crawl writing.
+
+The database file saved in <Package path>\\data\\quote.sqlite3
+"""
+
+
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import date
+from pathlib import Path
+import sqlite3
+import threading
+
+import numpy as np
+
+from ..utility import make_path_existed
+from ..definition import FuturesDailyData
+from ..collector.parser import PRICE_FIELDS, get_empty_columns, to_float_array
+
+
+class SqliteQuoteStore(object):
+    """
+    The SQLite store of the futures daily data. Thread safe.
+    """
+    def __init__(self, db_file: Path, timeout: float = 30.0):
+        """
+        :param db_file: <Path>.
+        :param timeout: <float>. how long to wait for the lock held by another writer, in seconds.
+        """
+        make_path_existed(db_file.parent)
+        self.db_file: Path = db_file
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(db_file), timeout=timeout, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS daily ('
+                'product TEXT NOT NULL, '
+                'delivery TEXT NOT NULL, '
+                'date TEXT NOT NULL, '
+                + ''.join(f'{field} REAL, ' for field in PRICE_FIELDS) +
+                'PRIMARY KEY (product, delivery, date)'
+                ') WITHOUT ROWID'
+            )
+            self.connection.execute(
+                f'CREATE INDEX IF NOT EXISTS daily_product_date '
+                f'ON daily (product, date, delivery, {", ".join(PRICE_FIELDS)})'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS daily_date ON daily (date)')
+
+    def add_columns(self, columns: Dict[str, np.ndarray], day: Optional[date] = None) -> int:
+        """
+        Insert the rows of a crawl day, in one transaction. A row replaces the stored row with the same key.
+        :param columns: <dict>. the columns, see <collector/parser.py>.
+        :param day: <datetime.date>. the day crawled, unused, as <BufferedCsvWriter.add_columns>.
+        :return: <int>. the number of rows inserted.
+        """
+        row_count: int = len(columns['product'])
+        if row_count == 0:
+            return 0
+        value_list: List[List[Any]] = [
+            columns['product'].tolist(),
+            columns['delivery'].tolist(),
+            np.datetime_as_string(columns['date'], unit='D').tolist(),
+        ]
+        for field in PRICE_FIELDS:
+            column: np.ndarray = columns[field]
+            value_list.append(np.where(np.isnan(column), None, column).tolist())
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO daily ({", ".join(FuturesDailyData.fields())}) '
+                f'VALUES ({", ".join("?" * len(value_list))})',
+                zip(*value_list)
+            )
+        return row_count
+
+    def query(self,
+              product: str,
+              begin: Optional[date] = None,
+              end: Optional[date] = None,
+              deliveries: Optional[Sequence[str]] = None,
+              fields: Optional[Sequence[str]] = None
+              ) -> Dict[str, np.ndarray]:
+        """
+        Query the rows of a product, sorted by (date, delivery).
+        :param product: <str>. product symbol.
+        :param begin: <datetime.date>. included, default the first day.
+        :param end: <datetime.date>. included, default the last day.
+        :param deliveries: the deliveries, default all.
+        :param fields: the columns, default all.
+        :return: <dict>. the columns, see <collector/parser.py>.
+        """
+        if fields is None:
+            fields = FuturesDailyData.fields()
+        condition_list: List[str] = ['product = ?']
+        parameter_list: List[Any] = [product]
+        if begin is not None:
+            condition_list.append('date >= ?')
+            parameter_list.append(begin.isoformat())
+        if end is not None:
+            condition_list.append('date <= ?')
+            parameter_list.append(end.isoformat())
+        if deliveries is not None:
+            deliveries = list(deliveries)
+            condition_list.append(f'delivery IN ({", ".join("?" * len(deliveries))})')
+            parameter_list.extend(deliveries)
+        with self.lock:
+            row_list: List[tuple] = self.connection.execute(
+                f'SELECT {", ".join(fields)} FROM daily INDEXED BY daily_product_date '
+                f'WHERE {" AND ".join(condition_list)} ORDER BY date, delivery',
+                parameter_list
+            ).fetchall()
+        return self.to_columns(row_list, fields)
+
+    def get_cross_section(self,
+                          product: str,
+                          day: date,
+                          fields: Optional[Sequence[str]] = None
+                          ) -> Dict[str, np.ndarray]:
+        """
+        Query all the contracts of a product on a day, sorted by delivery.
+        :param product: <str>. product symbol.
+        :param day: <datetime.date>.
+        :param fields: the columns, default all.
+        :return: <dict>. the columns, see <collector/parser.py>.
+        """
+        return self.query(product, day, day, fields=fields)
+
+    def get_products(self, day: Optional[date] = None) -> List[str]:
+        """
+        Get the products stored, or the products with data on a day if <day> given.
+        :param day: <datetime.date>.
+        :return: <list>. sorted.
+        """
+        with self.lock:
+            if day is None:
+                row_list = self.connection.execute('SELECT DISTINCT product FROM daily ORDER BY product').fetchall()
+            else:
+                row_list = self.connection.execute(
+                    'SELECT DISTINCT product FROM daily WHERE date = ? ORDER BY product', [day.isoformat()]
+                ).fetchall()
+        return [row[0] for row in row_list]
+
+    @staticmethod
+    def to_columns(row_list: List[tuple], fields: Sequence[str]) -> Dict[str, np.ndarray]:
+        empty: Dict[str, np.ndarray] = get_empty_columns()
+        if not row_list:
+            return {field: empty[field] for field in fields}
+        result: Dict[str, np.ndarray] = {}
+        for field, value_tuple in zip(fields, zip(*row_list)):
+            if field in PRICE_FIELDS:
+                result[field] = to_float_array(value_tuple)
+            elif field == 'date':
+                result[field] = np.array(value_tuple, dtype='datetime64[D]')
+            else:
+                result[field] = np.array(value_tuple, dtype=np.str_)
+        return result
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self) -> 'SqliteQuoteStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
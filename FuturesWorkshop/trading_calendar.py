@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+FuturesWorkshop - Trading calendar module
+
+The trading calendar is built once from <holiday.csv>. A day is a trading day if it is neither a weekend
+nor in a holiday. The calendar keeps, over a span of whole years:
+    a bitmap of the trading days, for O(1) membership,
+    the sorted array of the trading days, for the trading days between two days and the next or previous
+        trading day, by binary search,
+    the prefix count of the trading days, for O(1) trading day counts.
+The span is extended, by whole years, when a day out of it is asked. Out of the years in <holiday.csv>,
+only the weekends are holidays.
+
+Crawl planning, backtests and resampling should all share the calendar got by <get_trading_calendar>.
+"""
+
+
+from typing import Iterable, List, Optional, Tuple
+from datetime import date
+from pathlib import Path
+import threading
+
+import numpy as np
+
+from .config import load_csv, get_config_file_path
+
+
+class TradingCalendar(object):
+    def __init__(self, holiday_list: Iterable[Tuple[date, date]]):
+        """
+        :param holiday_list: the holidays, (begin, end) both included.
+        """
+        self.holiday_list: List[Tuple[date, date]] = sorted(holiday_list)
+        self.lock = threading.Lock()
+
+        # The span, and the arrays over it, replaced together when the span extended:
+        #   bitmap          is trading day, by <day ordinal> - <first ordinal>.
+        #   trading_days    datetime64[D], ascending.
+        #   prefix_count    the number of trading days before each day, by <day ordinal> - <first ordinal>,
+        #                   one more at the end.
+        self.first_day: Optional[date] = None
+        self.last_day: Optional[date] = None
+        self.arrays: Tuple[int, np.ndarray, np.ndarray, np.ndarray] = (0, np.array([]), np.array([]), np.array([]))
+
+        if self.holiday_list:
+            self.build(
+                date(min(begin for begin, end in self.holiday_list).year, 1, 1),
+                date(max(end for begin, end in self.holiday_list).year, 12, 31)
+            )
+        else:
+            today: date = date.today()
+            self.build(date(today.year, 1, 1), date(today.year, 12, 31))
+
+    @classmethod
+    def from_csv(cls, csv_file: Path) -> 'TradingCalendar':
+        """
+        Build the calendar from a holiday csv file, with columns <begin> and <end>.
+        :param csv_file: <Path>.
+        :return: <TradingCalendar>.
+        """
+        return cls((item['begin'], item['end']) for item in load_csv(csv_file, 'holiday'))
+
+    def build(self, first_day: date, last_day: date) -> None:
+        """
+        Build the arrays over [first_day, last_day].
+        :param first_day: <datetime.date>.
+        :param last_day: <datetime.date>.
+        :return:
+        """
+        days: np.ndarray = np.arange(np.datetime64(first_day, 'D'), np.datetime64(last_day, 'D') + 1)
+        # 1970-01-01 is Thursday, and Monday is 0.
+        weekday: np.ndarray = (days.astype(np.int64) + 3) % 7
+        bitmap: np.ndarray = weekday < 5
+        first_ordinal: int = first_day.toordinal()
+        for begin, end in self.holiday_list:
+            i: int = max(begin.toordinal() - first_ordinal, 0)
+            j: int = min(end.toordinal() - first_ordinal + 1, len(bitmap))
+            if i < j:
+                bitmap[i:j] = False
+
+        self.arrays = (first_ordinal, bitmap, days[bitmap], np.concatenate([[0], np.cumsum(bitmap, dtype=np.int64)]))
+        self.first_day, self.last_day = first_day, last_day
+
+    def ensure_span(self, begin: date, end: Optional[date] = None) -> None:
+        """
+        Extend the span, by whole years, to cover [begin, end].
+        :param begin: <datetime.date>.
+        :param end: <datetime.date>. default <begin>.
+        :return:
+        """
+        if end is None:
+            end = begin
+        if self.first_day <= begin and end <= self.last_day:
+            return
+        with self.lock:
+            first_day: date = min(self.first_day, date(begin.year, 1, 1))
+            last_day: date = max(self.last_day, date(end.year, 12, 31))
+            if first_day < self.first_day or self.last_day < last_day:
+                self.build(first_day, last_day)
+
+    @property
+    def trading_days(self) -> np.ndarray:
+        return self.arrays[2]
+
+    def is_trading_day(self, day: date) -> bool:
+        self.ensure_span(day)
+        first_ordinal, bitmap, _, _ = self.arrays
+        return bool(bitmap[day.toordinal() - first_ordinal])
+
+    def is_holiday(self, day: date) -> bool:
+        return not self.is_trading_day(day)
+
+    def get_trading_days_array(self, begin: date, end: date) -> np.ndarray:
+        """
+        Get the trading days between <begin> and <end>, both included.
+        :param begin: <datetime.date>.
+        :param end: <datetime.date>.
+        :return: <np.ndarray>. datetime64[D], ascending.
+        """
+        self.ensure_span(begin, max(begin, end))
+        trading_days: np.ndarray = self.trading_days
+        i: int = int(np.searchsorted(trading_days, np.datetime64(begin, 'D'), side='left'))
+        j: int = int(np.searchsorted(trading_days, np.datetime64(end, 'D'), side='right'))
+        return trading_days[i:max(i, j)]
+
+    def get_trading_days(self, begin: date, end: date) -> List[date]:
+        """
+        Get the trading days between <begin> and <end>, both included.
+        :param begin: <datetime.date>.
+        :param end: <datetime.date>.
+        :return: <list>. ascending.
+        """
+        return self.get_trading_days_array(begin, end).tolist()
+
+    def count_trading_days(self, begin: date, end: date) -> int:
+        """
+        Count the trading days between <begin> and <end>, both included.
+        :param begin: <datetime.date>.
+        :param end: <datetime.date>.
+        :return: <int>.
+        """
+        if end < begin:
+            return 0
+        self.ensure_span(begin, end)
+        first_ordinal, _, _, prefix_count = self.arrays
+        return int(prefix_count[end.toordinal() - first_ordinal + 1] - prefix_count[begin.toordinal() - first_ordinal])
+
+    def get_next_trading_day(self, day: date) -> date:
+        """
+        Get the first trading day after <day>.
+        :param day: <datetime.date>.
+        :return: <datetime.date>.
+        """
+        self.ensure_span(day)
+        while True:
+            trading_days: np.ndarray = self.trading_days
+            i: int = int(np.searchsorted(trading_days, np.datetime64(day, 'D'), side='right'))
+            if i < len(trading_days):
+                return trading_days[i].item()
+            self.ensure_span(day, date(self.last_day.year + 1, 1, 1))
+
+    def get_previous_trading_day(self, day: date) -> date:
+        """
+        Get the last trading day before <day>.
+        :param day: <datetime.date>.
+        :return: <datetime.date>.
+        """
+        self.ensure_span(day)
+        while True:
+            trading_days: np.ndarray = self.trading_days
+            i: int = int(np.searchsorted(trading_days, np.datetime64(day, 'D'), side='left'))
+            if i > 0:
+                return trading_days[i - 1].item()
+            self.ensure_span(date(self.first_day.year - 1, 1, 1), day)
+
+
+trading_calendar: Optional[TradingCalendar] = None
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """
+    Get the trading calendar shared in the process, built from <holiday.csv> at the first call.
+    :return: <TradingCalendar>.
+    """
+    global trading_calendar
+    if trading_calendar is None:
+        trading_calendar = TradingCalendar.from_csv(get_config_file_path('holiday'))
+    return trading_calendar
@@ -15,7 +15,8 @@ from .main_window_ui import Ui_MainWindow
 from .dialog_preference import DialogPreference
 from .dialog_exchange_selector import DialogExchangeSelector
 from .dialog_product_selector import DialogProductSelector
-from .thread import ThreadLoadingCsv
+from .thread import ThreadLoadingCsv, ThreadCrawling
+from ..collector.orchestrator import CrawlProgress
 
 
 class MainWindowStatusEnum(Enum):
@@ -31,6 +32,7 @@ class MainWindowStatusEnum(Enum):
 class MainWindow(QtWidgets.QMainWindow):
     df: pd.DataFrame
     thread_loading: QtCore.QThread
+    thread_crawling: QtCore.QThread
 
     data_updated: QtCore.pyqtSignal = QtCore.pyqtSignal()
 
@@ -98,7 +100,15 @@ class MainWindow(QtWidgets.QMainWindow):
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             exchange_selected: List[str] = dialog.result
             dialog.destroy()
-            print(exchange_selected)
+            if not exchange_selected:
+                return
+
+            self.thread_crawling = ThreadCrawling(exchange_selected)
+            self.thread_crawling.crawling_started.connect(self.on_crawling_started)
+            self.thread_crawling.crawling_progress.connect(self.on_crawling_progress)
+            self.thread_crawling.crawling_finished.connect(self.on_crawling_finished)
+            self._ui.actionCrawl.setEnabled(False)
+            self.thread_crawling.start()
 
     @pyqtSlot()
     def on_actionDownload_triggered(self):
@@ -108,6 +118,29 @@ class MainWindow(QtWidgets.QMainWindow):
             dialog.destroy()
             print(product_selected)
 
+    @pyqtSlot(list)
+    def on_crawling_started(self, exchange_list: List[str]):
+        self._ui.statusbar.showMessage(f'{", ".join(exchange_list)} 数据爬取开始 ...')
+        self.update()
+
+    @pyqtSlot(object)
+    def on_crawling_progress(self, progress: CrawlProgress):
+        self._ui.statusbar.showMessage(
+            f'数据爬取中，已完成 {progress.days_done}/{progress.days_total} 天，'
+            f'{progress.days_per_second:.1f} 天/秒 ...'
+        )
+        self.update()
+
+    @pyqtSlot(object)
+    def on_crawling_finished(self, progress: CrawlProgress):
+        failed: List[str] = [exchange for exchange, error in progress.error.items() if error is not None]
+        message: str = f'数据爬取完成，共 {progress.days_done} 天，用时 {progress.elapsed:.1f} 秒。'
+        if failed:
+            message += f'失败：{", ".join(failed)}。'
+        self._ui.statusbar.showMessage(message)
+        self._ui.actionCrawl.setEnabled(True)
+        self.update()
+
     @pyqtSlot(str)
     def on_loading_started(self, file_name: str):
         self._ui.statusbar.showMessage(f'{file_name} 加载开始 ...')
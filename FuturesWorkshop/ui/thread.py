@@ -3,9 +3,16 @@
 __author__ = 'Bruce Frank Wong'
 
 
+from typing import List
+from pathlib import Path
+import multiprocessing
+
 from PyQt5 import QtCore
 import pandas as pd
 
+from ..collector.orchestrator import CrawlProgress, crawl_exchanges
+from ..storage.cache import get_frame_cache
+
 
 class ThreadLoadingCsv(QtCore.QThread):
     loading_started = QtCore.pyqtSignal(str)
@@ -18,11 +25,15 @@ class ThreadLoadingCsv(QtCore.QThread):
         self.file_name = file_name
 
     def run(self) -> None:
+        self.loading_started.emit(self.file_name)
+        # The same file unchanged is served from the frame cache.
+        self.df = get_frame_cache().get_or_load(Path(self.file_name), 'tick_csv', self.load)
+        self.loading_finished.emit(self.file_name, self.df.shape[0])
+
+    def load(self) -> pd.DataFrame:
         chunk_size = 5000
         chunk_list = []
 
-        self.loading_started.emit(self.file_name)
-
         count: int = 0
         with pd.read_csv(self.file_name, chunksize=chunk_size, parse_dates=['datetime']) as reader:
             for chunk in reader:
@@ -30,5 +41,25 @@ class ThreadLoadingCsv(QtCore.QThread):
                 count += len(chunk)
                 self.loading_progress.emit(self.file_name, count)
 
-        self.df = pd.concat(chunk_list)
-        self.loading_finished.emit(self.file_name, self.df.shape[0])
+        return pd.concat(chunk_list)
+
+
+class ThreadCrawling(QtCore.QThread):
+    crawling_started = QtCore.pyqtSignal(list)
+    crawling_progress = QtCore.pyqtSignal(object)
+    crawling_finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, exchange_list: List[str], parent=None):
+        super().__init__(parent)
+        self.exchange_list = exchange_list
+
+    def run(self) -> None:
+        self.crawling_started.emit(self.exchange_list)
+        progress: CrawlProgress = crawl_exchanges(
+            self.exchange_list,
+            progress_callback=self.crawling_progress.emit,
+            mp_context=multiprocessing.get_context('spawn'),
+            use_async=True,
+            incremental=True,
+        )
+        self.crawling_finished.emit(progress)
@@ -8,62 +8,86 @@ FuturesWorkshop - Utility module
 """
 
 
-from typing import Any, Dict, List, Tuple
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 from datetime import date, time
 from pathlib import Path
-import csv
+from contextlib import contextmanager
+import threading
+import os
 
-from .config import CONFIGS, PACKAGE_PATH
+import numpy as np
+
+from .config import CONFIGS
+from .trading_calendar import get_trading_calendar
+from .reference import get_reference_data
 
 
 def make_path_existed(path: Path):
-    if not path.exists():
-        path.mkdir(parents=True)
+    # exist_ok, as the path may be made by another thread or process in between.
+    path.mkdir(parents=True, exist_ok=True)
+
+
+@contextmanager
+def atomic_write(file: Path, mode: str = 'w', **kwargs) -> Iterator[IO]:
+    """
+    Write a file through a temporary file, synced and renamed to it, so a crash never leaves a broken file. The
+    temporary file is unique to the process and the thread, so the writers of the same file never share one, and
+    it is removed if the writing fails, leaving the file untouched.
+    :param file: <Path>.
+    :param mode: <str>. 'w' or 'wb'.
+    :param kwargs: the other arguments for <open>, such as encoding and newline.
+    :return: the temporary file opened.
+    """
+    make_path_existed(file.parent)
+    temp_file: Path = file.with_name(f'{file.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(temp_file, mode=mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, file)
+    except BaseException:
+        try:
+            temp_file.unlink()
+        except OSError:
+            pass
+        raise
 
 
 def is_holiday(day: date) -> bool:
-    if day in CONFIGS['holiday']['expanded'] or day.isoweekday() == 6 or day.isoweekday() == 7:
-        return True
-    else:
-        return False
+    return get_trading_calendar().is_holiday(day)
 
 
 def get_exchange_symbol_list() -> List[str]:
-    return [exchange['symbol'] for exchange in CONFIGS['exchange']['info']]
+    return list(get_reference_data().exchange_symbol_list)
 
 
 def get_exchange_name_list() -> List[str]:
-    return [exchange['name'] for exchange in CONFIGS['exchange']['info']]
+    return list(get_reference_data().exchange_name_list)
 
 
 def get_exchange_symbol_by_name(exchange_name: str) -> str:
-    for item in CONFIGS['exchange']['info']:
-        if item['name'] == exchange_name:
-            return item['symbol']
+    return get_reference_data().exchange_symbol_by_name.get(exchange_name)
 
 
 def get_product_symbol_list() -> List[str]:
-    return [product['symbol'] for product in CONFIGS['product']['info']]
+    return list(get_reference_data().product_symbol_list)
 
 
 def get_product_name_list() -> List[str]:
-    return [product['name'] for product in CONFIGS['product']['info']]
+    return list(get_reference_data().product_name_list)
 
 
 def get_product_name_by_symbol(product_symbol: str) -> str:
-    for item in CONFIGS['product']['info']:
-        if item['symbol'] == product_symbol:
-            return item['name']
+    return get_reference_data().product_name_by_symbol.get(product_symbol)
 
 
 def get_product_symbol_by_name(product_name: str) -> str:
-    for item in CONFIGS['product']['info']:
-        if item['name'] == product_name:
-            return item['symbol']
+    return get_reference_data().product_symbol_by_name.get(product_name)
 
 
 def get_product_symbol_list_by_exchange(exchange: str) -> List[str]:
-    return CONFIGS['exchange'][exchange]
+    return list(get_reference_data().product_by_exchange[exchange])
 
 
 def get_product_trading_time(product_symbol: str) -> List[Dict[str, time]]:
@@ -71,32 +95,20 @@ def get_product_trading_time(product_symbol: str) -> List[Dict[str, time]]:
 
 
 def get_exchange_symbol_by_product_symbol(product_symbol: str) -> str:
-    for item in CONFIGS['product']['info']:
-        if item['symbol'] == product_symbol:
-            return item['exchange']
-
-
-def get_main_contract(day: date, product_symbol: str = None) -> str:
-    exchange_symbol: str = get_exchange_symbol_by_product_symbol(product_symbol)
-    csv_file: Path = PACKAGE_PATH.joinpath('data', exchange_symbol, 'daily', f'{product_symbol}.csv')
-    result: List[Dict[str, Any]] = []
-    with open(csv_file, mode='r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if date.fromisoformat(row['date']) == day:
-                result.append(
-                    {
-                        'delivery': row['delivery'],
-                        'open_interest': int(row['open_interest']),
-                        'volume': int(row['volume']),
-                    }
-                )
-    result.sort(key=lambda oi: oi['open_interest'], reverse=True)
-    if result[1]['open_interest'] == result[0]['open_interest'] and \
-            result[1]['volume'] > result[0]['volume']:
-        return result[1]['delivery']
-    else:
-        return result[0]['delivery']
+    return get_reference_data().exchange_by_product.get(product_symbol)
+
+
+def get_main_contract(day: date, product_symbol: str = None) -> Optional[str]:
+    """
+    Get the main contract of a product on a day, see <main_contract.py>.
+    :param day: <datetime.date>.
+    :param product_symbol: <str>.
+    :return: <str>. the delivery, None if no data on the day.
+    """
+    # Imported here, the main contract module imports this module.
+    from .main_contract import get_main_contract_index
+
+    return get_main_contract_index().get(product_symbol, day)
 
 
 def get_stop_loss_settings() -> Dict[str, Dict[str, int]]:
@@ -104,15 +116,115 @@ def get_stop_loss_settings() -> Dict[str, Dict[str, int]]:
 
 
 def split_symbol(symbol: str) -> Tuple[str, str, str]:
-    exchange_symbol: str
-    product_symbol: str
-    delivery: str
-    temp: str
+    """
+    Split a contract symbol, such as 'SHFE.rb2101', into ('SHFE', 'rb', '2101').
+    :param symbol: <str>. <exchange symbol>.<product symbol><delivery>.
+    :return: <tuple>. (exchange symbol, product symbol, delivery).
+    """
     exchange_symbol, temp = symbol.split('.')
-    if temp[1] in ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']:
-        product_symbol = temp[0]
-        delivery = temp[1:]
-    else:
-        product_symbol = temp[:2]
-        delivery = temp[2:]
-    return exchange_symbol, product_symbol, delivery
+    i: int = 0
+    while i < len(temp) and not temp[i].isdigit():
+        i += 1
+    return exchange_symbol, temp[:i], temp[i:]
+
+
+def expand_delivery(delivery: str, reference_year: int) -> str:
+    """
+    Expand the three digit delivery of CZCE, such as '101', to four digits, such as '2101', the year ending in the
+    first digit in [reference_year - 1, reference_year + 8].
+    :param delivery: <str>. three or four digits.
+    :param reference_year: <int>. the year traded, such as 2020.
+    :return: <str>. four digits.
+    """
+    if len(delivery) != 3:
+        return delivery
+    year: int = reference_year - 1 + (int(delivery[0]) - (reference_year - 1)) % 10
+    return f'{year % 100:02d}{delivery[1:]}'
+
+
+class SymbolTable(object):
+    """
+    The memo table of the symbols split, each distinct symbol split only once. Thread safe.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        # symbol: code, the row in <part_list>.
+        self.code_dict: Dict[str, int] = {}
+        self.part_list: List[Tuple[str, str, str]] = []
+        # The columns of <part_list>, built again when it grows.
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def get_codes(self, symbol_list: List[str]) -> np.ndarray:
+        """
+        Get the codes of the symbols, splitting the symbols new to the table.
+        :param symbol_list: the symbols.
+        :return: <np.ndarray>. the codes.
+        """
+        missing: set = set(symbol_list).difference(self.code_dict)
+        if missing:
+            with self.lock:
+                for symbol in sorted(missing):
+                    if symbol not in self.code_dict:
+                        self.part_list.append(split_symbol(symbol))
+                        self.code_dict[symbol] = len(self.part_list) - 1
+        return np.fromiter(map(self.code_dict.__getitem__, symbol_list), dtype=np.intp, count=len(symbol_list))
+
+    def get_columns(self, reference_year: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Get the columns of all the symbols in the table, indexed by the codes.
+        :param reference_year: <int>. expand the three digit deliveries of CZCE, default not.
+        :return: <dict>. the arrays <exchange>, <product> and <delivery>.
+        """
+        with self.lock:
+            if len(self.columns.get('exchange', ())) != len(self.part_list):
+                part_list: List[Tuple[str, ...]] = list(zip(*self.part_list)) or [(), (), ()]
+                self.columns = {
+                    field: np.array(part, dtype=np.str_)
+                    for field, part in zip(['exchange', 'product', 'delivery'], part_list)
+                }
+            columns: Dict[str, np.ndarray] = self.columns
+        if reference_year is not None:
+            columns = dict(columns)
+            columns['delivery'] = np.array(
+                [
+                    expand_delivery(delivery, reference_year) if exchange == 'CZCE' else delivery
+                    for exchange, delivery in zip(columns['exchange'].tolist(), columns['delivery'].tolist())
+                ],
+                dtype=np.str_
+            )
+        return columns
+
+
+symbol_table: SymbolTable = SymbolTable()
+
+
+def split_symbol_array(symbols: Any, reference_year: Optional[int] = None) -> Any:
+    """
+    Split many contract symbols at once. Each distinct symbol is split only once, and kept in the memo table, then
+    the columns are gathered by the codes of the symbols.
+    :param symbols: a sequence, an array or a <pandas.Series> of the symbols.
+    :param reference_year: <int>. expand the three digit deliveries of CZCE by <expand_delivery>, default not.
+    :return: <dict> of the arrays <exchange>, <product> and <delivery>, or <pandas.DataFrame> of the same columns
+        and the index of the Series given.
+    """
+    if hasattr(symbols, 'to_numpy'):
+        # pandas is imported only when a Series given.
+        import pandas as pd
+
+        series = pd.Series(symbols)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            code, unique = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            code, unique = pd.factorize(series)
+        table_code: np.ndarray = symbol_table.get_codes([str(symbol) for symbol in unique])
+        columns: Dict[str, np.ndarray] = symbol_table.get_columns(reference_year)
+        # Missing values, coded -1, split to ''.
+        return pd.DataFrame(
+            {field: np.append(column[table_code], '')[code] for field, column in columns.items()},
+            index=series.index
+        )
+
+    value: np.ndarray = np.asarray(symbols, dtype=np.str_)
+    code: np.ndarray = symbol_table.get_codes(value.reshape(-1).tolist())
+    columns: Dict[str, np.ndarray] = symbol_table.get_columns(reference_year)
+    return {field: column[code].reshape(value.shape) for field, column in columns.items()}
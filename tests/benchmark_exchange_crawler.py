@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+Benchmark the exchange crawlers offline, against the local stand-in server.
+
+For each exchange and crawl mode, measure:
+    days/s      days crawled and saved per second.
+    bytes/s     bytes served per second.
+    parse       parse time per day, of the object parser and the columnar parser, no network I/O.
+
+Usage, from the repository root or anywhere else:
+    python tests/benchmark_exchange_crawler.py --days 250 --latency 0.05 --output result.json
+    python tests/benchmark_exchange_crawler.py --baseline result.json
+A result slower than the baseline by more than <tolerance> is a regression, and the exit code is 1.
+"""
+
+
+from typing import Any, Dict, List
+from datetime import date, timedelta
+from pathlib import Path
+import argparse
+import tempfile
+import json
+import time
+import sys
+
+# Run as a script, the package and the stand-in server are imported from the repository.
+sys.path[:0] = [str(Path(__file__).resolve().parents[1]), str(Path(__file__).resolve().parent)]
+
+from FuturesWorkshop.collector import exchange_crawler
+from FuturesWorkshop.collector.exchange_crawler import get_crawling_days, crawl_futures_daily_data
+from FuturesWorkshop.collector.registry import get_exchange_plugin
+from FuturesWorkshop.collector.rate_limiter import RateLimiter
+
+from stand_in_server import StandInExchangeServer, make_synthetic_content
+
+
+EXCHANGE_LIST: List[str] = ['SHFE', 'INE', 'CFFEX']
+MODE_LIST: List[str] = ['sequential', 'async']
+
+
+def benchmark_parse(exchange: str, day_list: List[date]) -> Dict[str, float]:
+    """
+    Measure the parse time per day, in milliseconds.
+    """
+    content_list = [(day, make_synthetic_content(exchange, day)) for day in day_list]
+    result: Dict[str, float] = {}
+    plugin = get_exchange_plugin(exchange)
+    for name, parser in [('parse_ms', plugin.parse), ('parse_columns_ms', plugin.parse_columns)]:
+        begin = time.perf_counter()
+        for day, content in content_list:
+            parser(day, content)
+        result[name] = (time.perf_counter() - begin) * 1000 / len(content_list)
+    return result
+
+
+def benchmark_crawl(
+        server: StandInExchangeServer,
+        exchange: str,
+        mode: str,
+        begin: date,
+        end: date,
+        concurrency: int
+) -> Dict[str, float]:
+    """
+    Crawl into a temporary directory, and measure the throughput.
+    """
+    day_count: int = len(get_crawling_days(begin, end))
+    package_path: Path = exchange_crawler.PACKAGE_PATH
+    with tempfile.TemporaryDirectory() as temp_path:
+        exchange_crawler.PACKAGE_PATH = Path(temp_path)
+        try:
+            server.reset_stats()
+            begin_time = time.perf_counter()
+            crawl_futures_daily_data(exchange, begin, end, use_async=(mode == 'async'), concurrency=concurrency)
+            elapsed = time.perf_counter() - begin_time
+        finally:
+            exchange_crawler.PACKAGE_PATH = package_path
+    return {
+        'days': day_count,
+        'seconds': elapsed,
+        'days_per_second': day_count / elapsed,
+        'bytes_per_second': server.bytes_sent / elapsed,
+        'requests': server.request_count,
+        'errors': server.error_count,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    end: date = date(2021, 3, 31)
+    begin: date = end - timedelta(days=args.days - 1)
+    # Patched for the benchmark, restored after.
+    rate_limiter: RateLimiter = exchange_crawler.rate_limiter
+    daily_data_url: Dict[str, str] = dict(exchange_crawler.DAILY_DATA_URL)
+    if not args.rate_limited:
+        exchange_crawler.rate_limiter = RateLimiter(rate=1e9, burst=1e9, max_rate=1e9)
+
+    result: Dict[str, Dict[str, Any]] = {}
+    try:
+        with StandInExchangeServer(latency=args.latency, error_rate=args.error_rate) as server:
+            for exchange in EXCHANGE_LIST:
+                exchange_crawler.DAILY_DATA_URL[exchange] = server.get_daily_data_url()[exchange]
+            for exchange in EXCHANGE_LIST:
+                result[exchange] = benchmark_parse(exchange, get_crawling_days(begin, min(end, begin + timedelta(60))))
+                for mode in MODE_LIST:
+                    result[exchange][mode] = benchmark_crawl(server, exchange, mode, begin, end, args.concurrency)
+    finally:
+        exchange_crawler.rate_limiter = rate_limiter
+        exchange_crawler.DAILY_DATA_URL.clear()
+        exchange_crawler.DAILY_DATA_URL.update(daily_data_url)
+    return result
+
+
+def print_result(result: Dict[str, Dict[str, Any]]) -> None:
+    print(f'{"exchange":<8} {"mode":<12} {"days":>6} {"seconds":>8} {"days/s":>8} {"KiB/s":>10} {"errors":>6}')
+    for exchange, exchange_result in result.items():
+        for mode in MODE_LIST:
+            item = exchange_result[mode]
+            print(
+                f'{exchange:<8} {mode:<12} {item["days"]:>6} {item["seconds"]:>8.2f} '
+                f'{item["days_per_second"]:>8.1f} {item["bytes_per_second"] / 1024:>10.1f} {item["errors"]:>6}'
+            )
+        print(
+            f'{exchange:<8} {"parse":<12} {exchange_result["parse_ms"]:.2f} ms/day, '
+            f'columns {exchange_result["parse_columns_ms"]:.2f} ms/day'
+        )
+
+
+def compare(result: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    Compare with the baseline.
+    :return: <list>. the regressions.
+    """
+    regression_list: List[str] = []
+    for exchange, exchange_result in result.items():
+        if exchange not in baseline:
+            continue
+        for mode in MODE_LIST:
+            now = exchange_result[mode]['days_per_second']
+            before = baseline[exchange][mode]['days_per_second']
+            if now < before * (1 - tolerance):
+                regression_list.append(f'{exchange} {mode}: {now:.1f} days/s, was {before:.1f}')
+        for key in ['parse_ms', 'parse_columns_ms']:
+            now, before = exchange_result[key], baseline[exchange][key]
+            if now > before * (1 + tolerance):
+                regression_list.append(f'{exchange} {key}: {now:.2f} ms/day, was {before:.2f}')
+    return regression_list
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the exchange crawlers against the local stand-in server.')
+    parser.add_argument('--days', type=int, default=120, help='the number of calendar days to crawl.')
+    parser.add_argument('--latency', type=float, default=0.02, help='the latency of the server, in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='the probability of HTTP 503.')
+    parser.add_argument('--concurrency', type=int, default=8, help='the requests in flight in asyncio mode.')
+    parser.add_argument('--rate-limited', action='store_true', help='keep the adaptive rate limiter of the hosts.')
+    parser.add_argument('--output', type=Path, help='save the result in a json file.')
+    parser.add_argument('--baseline', type=Path, help='compare with the result in a json file.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='the slowdown allowed against the baseline.')
+    args = parser.parse_args()
+
+    result = run(args)
+    print_result(result)
+    if args.output is not None:
+        args.output.write_text(json.dumps(result, indent=2), encoding='utf-8')
+    if args.baseline is not None:
+        regression_list = compare(result, json.loads(args.baseline.read_text(encoding='utf-8')), args.tolerance)
+        for regression in regression_list:
+            print(f'Regression: {regression}')
+        return 1 if regression_list else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
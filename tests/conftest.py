@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+import pytest
+
+from typing import Dict, List, Set
+from datetime import datetime, date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import json
+
+from stand_in_server import StandInExchangeServer
+
+
+def make_kx_content(day: date) -> bytes:
+    """
+    Make a synthetic kx*.dat file, as SHFE and INE respond.
+    """
+    row_list: List[Dict[str, str]] = []
+    for product, delivery in [('rb_f', '2105'), ('rb_f', '2110'), ('rb_f', '小计'), ('sc_f', '2105'), ('总计', '')]:
+        row_list.append(
+            {
+                'PRODUCTID': product,
+                'DELIVERYMONTH': delivery,
+                'OPENPRICE': 4000,
+                'HIGHESTPRICE': 4100,
+                'LOWESTPRICE': 3900,
+                'CLOSEPRICE': 4050,
+                'SETTLEMENTPRICE': 4020,
+                'VOLUME': day.day,
+                'OPENINTEREST': 100,
+            }
+        )
+    return json.dumps({'o_curinstrument': row_list}).encode('utf-8')
+
+
+class KxRequestHandler(BaseHTTPRequestHandler):
+    path_list: List[str] = []
+    # The days responded with a broken file.
+    broken_day_set: Set[date] = set()
+    # The days responded with HTTP 404.
+    missing_day_set: Set[date] = set()
+
+    def do_GET(self):
+        self.path_list.append(self.path)
+        day = datetime.strptime(self.path[-12:-4], '%Y%m%d').date()
+        if day in self.missing_day_set:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content = make_kx_content(day) if day not in self.broken_day_set else b'{'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def kx_server():
+    KxRequestHandler.path_list = []
+    KxRequestHandler.broken_day_set = set()
+    KxRequestHandler.missing_day_set = set()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KxRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stand_in_server():
+    with StandInExchangeServer() as server:
+        yield server
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+"""
+A local stand-in of the exchange sites, for testing and benchmarking the crawlers offline.
+
+It serves, for any date:
+    /SHFE/data/dailydata/kx/kx<%Y%m%d>.dat      SHFE kx json
+    /INE/data/dailydata/kx/kx<%Y%m%d>.dat       INE kx json
+    /CFFEX/sj/hqsj/rtj/<%Y%m>/<%d>/index.xml    CFFEX xml
+The responses are recorded ones, from a <RawArchive>, or synthetic ones. Weekends are 404, as the exchanges.
+A latency and a rate of errors can be injected, both can be changed while running.
+"""
+
+
+from typing import Callable, Dict, List, Optional
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import random
+import json
+import re
+import time
+
+from FuturesWorkshop.collector.archive import RawArchive
+
+
+# (product, number of deliveries, price level) of the synthetic data.
+SYNTHETIC_PRODUCT: Dict[str, List[tuple]] = {
+    'SHFE': [
+        ('cu', 12, 68000), ('al', 12, 18000), ('zn', 12, 22000), ('pb', 12, 15000), ('ni', 12, 130000),
+        ('sn', 12, 200000), ('au', 12, 380), ('ag', 12, 5000), ('rb', 12, 4500), ('wr', 12, 4800),
+        ('hc', 12, 4800), ('ss', 12, 14000), ('fu', 12, 2500), ('bu', 12, 3000), ('ru', 12, 13000),
+        ('sp', 12, 6000),
+        # The INE products are listed in the SHFE kx*.dat file too.
+        ('sc', 12, 400),
+    ],
+    'INE': [('sc', 12, 400), ('nr', 12, 11000), ('lu', 12, 3000), ('bc', 12, 60000)],
+    'CFFEX': [('IF', 4, 5000), ('IC', 4, 6500), ('IH', 4, 3400), ('TS', 3, 100), ('TF', 3, 100), ('T', 3, 100)],
+}
+
+URL_PATTERN: Dict[str, re.Pattern] = {
+    'SHFE': re.compile(r'^/SHFE/data/dailydata/kx/kx(\d{8})\.dat$'),
+    'INE': re.compile(r'^/INE/data/dailydata/kx/kx(\d{8})\.dat$'),
+    'CFFEX': re.compile(r'^/CFFEX/sj/hqsj/rtj/(\d{6})/(\d{2})/index\.xml$'),
+}
+
+
+def get_deliveries(day: date, count: int) -> List[str]:
+    result: List[str] = []
+    year, month = day.year, day.month
+    for _ in range(count):
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+        result.append(f'{year % 100:02d}{month:02d}')
+    return result
+
+
+def make_synthetic_kx_content(exchange: str, day: date) -> bytes:
+    """
+    Make a synthetic kx*.dat file, as SHFE and INE respond, the same for the same day.
+    :param exchange: <str>. 'SHFE' or 'INE'.
+    :param day: <datetime.date>.
+    :return: <bytes>.
+    """
+    rng = random.Random(f'{exchange}{day.isoformat()}')
+    row_list: List[Dict] = []
+    for product, count, price in SYNTHETIC_PRODUCT[exchange]:
+        for delivery in get_deliveries(day, count) + ['小计']:
+            close = round(price * rng.uniform(0.95, 1.05))
+            row_list.append(
+                {
+                    'PRODUCTID': f'{product}_f',
+                    'PRODUCTGROUPID': product,
+                    'PRODUCTSORTNO': 10,
+                    'PRODUCTNAME': product,
+                    'DELIVERYMONTH': delivery,
+                    'PRESETTLEMENTPRICE': price,
+                    'OPENPRICE': round(close * rng.uniform(0.98, 1.02)),
+                    'HIGHESTPRICE': round(close * 1.02),
+                    'LOWESTPRICE': round(close * 0.98),
+                    'CLOSEPRICE': close,
+                    'SETTLEMENTPRICE': close,
+                    'ZD1_CHG': close - price,
+                    'ZD2_CHG': close - price,
+                    'VOLUME': rng.randrange(0, 500000),
+                    'OPENINTEREST': rng.randrange(0, 300000),
+                    'OPENINTERESTCHG': rng.randrange(-5000, 5000),
+                    'ORDERNO': 0,
+                    'ORDERNO2': 0,
+                }
+            )
+    total_row: Dict = {key: '' for key in row_list[0].keys()}
+    total_row['PRODUCTID'] = '总计'
+    row_list.append(total_row)
+    return json.dumps(
+        {'o_curinstrument': row_list, 'report_date': day.strftime('%Y%m%d')}, ensure_ascii=False
+    ).encode('utf-8')
+
+
+def make_synthetic_cffex_content(day: date) -> bytes:
+    """
+    Make a synthetic index.xml file, as CFFEX responds, the same for the same day.
+    :param day: <datetime.date>.
+    :return: <bytes>.
+    """
+    rng = random.Random(f'CFFEX{day.isoformat()}')
+    part_list: List[str] = ['<?xml version="1.0" encoding="utf-8"?>\n<dailydatas>\n']
+    for product, count, price in SYNTHETIC_PRODUCT['CFFEX']:
+        for delivery in get_deliveries(day, count):
+            close = round(price * rng.uniform(0.95, 1.05), 1)
+            instrument_list: List[str] = [f'{product}{delivery}']
+            if product == 'IF':
+                # The options, skipped by the parser.
+                instrument_list.extend(f'IO{delivery}-C-{strike}' for strike in range(4000, 6000, 100))
+            for instrument_id in instrument_list:
+                part_list.append(
+                    f'<dailydata>\n'
+                    f'<instrumentid>{instrument_id}</instrumentid>\n'
+                    f'<tradingday>{day.strftime("%Y%m%d")}</tradingday>\n'
+                    f'<openprice>{close}</openprice>\n'
+                    f'<highestprice>{round(close * 1.02, 1)}</highestprice>\n'
+                    f'<lowestprice>{round(close * 0.98, 1)}</lowestprice>\n'
+                    f'<closeprice>{close}</closeprice>\n'
+                    f'<preopeninterest>{rng.randrange(0, 200000)}.0</preopeninterest>\n'
+                    f'<openinterest>{rng.randrange(0, 200000)}.0</openinterest>\n'
+                    f'<presettlementprice>{price}</presettlementprice>\n'
+                    f'<settlementpriceif>{close}</settlementpriceif>\n'
+                    f'<settlementprice>{close}</settlementprice>\n'
+                    f'<volume>{rng.randrange(0, 200000)}</volume>\n'
+                    f'<turnover>{rng.randrange(0, 10 ** 9)}.0</turnover>\n'
+                    f'<productid>{"IO" if "-" in instrument_id else product}</productid>\n'
+                    f'<delta/>\n'
+                    f'<expiredate>20{delivery}16</expiredate>\n'
+                    f'</dailydata>\n'
+                )
+    part_list.append('</dailydatas>\n')
+    return ''.join(part_list).encode('utf-8')
+
+
+def make_synthetic_content(exchange: str, day: date) -> bytes:
+    if exchange == 'CFFEX':
+        return make_synthetic_cffex_content(day)
+    return make_synthetic_kx_content(exchange, day)
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are sent apart, do not let Nagle hold the body for a delayed ACK.
+    disable_nagle_algorithm = True
+    server: 'StandInHTTPServer'
+
+    def do_GET(self):
+        stand_in: StandInExchangeServer = self.server.stand_in
+        exchange, day = self.parse_path()
+        status, content = stand_in.respond(exchange, day)
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def parse_path(self) -> tuple:
+        for exchange, pattern in URL_PATTERN.items():
+            matched = pattern.match(self.path)
+            if matched is not None:
+                return exchange, datetime.strptime(''.join(matched.groups()), '%Y%m%d').date()
+        return None, None
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept a burst of concurrent connections, a full backlog drops the SYN and costs a 1 second retry.
+    request_queue_size = 128
+    stand_in: 'StandInExchangeServer'
+
+
+class StandInExchangeServer(object):
+    """
+    The local stand-in of the exchange sites, run in a background thread.
+    """
+    def __init__(self,
+                 latency: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 archive: Optional[RawArchive] = None,
+                 content_factory: Callable[[str, date], bytes] = make_synthetic_content,
+                 seed: int = 0,
+                 ):
+        """
+        :param latency: <float>. the delay before each response, in seconds.
+        :param error_rate: <float>. the probability of responding <error_status> instead.
+        :param error_status: <int>. the HTTP status of the injected errors.
+        :param archive: <RawArchive>. if given, the recorded responses in it served, if any for the day.
+        :param content_factory: <Callable>. make the response of (exchange, day), if not recorded.
+        :param seed: <int>. the seed of the injected errors.
+        """
+        self.latency: float = latency
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.archive: Optional[RawArchive] = archive
+        self.content_factory: Callable[[str, date], bytes] = content_factory
+
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.request_count: int = 0
+        self.error_count: int = 0
+        self.bytes_sent: int = 0
+
+        self.http_server: Optional[StandInHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def respond(self, exchange: Optional[str], day: Optional[date]) -> tuple:
+        """
+        Make the response to a request.
+        :param exchange: <str>. None if the path unknown.
+        :param day: <datetime.date>.
+        :return: <tuple>. (HTTP status, content)
+        """
+        with self.lock:
+            self.request_count += 1
+            injected_error: bool = self.random.random() < self.error_rate
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        if injected_error:
+            status, content = self.error_status, b''
+        elif exchange is None or day.weekday() >= 5:
+            status, content = 404, b''
+        else:
+            content = self.archive.get(exchange, day) if self.archive is not None else None
+            if content is None:
+                content = self.content_factory(exchange, day)
+            status = 200
+
+        with self.lock:
+            self.error_count += injected_error
+            self.bytes_sent += len(content)
+        return status, content
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.http_server.server_port}'
+
+    def get_daily_data_url(self) -> Dict[str, str]:
+        """
+        Get the urls to patch <exchange_crawler.DAILY_DATA_URL> with.
+        :return: <dict>.
+        """
+        return {
+            'SHFE': f'{self.url}/SHFE/data/dailydata/kx/kx{{day}}.dat',
+            'INE': f'{self.url}/INE/data/dailydata/kx/kx{{day}}.dat',
+            'CFFEX': f'{self.url}/CFFEX/sj/hqsj/rtj/{{day}}/index.xml',
+        }
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.request_count = 0
+            self.error_count = 0
+            self.bytes_sent = 0
+
+    def start(self) -> 'StandInExchangeServer':
+        self.http_server = StandInHTTPServer(('127.0.0.1', 0), StandInRequestHandler)
+        self.http_server.stand_in = self
+        self.thread = threading.Thread(target=self.http_server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+            self.http_server = None
+
+    def __enter__(self) -> 'StandInExchangeServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
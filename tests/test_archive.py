@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from FuturesWorkshop.collector.archive import RawArchive, get_digest
+
+
+def test_raw_archive(tmp_path):
+    archive = RawArchive(tmp_path)
+    content_1: bytes = b'{"o_curinstrument": [1]}'
+    content_2: bytes = b'{"o_curinstrument": [2]}'
+
+    assert archive.get('SHFE', date(2021, 4, 1)) is None
+    assert archive.has('SHFE', date(2021, 4, 1)) is False
+
+    digest = archive.put('SHFE', date(2021, 4, 1), content_1)
+    assert digest == get_digest(content_1)
+    assert archive.get_object_path(digest).exists()
+    archive.put('SHFE', date(2021, 4, 2), content_1)
+    archive.put('INE', date(2021, 4, 1), content_2)
+
+    # Identical bodies share one object.
+    assert len(list(tmp_path.joinpath('objects').glob('*/*.gz'))) == 2
+
+    # Archive a day again, the last one wins.
+    archive.put('SHFE', date(2021, 4, 2), content_2)
+
+    reopened = RawArchive(tmp_path)
+    assert reopened.get('SHFE', date(2021, 4, 1)) == content_1
+    assert reopened.get('SHFE', date(2021, 4, 2)) == content_2
+    assert reopened.get('INE', date(2021, 4, 1)) == content_2
+    assert reopened.get_day_list('SHFE') == [date(2021, 4, 1), date(2021, 4, 2)]
+    assert reopened.get_day_list('SHFE', begin=date(2021, 4, 2)) == [date(2021, 4, 2)]
+    assert reopened.get_day_list('SHFE', end=date(2021, 3, 31)) == []
+
+
+def test_raw_archive_concurrent_put(tmp_path, monkeypatch):
+    # A directory always seen missing, as if made by another thread just after checked.
+    exists = Path.exists
+    monkeypatch.setattr(Path, 'exists', lambda self: False if self.is_dir() else exists(self))
+    archive = RawArchive(tmp_path)
+    day_list = [date(2001, 1, 1) + timedelta(days=i) for i in range(256)]
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        digest_list = list(
+            executor.map(lambda day: archive.put('SHFE', day, f'{{"day": "{day}"}}'.encode('utf-8')), day_list)
+        )
+    assert len(set(digest_list)) == len(day_list)
+    reopened = RawArchive(tmp_path)
+    assert reopened.get_day_list('SHFE') == day_list
+    for day in day_list:
+        assert reopened.get('SHFE', day) == f'{{"day": "{day}"}}'.encode('utf-8')
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date
+import shutil
+import os
+
+import numpy as np
+
+from FuturesWorkshop.config import PACKAGE_PATH
+from FuturesWorkshop.storage import FrameCache, DailyLoader
+
+
+def test_frame_cache(tmp_path):
+    file_list = []
+    for i in range(3):
+        file = tmp_path.joinpath(f'{i}.csv')
+        file.write_text(str(i))
+        file_list.append(file)
+    load_count = {'n': 0}
+
+    def make_loader(size: int):
+        def loader():
+            load_count['n'] += 1
+            return {'a': np.zeros(size, dtype=np.uint8)}
+        return loader
+
+    cache = FrameCache(max_bytes=250)
+    assert cache.get_or_load(file_list[0], 'all', make_loader(100))['a'].nbytes == 100
+    cache.get_or_load(file_list[0], 'all', make_loader(100))
+    cache.get_or_load(file_list[1], 'all', make_loader(100))
+    assert load_count['n'] == 2
+    assert cache.get_stats()['bytes'] == 200
+
+    # The least recently used evicted.
+    cache.get_or_load(file_list[0], 'all', make_loader(100))
+    cache.get_or_load(file_list[2], 'all', make_loader(100))
+    stats = cache.get_stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (2, 200, 1)
+    assert (stats['hits'], stats['misses']) == (2, 3)
+    cache.get_or_load(file_list[0], 'all', make_loader(100))
+    assert load_count['n'] == 3
+    cache.get_or_load(file_list[1], 'all', make_loader(100))
+    assert load_count['n'] == 4
+
+    # The file changed, the old entries dropped.
+    file_list[0].write_text('changed')
+    os.utime(file_list[0], ns=(0, file_list[0].stat().st_mtime_ns + 10 ** 9))
+    cache.get_or_load(file_list[0], 'all', make_loader(10))
+    assert load_count['n'] == 5
+    assert cache.get_stats()['entries'] == 2
+
+    # Too large to cache.
+    cache.get_or_load(file_list[2], 'big', make_loader(1000))
+    cache.get_or_load(file_list[2], 'big', make_loader(1000))
+    assert load_count['n'] == 7
+
+    cache.set_max_bytes(50)
+    assert cache.get_stats()['bytes'] == 10
+    cache.discard(file_list[0])
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_daily_loader_cached(tmp_path):
+    csv_path = tmp_path.joinpath('SHFE', 'daily')
+    csv_path.mkdir(parents=True)
+    csv_file = shutil.copy(PACKAGE_PATH.joinpath('data', 'SHFE', 'daily', 'au.csv'), csv_path)
+    cache = FrameCache()
+    loader = DailyLoader(tmp_path, cache)
+
+    columns = loader.load('au', date(2020, 1, 1), date(2020, 12, 31), ['2012'])
+    assert loader.load('au', date(2020, 1, 1), date(2020, 12, 31), ['2012']) is columns
+    assert columns['close'].flags.writeable is False
+    # Copied out of the mapping, and charged so.
+    sliced = loader.load('au', date(2020, 1, 1), date(2020, 12, 31), fields=['date', 'close'])
+    assert all(column.base is None and not column.flags.writeable for column in sliced.values())
+    assert loader.load('au', date(2020, 1, 1), date(2020, 12, 31), fields=['date', 'close']) is sliced
+    assert cache.get_stats()['bytes'] == sum(column.nbytes for column in [*columns.values(), *sliced.values()])
+    df = loader.load_frame('au', date(2020, 1, 1), date(2020, 12, 31))
+    assert loader.load_frame('au', date(2020, 1, 1), date(2020, 12, 31)) is df
+    assert (cache.get_stats()['hits'], cache.get_stats()['misses']) == (3, 3)
+
+    # Crawled again, converted and loaded again.
+    with open(csv_file, mode='a', encoding='utf-8', newline='') as f:
+        f.write('au,2112,2099-01-05,1,2,0.5,1.5,1.2,10,100\n')
+    os.utime(csv_file, ns=(0, os.stat(csv_file).st_mtime_ns + 10 ** 9))
+    columns = loader.load('au', date(2099, 1, 1))
+    assert columns['delivery'].tolist() == ['2112']
+    assert cache.get_stats()['entries'] == 1
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from typing import List
+from datetime import date
+import shutil
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from FuturesWorkshop.config import PACKAGE_PATH
+from FuturesWorkshop.storage import ColumnStore, ColumnFileError, read_column_file, write_column_file
+from FuturesWorkshop.storage.column_store import read_column_header, read_csv_columns
+
+
+def read_csv(csv_file) -> List[List[str]]:
+    with open(csv_file, mode='r', encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_column_store(tmp_path):
+    exchange_path = tmp_path.joinpath('SHFE')
+    exchange_path.joinpath('daily').mkdir(parents=True)
+    for product in ['ag', 'cu']:
+        shutil.copy(PACKAGE_PATH.joinpath('data', 'SHFE', 'daily', f'{product}.csv'), exchange_path.joinpath('daily'))
+
+    store = ColumnStore(exchange_path)
+    assert store.is_stale('ag') is True
+    assert store.convert_all() == ['ag', 'cu']
+    assert store.get_products() == ['ag', 'cu']
+    assert store.is_stale('ag') is False
+    assert store.convert_all() == []
+
+    columns = store.load('ag')
+    expected = read_csv_columns(exchange_path.joinpath('daily', 'ag.csv'))
+    assert len(columns['date']) == len(expected['date']) > 0
+    for field, column in columns.items():
+        assert isinstance(column.base, np.memmap)
+        assert column.flags.writeable is False
+        np.testing.assert_array_equal(column, expected[field])
+    assert columns['date'].dtype == np.dtype('datetime64[D]')
+    assert columns['date'][0] == np.datetime64('2012-05-10')
+
+    assert list(store.load('ag', ['date', 'close']).keys()) == ['date', 'close']
+
+    # Exported, the same as the csv file converted from.
+    csv_file = store.export_csv('ag', tmp_path.joinpath('ag.csv'))
+    assert read_csv(csv_file) == read_csv(exchange_path.joinpath('daily', 'ag.csv'))
+
+    # The csv file changed.
+    csv_file = exchange_path.joinpath('daily', 'cu.csv')
+    with open(csv_file, mode='a', encoding='utf-8', newline='') as f:
+        f.write('cu,9912,2099-01-05,1,2,0.5,1.5,,10,100\r\n')
+    os.utime(csv_file, ns=(csv_file.stat().st_atime_ns, csv_file.stat().st_mtime_ns + 10 ** 9))
+    assert store.is_stale('cu') is True
+    assert store.convert_all() == ['cu']
+    columns = store.load('cu', ['delivery', 'settlement'])
+    assert columns['delivery'][-1] == '9912'
+    assert np.isnan(columns['settlement'][-1])
+
+
+def test_column_file(tmp_path):
+    column_file = tmp_path.joinpath('rb.col')
+    columns = {
+        'product': np.array(['rb', 'rb', 'rb']),
+        'delivery': np.array(['2110', '2105', '2105']),
+        'date': np.array(['2021-03-01', '2021-03-01', '2021-02-26'], dtype='datetime64[D]'),
+    }
+    for field in ['open', 'high', 'low', 'close', 'settlement', 'volume', 'open_interest']:
+        columns[field] = np.array([1.0, 2.0, 3.0])
+    write_column_file(column_file, 'rb', columns)
+
+    header = read_column_header(column_file)
+    assert (header['product'], header['rows'], header['source']) == ('rb', 3, None)
+    assert all(item['offset'] % 64 == 0 for item in header['columns'])
+
+    # Sorted by (date, delivery).
+    result = read_column_file(column_file)
+    assert result['date'].tolist() == [date(2021, 2, 26), date(2021, 3, 1), date(2021, 3, 1)]
+    assert result['delivery'].tolist() == ['2105', '2105', '2110']
+    assert result['close'].tolist() == [3.0, 2.0, 1.0]
+
+    write_column_file(column_file, 'rb', {field: column[:0] for field, column in columns.items()})
+    assert len(read_column_file(column_file)['date']) == 0
+
+    column_file.write_bytes(b'product,delivery\n')
+    with pytest.raises(ColumnFileError):
+        read_column_file(column_file)
+
+
+def test_column_store_blank_line(tmp_path):
+    exchange_path = tmp_path.joinpath('SHFE')
+    csv_file = exchange_path.joinpath('daily', 'ag.csv')
+    csv_file.parent.mkdir(parents=True)
+    csv_file.write_text(
+        'product,delivery,date,open,high,low,close,settlement,volume,open_interest\n'
+        'ag,2112,2021-01-04,1,2,0.5,1.5,1.2,10,100\n'
+        '\n'
+        'ag,2112,2021-01-05,1,2,0.5,1.5,1.2,10,100\n'
+        '\n',
+        encoding='utf-8'
+    )
+    assert read_csv_columns(csv_file)['date'].tolist() == [date(2021, 1, 4), date(2021, 1, 5)]
+
+    store = ColumnStore(exchange_path)
+    store.convert('ag')
+    assert store.is_stale('ag') is False
+    assert len(store.load('ag')['date']) == 2
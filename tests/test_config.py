@@ -6,7 +6,7 @@ __author__ = 'Bruce Frank Wong'
 """
 Unit test from FuturesWorkshop.config module, with PyTest.
 
-The variable CONFIGS, or the return of load_config(), is an instance of dict.
+The return of load_config() is an instance of dict, and the variable CONFIGS is used as a dict.
 See <config.py> for more details.
 """
 
@@ -15,14 +15,26 @@ from typing import Any, Dict, List
 from pathlib import Path
 import os
 from datetime import datetime, date, time
+import shutil
+import pickle
+import json
+import copy
+import math
+
+import pytest
 
 from FuturesWorkshop.config import (
     PACKAGE_PATH,
     CONFIGS,
+    LazyConfigs,
+    CSV_SCHEMAS,
     load_csv,
     save_csv,
-    load_config
+    load_config,
+    load_config_snapshot,
+    get_config_stamp,
 )
+from FuturesWorkshop import config
 
 
 def test_package_path():
@@ -54,6 +66,51 @@ def test_load_csv():
                 ) is True
 
 
+def test_load_csv_schema(tmp_path):
+    file: Path = tmp_path.joinpath('rb.csv')
+    file.write_text(
+        'product,delivery,date,open,high,low,close,settlement,volume,open_interest,note\n'
+        'rb,0909,2009-03-27,3550,3663,3513,3561,,354590,45548,IF-2101\n',
+        encoding='utf-8'
+    )
+    row = load_csv(file, 'daily')[0]
+    assert row['delivery'] == '0909' and row['date'] == date(2009, 3, 27)
+    assert row['open'] == 3550.0 and math.isnan(row['settlement'])
+    # Not declared, kept as str.
+    assert row['note'] == 'IF-2101'
+
+    columns = load_csv(file, CSV_SCHEMAS['daily'], columnar=True)
+    assert list(columns.keys())[:3] == ['product', 'delivery', 'date']
+    assert columns['volume'] == [354590.0]
+    # Guessed.
+    assert load_csv(file)[0]['delivery'] == 909
+
+    file.write_text('symbol,name\n', encoding='utf-8')
+    assert load_csv(file, 'exchange') == []
+    assert load_csv(file, 'exchange', columnar=True) == {'symbol': [], 'name': []}
+
+    # Blank lines skipped, short rows padded, long rows rejected.
+    file.write_text(
+        'region,begin,end,name,url\n'
+        'CHN,2021-01-01,2021-01-03,元旦,\n'
+        '\n'
+        'CHN,2021-02-11,2021-02-17,春节\n'
+        '\n',
+        encoding='utf-8'
+    )
+    result = load_csv(file, 'holiday')
+    assert [row['begin'] for row in result] == [date(2021, 1, 1), date(2021, 2, 11)]
+    assert result[1]['url'] == ''
+    assert len(load_csv(file)) == 2
+    assert load_csv(file, 'holiday', columnar=True)['name'] == ['元旦', '春节']
+    file.write_text('symbol,name\nSHFE,上海期货交易所,x\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_csv(file, 'exchange')
+
+    holiday = load_csv(PACKAGE_PATH.joinpath('data', 'basic', 'holiday.csv'), 'holiday')
+    assert load_csv(PACKAGE_PATH.joinpath('data', 'basic', 'holiday.csv')) == holiday
+
+
 def test_save_csv():
     file: Path = Path.cwd().joinpath('test_save_csv.csv')
     assert file.exists() is False
@@ -250,3 +307,77 @@ def test_trading_time():
             assert trading_time_list[2]['close'] == time(hour=11, minute=30)
             assert trading_time_list[3]['open'] == time(hour=13, minute=30)
             assert trading_time_list[3]['close'] == time(hour=15, minute=0)
+
+
+def test_lazy_configs():
+    load_count = {'n': 0}
+
+    def loader():
+        load_count['n'] += 1
+        return {'product': {'info': []}}
+
+    configs = LazyConfigs(loader)
+    assert configs.loaded is False and load_count['n'] == 0
+    assert configs['product'] == {'info': []}
+    assert len(configs) == 1 and 'product' in configs
+    assert load_count['n'] == 1
+
+    # Deep copied as a dict, and restored by update.
+    backup = copy.deepcopy(configs)
+    assert type(backup) is dict and backup == dict(configs)
+    configs['product']['info'].append('rb')
+    configs.update(backup)
+    assert configs['product'] == {'info': []}
+
+    configs.reload()
+    assert configs.loaded is False
+    assert dict(configs) == {'product': {'info': []}}
+    assert load_count['n'] == 2
+
+
+def test_load_config_snapshot(tmp_path):
+    snapshot_file = tmp_path.joinpath('configs.snapshot')
+    configs = load_config_snapshot(snapshot_file)
+    assert configs == load_config()
+    assert snapshot_file.exists()
+
+    # The snapshot used while the config files not changed.
+    with open(snapshot_file, mode='rb') as f:
+        snapshot = pickle.load(f)
+    assert 'user' not in snapshot['stamp']
+    assert 'tq_account' not in snapshot['configs'] and 'trading_account' not in snapshot['configs']
+    snapshot['configs'] = {'from': 'snapshot'}
+    with open(snapshot_file, mode='wb') as f:
+        pickle.dump(snapshot, f)
+    assert load_config_snapshot(snapshot_file) == {
+        'from': 'snapshot', 'tq_account': configs['tq_account'], 'trading_account': configs['trading_account']
+    }
+
+    # Stale or broken, loaded from the config files again.
+    snapshot['stamp']['holiday'][0] -= 1
+    with open(snapshot_file, mode='wb') as f:
+        pickle.dump(snapshot, f)
+    assert load_config_snapshot(snapshot_file) == configs
+    snapshot_file.write_bytes(b'broken')
+    assert load_config_snapshot(snapshot_file) == configs
+    assert CONFIGS['product'] == configs['product']
+
+
+def test_load_config_without_user_file(tmp_path, monkeypatch):
+    shutil.copytree(PACKAGE_PATH.joinpath('data', 'basic'), tmp_path.joinpath('data', 'basic'))
+    tmp_path.joinpath('settings').mkdir()
+    shutil.copy(PACKAGE_PATH.joinpath('settings', 'stop_loss.csv'), tmp_path.joinpath('settings'))
+    monkeypatch.setattr(config, 'PACKAGE_PATH', tmp_path)
+
+    configs = load_config()
+    assert configs['tq_account'] == {'account': '', 'password': ''}
+    assert configs['trading_account'] == {'broker': '', 'account': '', 'password': ''}
+    assert 'user' not in get_config_stamp()
+    assert load_config_snapshot(tmp_path.joinpath('configs.snapshot')) == configs
+
+    # Created, loaded with the snapshot, but kept out of it.
+    user = {'tq_account': {'account': 'a', 'password': 'secret'}, 'trading_account': configs['trading_account']}
+    tmp_path.joinpath('settings', 'user.json').write_text(json.dumps(user), encoding='utf-8')
+    configs = load_config_snapshot(tmp_path.joinpath('configs.snapshot'))
+    assert configs['tq_account'] == {'account': 'a', 'password': 'secret'}
+    assert b'secret' not in tmp_path.joinpath('configs.snapshot').read_bytes()
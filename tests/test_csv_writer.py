@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from typing import Dict, List
+from datetime import date
+import csv
+
+from FuturesWorkshop.collector.csv_writer import BufferedCsvWriter, upsert_csv_file
+from FuturesWorkshop.collector.stored_day_index import StoredDayIndex
+from FuturesWorkshop.definition import FuturesDailyData
+
+
+def make_data(day: date, product: str, delivery_list: List[str]) -> Dict[str, List[FuturesDailyData]]:
+    return {
+        product: [
+            FuturesDailyData(product, delivery, day, 1.0, 2.0, 0.5, 1.5, 1.2, 10, 100)
+            for delivery in delivery_list
+        ]
+    }
+
+
+def read_csv(csv_file) -> List[Dict[str, str]]:
+    with open(csv_file, mode='r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_buffered_csv_writer(tmp_path):
+    csv_path = tmp_path.joinpath('SHFE', 'daily')
+    index = StoredDayIndex(tmp_path.joinpath('SHFE'))
+    with BufferedCsvWriter(csv_path, max_buffered_rows=5, index=index) as writer:
+        writer.add(make_data(date(2021, 3, 1), 'rb', ['2105', '2110']), date(2021, 3, 1))
+        writer.add(make_data(date(2021, 3, 1), 'cu', ['2104']), date(2021, 3, 1))
+        # Nothing written before the budget reached.
+        assert not csv_path.joinpath('rb.csv').exists()
+        assert index.load() == set()
+
+        writer.add(make_data(date(2021, 3, 2), 'rb', ['2105', '2110']), date(2021, 3, 2))
+        assert len(read_csv(csv_path.joinpath('rb.csv'))) == 4
+        assert index.load() == {date(2021, 3, 1), date(2021, 3, 2)}
+
+        writer.add(make_data(date(2021, 3, 3), 'rb', ['2105']), date(2021, 3, 3))
+        writer.add({}, date(2021, 3, 4))
+        # Today without data, may be published later.
+        writer.add({}, date.today())
+
+    row_list = read_csv(csv_path.joinpath('rb.csv'))
+    assert [row['date'] for row in row_list] == ['2021-03-01'] * 2 + ['2021-03-02'] * 2 + ['2021-03-03']
+    assert row_list[0] == {
+        'product': 'rb',
+        'delivery': '2105',
+        'date': '2021-03-01',
+        'open': '1.0',
+        'high': '2.0',
+        'low': '0.5',
+        'close': '1.5',
+        'settlement': '1.2',
+        'volume': '10',
+        'open_interest': '100',
+    }
+    assert len(read_csv(csv_path.joinpath('cu.csv'))) == 1
+    assert list(csv_path.glob('*.tmp')) == []
+    # The days without data marked too.
+    assert StoredDayIndex(tmp_path.joinpath('SHFE')).load() == {
+        date(2021, 3, 1), date(2021, 3, 2), date(2021, 3, 3), date(2021, 3, 4)
+    }
+
+
+def test_upsert_csv_file(tmp_path):
+    csv_file = tmp_path.joinpath('rb.csv')
+    upsert_csv_file(
+        csv_file,
+        [
+            ['rb', '2105', date(2021, 3, 2), 1, 1, 1, 1, 1, 20, 200],
+            ['rb', '2105', date(2021, 3, 1), 1, 1, 1, 1, 1, 10, 100],
+            ['rb', '2110', date(2021, 3, 1), 1, 1, 1, 1, 1, 10, 100],
+        ]
+    )
+    upsert_csv_file(
+        csv_file,
+        [
+            ['rb', '2110', date(2021, 3, 1), 1, 1, 1, 1, 1, 11, 101],
+            ['rb', '2110', date(2021, 3, 2), 1, 1, 1, 1, 1, 21, 201],
+            ['rb', '2105', date(2021, 3, 3), 1, 1, 1, 1, 1, 30, 300],
+        ]
+    )
+    row_list = read_csv(csv_file)
+    assert [(row['date'], row['delivery'], row['volume']) for row in row_list] == [
+        ('2021-03-01', '2105', '10'),
+        ('2021-03-01', '2110', '11'),
+        ('2021-03-02', '2105', '20'),
+        ('2021-03-02', '2110', '21'),
+        ('2021-03-03', '2105', '30'),
+    ]
+
+
+def test_upsert_csv_file_repair(tmp_path):
+    csv_file = tmp_path.joinpath('sc.csv')
+    csv_file.write_text(
+        'product,delivery,date,open,high,low,close,settlement,volume,open_interest\n'
+        'sc,2105,2021-03-02,1,1,1,1,1,20,200\n'
+        'sc,2105,2021-03-01,1,1,1,1,1,10,100\n'
+        'sc,2105,2021-03-02,1,1,1,1,1,22,200\n',
+        encoding='utf-8'
+    )
+    upsert_csv_file(csv_file, [['sc', '2106', date(2021, 3, 1), 1, 1, 1, 1, 1, 5, 50]])
+    row_list = read_csv(csv_file)
+    assert [(row['date'], row['delivery'], row['volume']) for row in row_list] == [
+        ('2021-03-01', '2105', '10'),
+        ('2021-03-01', '2106', '5'),
+        ('2021-03-02', '2105', '22'),
+    ]
+    assert list(tmp_path.glob('*.tmp')) == []
@@ -7,15 +7,25 @@ import pytest
 
 from typing import Dict, List
 from datetime import date, timedelta
+import csv
+import json
+import sqlite3
 
+from FuturesWorkshop.collector import exchange_crawler
 from FuturesWorkshop.collector.exchange_crawler import (
     check_date,
     crawl_shfe_futures_daily_data,
     crawl_ine_futures_daily_data,
     crawl_cffex_futures_daily_data,
+    parse_shfe_futures_daily_data,
+    crawl_futures_daily_data,
+    parse_archived_futures_daily_data,
 )
+from FuturesWorkshop.collector.archive import RawArchive
 from FuturesWorkshop.definition import FuturesDailyData
 
+from conftest import make_kx_content, KxRequestHandler
+
 
 @pytest.fixture
 def exchange_list() -> List[str]:
@@ -129,3 +139,212 @@ def test_crawl_cffex_futures_daily_data():
         assert isinstance(v, list)
         for item in v:
             assert isinstance(item, FuturesDailyData)
+
+
+def test_parse_shfe_futures_daily_data():
+    day: date = date(2021, 4, 1)
+    result = parse_shfe_futures_daily_data(day, make_kx_content(day))
+    assert list(result.keys()) == ['rb']
+    assert [item.delivery for item in result['rb']] == ['2105', '2110']
+    for item in result['rb']:
+        assert item.date == day
+        assert item.volume == 1
+
+
+def test_crawl_futures_daily_data_async(kx_server, tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        exchange_crawler.DAILY_DATA_URL, 'SHFE', kx_server + '/data/dailydata/kx/kx{day}.dat'
+    )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 31), use_async=True, concurrency=4)
+
+    with open(tmp_path.joinpath('data', 'SHFE', 'daily', 'rb.csv'), mode='r', encoding='utf-8') as f:
+        row_list = list(csv.DictReader(f))
+    day_list = [date.fromisoformat(row['date']) for row in row_list]
+    assert len(day_list) == 2 * 23
+    assert day_list == sorted(day_list)
+    for row in row_list:
+        assert int(row['volume']) == date.fromisoformat(row['date']).day
+
+
+def test_crawl_futures_daily_data_from_archive(kx_server, tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        exchange_crawler.DAILY_DATA_URL, 'SHFE', kx_server + '/data/dailydata/kx/kx{day}.dat'
+    )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 31), use_async=True)
+    csv_file = tmp_path.joinpath('data', 'SHFE', 'daily', 'rb.csv')
+    crawled: str = csv_file.read_text(encoding='utf-8')
+
+    # No network I/O from now on.
+    monkeypatch.setitem(exchange_crawler.DAILY_DATA_URL, 'SHFE', 'http://127.0.0.1:1/kx{day}.dat')
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 31), from_archive=True, max_workers=2)
+    assert csv_file.read_text(encoding='utf-8') == crawled
+
+    # The workers read the objects by the digests given, not the manifest.
+    archive = RawArchive(tmp_path.joinpath('data', 'archive'))
+    digest = archive.load_manifest('SHFE')[date(2021, 3, 1)]
+    archive.get_manifest_path('SHFE').unlink()
+    columns = parse_archived_futures_daily_data(archive.path, 'SHFE', date(2021, 3, 1), digest)
+    assert columns['product'].tolist() == ['rb', 'rb']
+    assert len(parse_archived_futures_daily_data(archive.path, 'SHFE', date(2021, 3, 2), None)['product']) == 0
+
+
+def test_crawl_futures_daily_data_incremental(kx_server, tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        exchange_crawler.DAILY_DATA_URL, 'SHFE', kx_server + '/data/dailydata/kx/kx{day}.dat'
+    )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 15))
+    assert len(KxRequestHandler.path_list) == 11
+
+    # Resume from the day after the last stored day.
+    KxRequestHandler.path_list = []
+    crawl_futures_daily_data('SHFE', end=date(2021, 3, 31), incremental=True)
+    assert len(KxRequestHandler.path_list) == 12
+    assert KxRequestHandler.path_list[0].endswith('kx20210316.dat')
+
+    # Nothing missing, nothing crawled.
+    KxRequestHandler.path_list = []
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 31), incremental=True)
+    assert KxRequestHandler.path_list == []
+
+    with open(tmp_path.joinpath('data', 'SHFE', 'daily', 'rb.csv'), mode='r', encoding='utf-8') as f:
+        day_list = [date.fromisoformat(row['date']) for row in csv.DictReader(f)]
+    assert len(day_list) == 2 * 23
+    assert len(set(day_list)) == 23
+
+    # The days without data, marked as stored, not crawled again.
+    KxRequestHandler.missing_day_set = {date(2021, 4, 1), date(2021, 4, 2)}
+    crawl_futures_daily_data('SHFE', date(2021, 4, 1), date(2021, 4, 2), incremental=True)
+    assert len(KxRequestHandler.path_list) == 2
+    crawl_futures_daily_data('SHFE', date(2021, 4, 1), date(2021, 4, 2), incremental=True, use_async=True)
+    assert len(KxRequestHandler.path_list) == 2
+
+
+def test_crawl_futures_daily_data_twice(kx_server, tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        exchange_crawler.DAILY_DATA_URL, 'SHFE', kx_server + '/data/dailydata/kx/kx{day}.dat'
+    )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    crawl_futures_daily_data('SHFE', date(2021, 3, 10), date(2021, 3, 31))
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 15), use_async=True)
+
+    with open(tmp_path.joinpath('data', 'SHFE', 'daily', 'rb.csv'), mode='r', encoding='utf-8') as f:
+        key_list = [(row['date'], row['delivery']) for row in csv.DictReader(f)]
+    assert len(key_list) == 2 * 23
+    assert key_list == sorted(set(key_list))
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_crawl_futures_daily_data_journaled(kx_server, tmp_path, monkeypatch, use_async):
+    monkeypatch.setitem(
+        exchange_crawler.DAILY_DATA_URL, 'SHFE', kx_server + '/data/dailydata/kx/kx{day}.dat'
+    )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    KxRequestHandler.broken_day_set = {date(2021, 3, 3), date(2021, 3, 10)}
+
+    # Interrupted after 5 days.
+    def progress(done: int, total: int) -> None:
+        if done == 5:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        crawl_futures_daily_data(
+            'SHFE', date(2021, 3, 1), date(2021, 3, 15), use_async=use_async, progress=progress, use_journal=True
+        )
+
+    # Resumed, the days done not crawled again, and the failed days skipped.
+    KxRequestHandler.path_list = []
+    crawl_futures_daily_data('SHFE', date(2021, 3, 1), date(2021, 3, 15), use_async=use_async, use_journal=True)
+    crawled_list = [path[-12:-4] for path in KxRequestHandler.path_list]
+    assert '20210301' not in crawled_list
+    assert '20210303' not in crawled_list
+    assert len(crawled_list) + 5 <= 11
+
+    # Retry only the failed days.
+    KxRequestHandler.broken_day_set = set()
+    KxRequestHandler.path_list = []
+    crawl_futures_daily_data(
+        'SHFE', date(2021, 3, 1), date(2021, 3, 15), use_async=use_async, use_journal=True, retry_failed=True
+    )
+    assert sorted(path[-12:-4] for path in KxRequestHandler.path_list) == ['20210303', '20210310']
+
+    with open(tmp_path.joinpath('data', 'SHFE', 'daily', 'rb.csv'), mode='r', encoding='utf-8') as f:
+        key_list = [(row['date'], row['delivery']) for row in csv.DictReader(f)]
+    assert len(key_list) == 2 * 11
+    assert key_list == sorted(set(key_list))
+
+
+def test_crawl_futures_daily_data_journaled_in_flight(kx_server, tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        exchange_crawler.DAILY_DATA_URL, 'SHFE', kx_server + '/data/dailydata/kx/kx{day}.dat'
+    )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+
+    def progress(done: int, total: int) -> None:
+        if done == 3:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        crawl_futures_daily_data(
+            'SHFE', date(2021, 3, 1), date(2021, 3, 31), use_async=True, concurrency=2, progress=progress,
+            use_journal=True
+        )
+
+    # Only the days whose requests were sent, or about to be when interrupted, were attempted. The others, of the
+    # 23 days, still planned.
+    connection = sqlite3.connect(str(tmp_path.joinpath('data', 'journal.sqlite3')))
+    attempts, planned = connection.execute(
+        "SELECT SUM(attempts), SUM(status = 'planned') FROM unit"
+    ).fetchone()
+    connection.close()
+    assert attempts <= len(KxRequestHandler.path_list) + 2 * 2
+    assert planned >= 23 - attempts > 0
+
+
+def test_crawl_futures_daily_data_stand_in(stand_in_server, tmp_path, monkeypatch):
+    for exchange, url in stand_in_server.get_daily_data_url().items():
+        monkeypatch.setitem(exchange_crawler.DAILY_DATA_URL, exchange, url)
+    stand_in_server.error_rate = 0.1
+
+    # The same files, crawled sequentially or concurrently, through the injected errors.
+    content_dict: Dict[str, Dict[str, str]] = {}
+    for mode in ['sequential', 'async']:
+        monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path.joinpath(mode))
+        content_dict[mode] = {}
+        for exchange in ['SHFE', 'INE', 'CFFEX']:
+            crawl_futures_daily_data(
+                exchange, date(2021, 3, 1), date(2021, 3, 14), use_async=(mode == 'async'), use_archive=False
+            )
+            for csv_file in tmp_path.joinpath(mode, 'data', exchange, 'daily').glob('*.csv'):
+                content_dict[mode][f'{exchange}/{csv_file.name}'] = csv_file.read_text(encoding='utf-8')
+    assert stand_in_server.error_count > 0
+    assert content_dict['sequential'] == content_dict['async']
+    assert 'SHFE/rb.csv' in content_dict['async']
+    assert 'SHFE/sc.csv' not in content_dict['async']
+    assert 'INE/sc.csv' in content_dict['async']
+    assert 'CFFEX/IF.csv' in content_dict['async']
+    assert 'CFFEX/IO.csv' not in content_dict['async']
+    with open(tmp_path.joinpath('async', 'data', 'CFFEX', 'daily', 'IF.csv'), mode='r', encoding='utf-8') as f:
+        assert len(list(csv.DictReader(f))) == 4 * 10
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_crawl_futures_daily_data_metrics(stand_in_server, tmp_path, monkeypatch, use_async):
+    monkeypatch.setitem(exchange_crawler.DAILY_DATA_URL, 'CFFEX', stand_in_server.get_daily_data_url()['CFFEX'])
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    metrics_file = tmp_path.joinpath('metrics.json')
+    metrics = crawl_futures_daily_data(
+        'CFFEX', date(2021, 3, 1), date(2021, 3, 14), use_async=use_async, metrics_file=metrics_file
+    )
+
+    d = json.loads(metrics_file.read_text(encoding='utf-8'))
+    assert d == json.loads(json.dumps(metrics.to_dict()))
+    assert d['days'] == 10
+    assert d['rows'] == 10 * 21
+    assert d['payload_bytes'] == stand_in_server.bytes_sent
+    for stage in ['fetch', 'archive', 'parse']:
+        assert d['latency'][stage]['count'] == 10
+    assert d['latency']['write']['count'] == 1
+    assert d['errors'] == {}
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date
+
+from FuturesWorkshop.collector.journal import CrawlJournal, PLANNED, IN_FLIGHT, DONE, FAILED
+
+
+def test_crawl_journal(tmp_path):
+    journal_file = tmp_path.joinpath('journal.sqlite3')
+    day_list = [date(2021, 3, 1), date(2021, 3, 2), date(2021, 3, 3), date(2021, 3, 4)]
+    with CrawlJournal(journal_file) as journal:
+        assert journal.find_job('SHFE', None, date(2021, 3, 4), [PLANNED]) is None
+        job_id = journal.create_job('SHFE', None, date(2021, 3, 4), day_list)
+        assert journal.get_day_list(job_id, [PLANNED]) == day_list
+
+        for day in day_list[:3]:
+            journal.mark_in_flight(job_id, day)
+        journal.mark_done(job_id, day_list[:1])
+        journal.mark_failed(job_id, day_list[1], 'TransportError: timeout')
+        assert journal.get_summary(job_id) == {PLANNED: 1, IN_FLIGHT: 1, DONE: 1, FAILED: 1}
+        assert journal.get_error(job_id, day_list[1]) == 'TransportError: timeout'
+
+    # Reopened after a crash.
+    with CrawlJournal(journal_file) as journal:
+        assert journal.find_job('SHFE', None, date(2021, 3, 4), [PLANNED, IN_FLIGHT]) == job_id
+        assert journal.find_job('SHFE', date(2021, 3, 1), date(2021, 3, 4), [PLANNED, IN_FLIGHT]) is None
+        assert journal.find_job('INE', None, date(2021, 3, 4), [PLANNED, IN_FLIGHT]) is None
+        journal.replan(job_id, [IN_FLIGHT])
+        assert journal.get_day_list(job_id, [PLANNED]) == [day_list[2], day_list[3]]
+
+        journal.mark_done(job_id, [day_list[2], day_list[3]])
+        assert journal.find_job('SHFE', None, date(2021, 3, 4), [PLANNED, IN_FLIGHT]) is None
+        assert journal.find_job('SHFE', None, date(2021, 3, 4), [FAILED]) == job_id
+        journal.replan(job_id, [FAILED])
+        assert journal.get_day_list(job_id, [PLANNED]) == [day_list[1]]
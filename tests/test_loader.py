@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from typing import Dict, List
+from datetime import date
+import shutil
+import csv
+
+import numpy as np
+import pytest
+
+from FuturesWorkshop.config import PACKAGE_PATH
+from FuturesWorkshop.storage import DailyLoader
+
+
+def read_csv(csv_file) -> List[Dict[str, str]]:
+    with open(csv_file, mode='r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_daily_loader(tmp_path):
+    csv_path = tmp_path.joinpath('SHFE', 'daily')
+    csv_path.mkdir(parents=True)
+    csv_file = shutil.copy(PACKAGE_PATH.joinpath('data', 'SHFE', 'daily', 'rb.csv'), csv_path)
+    row_list = read_csv(csv_file)
+    loader = DailyLoader(tmp_path)
+
+    # Converted at the first loading.
+    columns = loader.load('rb', date(2020, 11, 12), date(2020, 11, 12))
+    assert tmp_path.joinpath('SHFE', 'column', 'rb.col').exists()
+    expected = [row for row in row_list if row['date'] == '2020-11-12']
+    assert columns['delivery'].tolist() == [row['delivery'] for row in expected]
+    assert columns['open_interest'].tolist() == [float(row['open_interest']) for row in expected]
+
+    columns = loader.load('rb', date(2019, 12, 28), date(2020, 1, 10), ['2005', '2010'], ['date', 'close'])
+    assert list(columns.keys()) == ['date', 'close']
+    expected = [
+        row for row in row_list
+        if '2019-12-28' <= row['date'] <= '2020-01-10' and row['delivery'] in ['2005', '2010']
+    ]
+    assert columns['date'].tolist() == [date.fromisoformat(row['date']) for row in expected]
+    assert columns['close'].tolist() == [float(row['close']) for row in expected]
+
+    # All, and out of range.
+    assert len(loader.load('rb')['date']) == len(row_list)
+    assert len(loader.load('rb', date(2099, 1, 1))['date']) == 0
+    assert len(loader.load('rb', date(2020, 1, 10), date(2020, 1, 1))['date']) == 0
+    # No data.
+    columns = loader.load('cu', fields=['date', 'volume'])
+    assert columns['date'].dtype == np.dtype('datetime64[D]') and len(columns['volume']) == 0
+    # Unknown product.
+    with pytest.raises(ValueError, match='<zz>'):
+        loader.load('zz')
+
+    df = loader.load_frame('rb', date(2020, 11, 12), date(2020, 11, 12), fields=['delivery', 'volume'])
+    assert list(df.columns) == ['delivery', 'volume']
+    assert len(df) == len([row for row in row_list if row['date'] == '2020-11-12'])
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date
+import shutil
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from FuturesWorkshop.config import PACKAGE_PATH
+from FuturesWorkshop.storage import DailyLoader
+from FuturesWorkshop.main_contract import MainContractIndex, compute_main_contract, get_main_contract_range
+from FuturesWorkshop.utility import get_main_contract
+
+
+def test_compute_main_contract():
+    columns = {
+        'date': np.array(
+            ['2021-03-01', '2021-03-01', '2021-03-01', '2021-03-02', '2021-03-03', '2021-03-03'],
+            dtype='datetime64[D]'
+        ),
+        'delivery': np.array(['2105', '2110', '2201', '2105', '2105', '2110']),
+        'open_interest': np.array([100.0, 200.0, 200.0, 5.0, np.nan, 1.0]),
+        'volume': np.array([1.0, 10.0, 20.0, 1.0, 100.0, 1.0]),
+    }
+    day, delivery = compute_main_contract(columns)
+    assert day.tolist() == [date(2021, 3, 1), date(2021, 3, 2), date(2021, 3, 3)]
+    # Open interest tied, the larger volume. A single contract. A missing open interest.
+    assert delivery.tolist() == ['2201', '2105', '2110']
+
+    columns['volume'][2] = 10.0
+    assert compute_main_contract(columns)[1].tolist() == ['2110', '2105', '2110']
+    assert len(compute_main_contract({field: column[:0] for field, column in columns.items()})[0]) == 0
+
+
+def append_csv(csv_file, row_list):
+    with open(csv_file, mode='a', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(row_list)
+    os.utime(csv_file, ns=(0, os.stat(csv_file).st_mtime_ns + 10 ** 9))
+
+
+def test_main_contract_index(tmp_path):
+    csv_path = tmp_path.joinpath('SHFE', 'daily')
+    csv_path.mkdir(parents=True)
+    csv_file = shutil.copy(PACKAGE_PATH.joinpath('data', 'SHFE', 'daily', 'ag.csv'), csv_path)
+    index = MainContractIndex(tmp_path, DailyLoader(tmp_path))
+
+    day, delivery = index.get_series('ag')
+    assert len(set(row['date'] for row in csv.DictReader(open(csv_file, encoding='utf-8')))) == len(day)
+    assert index.get('ag', date(2019, 7, 15)) == '1912'
+    assert index.get('ag', date(2015, 11, 3)) == '1512'
+    assert index.get('ag', date(2019, 7, 14)) is None
+    day, delivery = index.get_series('ag', date(2019, 7, 15), date(2019, 7, 19))
+    assert len(day) == 5 and set(delivery.tolist()) == {'1912'}
+
+    # Refreshed incrementally, the index file read by a new index the same.
+    index_file = tmp_path.joinpath('SHFE', 'main_contract', 'ag.csv')
+    size = index_file.stat().st_size
+    append_csv(csv_file, [['ag', '9901', '2099-01-05', 1, 2, 0.5, 1.5, 1.2, 10, 100]])
+    assert index.get('ag', date(2099, 1, 5)) == '9901'
+    assert index_file.read_bytes()[size:] == b'2099-01-05,9901\r\n'
+    assert MainContractIndex(tmp_path, DailyLoader(tmp_path)).get('ag', date(2099, 1, 5)) == '9901'
+
+    # Blank lines in the index file skipped.
+    with open(index_file, mode='a', encoding='utf-8', newline='') as f:
+        f.write('\n\n')
+    assert MainContractIndex(tmp_path, DailyLoader(tmp_path)).read_index_file('ag')[1][-1] == '9901'
+
+    # A gap crawled later, rebuilt.
+    append_csv(csv_file, [['ag', '9801', '2098-01-05', 1, 2, 0.5, 1.5, 1.2, 10, 100]])
+    assert index.get('ag', date(2098, 1, 5)) == '9801'
+    assert index.get_series('ag', date(2098, 1, 1))[1].tolist() == ['9801', '9901']
+
+
+def test_get_main_contract():
+    assert get_main_contract(date(2020, 11, 12), 'rb') == '2101'
+    assert get_main_contract(date(2020, 11, 14), 'rb') is None
+
+
+def test_main_contract_index_get_range(tmp_path):
+    csv_path = tmp_path.joinpath('SHFE', 'daily')
+    csv_path.mkdir(parents=True)
+    for product in ['ag', 'au', 'rb']:
+        shutil.copy(PACKAGE_PATH.joinpath('data', 'SHFE', 'daily', f'{product}.csv'), csv_path)
+    index = MainContractIndex(tmp_path, DailyLoader(tmp_path))
+    index.refresh('rb')
+
+    # ag and au refreshed in worker processes, and <cu> has no data.
+    day, product_list, result = index.get_range(['ag', 'au', 'rb', 'cu'], date(2019, 12, 20), date(2020, 1, 10), 2)
+    assert tmp_path.joinpath('SHFE', 'main_contract', 'au.csv').exists()
+    assert day.tolist() == [
+        date(2019, 12, 20), date(2019, 12, 23), date(2019, 12, 24), date(2019, 12, 25), date(2019, 12, 26),
+        date(2019, 12, 27), date(2019, 12, 30), date(2019, 12, 31), date(2020, 1, 2), date(2020, 1, 3),
+        date(2020, 1, 6), date(2020, 1, 7), date(2020, 1, 8), date(2020, 1, 9), date(2020, 1, 10),
+    ]
+    assert product_list == ['ag', 'au', 'rb', 'cu']
+    assert result.shape == (15, 4)
+    for i, d in enumerate(day.tolist()):
+        for j, product in enumerate(['ag', 'au', 'rb']):
+            assert result[i, j] == index.get(product, d)
+    assert set(result[:, 3].tolist()) == {''}
+
+    # A product listed twice is refreshed once, and an unknown product named.
+    day, product_list, result = index.get_range(['cu', 'cu'], date(2019, 12, 20), date(2020, 1, 10), 2)
+    assert product_list == ['cu', 'cu'] and result.shape == (15, 2)
+    with pytest.raises(ValueError, match='<zz>'):
+        index.get_range(['rb', 'rb', 'zz'], date(2019, 12, 20), date(2020, 1, 10), 2)
+
+
+def test_get_main_contract_range():
+    df = get_main_contract_range(['rb', 'ag'], date(2020, 11, 9), date(2020, 11, 13), max_workers=1, as_frame=True)
+    assert list(df.columns) == ['rb', 'ag']
+    assert len(df) == 5
+    assert df.loc['2020-11-12', 'rb'] == '2101'
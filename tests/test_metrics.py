@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+import pytest
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from FuturesWorkshop.collector.metrics import Histogram, CrawlMetrics, measure
+
+
+def test_histogram():
+    histogram = Histogram([0.01, 0.1, 1.0])
+    assert histogram.get_percentile(50) == 0.0
+    for value in [0.005, 0.005, 0.05, 0.5, 3.0]:
+        histogram.add(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.mean == pytest.approx(3.56 / 5)
+    assert histogram.min == 0.005
+    assert histogram.max == 3.0
+    assert histogram.get_percentile(40) == 0.01
+    assert histogram.get_percentile(60) == 0.1
+    assert histogram.get_percentile(100) == 3.0
+
+
+def test_crawl_metrics(tmp_path):
+    metrics = CrawlMetrics('SHFE')
+    with metrics.measure('fetch'):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.measure('parse'):
+            raise ValueError()
+    with measure(None, 'parse'):
+        pass
+    metrics.add_payload(1000)
+    metrics.add_day(200)
+    metrics.add_day(0)
+    metrics.finish()
+
+    d = metrics.to_dict()
+    assert d['days'] == 2
+    assert d['empty_days'] == 1
+    assert d['rows'] == 200
+    assert d['rows_per_day'] == 100
+    assert d['payload_bytes'] == 1000
+    assert d['latency']['fetch']['count'] == 1
+    assert d['latency']['parse']['count'] == 1
+    assert d['latency']['write']['count'] == 0
+    assert d['errors'] == {'parse: ValueError': 1}
+    assert set(d['busy'].keys()) == {'network', 'parse', 'disk'}
+    assert d['bound'] in ['network', 'parse']
+    assert metrics.summary().startswith('SHFE: 2 days (1 empty)')
+
+    metrics.dump(tmp_path.joinpath('metrics.json'))
+    assert json.loads(tmp_path.joinpath('metrics.json').read_text(encoding='utf-8'))['rows'] == 200
+
+
+def test_crawl_metrics_bound_concurrent():
+    metrics = CrawlMetrics('SHFE')
+
+    def fetch(_):
+        with metrics.measure('fetch'):
+            time.sleep(0.05)
+
+    # 16 requests overlapped, 0.8s in total but about 0.05s of wall-clock time.
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(fetch, range(16)))
+    for _ in range(4):
+        with metrics.measure('parse'):
+            time.sleep(0.03)
+    with metrics.measure('write'):
+        pass
+
+    assert metrics.latency['fetch'].total > 0.5
+    assert metrics.busy['network'] < 0.1 < metrics.busy['parse']
+    assert metrics.get_bound() == 'parse'
+    assert metrics.in_progress == {'network': 0, 'parse': 0, 'disk': 0}
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from typing import List
+from datetime import date
+import multiprocessing
+
+import pytest
+
+from FuturesWorkshop.collector import exchange_crawler
+from FuturesWorkshop.collector.orchestrator import CrawlProgress, crawl_exchanges
+
+
+@pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(), reason='the workers see the patched module only if forked.'
+)
+def test_crawl_exchanges(kx_server, tmp_path, monkeypatch):
+    # The workers are forked, so they see the patched module. Spawned, they would crawl the exchanges and write into
+    # the package data.
+    for exchange in ['SHFE', 'INE']:
+        monkeypatch.setitem(
+            exchange_crawler.DAILY_DATA_URL, exchange, kx_server + '/data/dailydata/kx/kx{day}.dat'
+        )
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+
+    progress_list: List[int] = []
+    result = crawl_exchanges(
+        ['SHFE', 'ine', 'DCE'],
+        date(2021, 3, 1),
+        date(2021, 3, 31),
+        progress_callback=lambda progress: progress_list.append(progress.days_done),
+        interval=0.05,
+        mp_context=multiprocessing.get_context('fork'),
+        use_async=True,
+    )
+    assert isinstance(result, CrawlProgress)
+    assert result.is_finished
+    assert result.done == {'SHFE': 23, 'INE': 23, 'DCE': 0}
+    assert result.days_total == 46
+    assert result.error['SHFE'] is None
+    assert result.error['INE'] is None
+    # DCE is not supported in asyncio mode, and it does not stop the others.
+    assert result.error['DCE'].startswith('ValueError')
+    assert result.days_per_second > 0
+    assert progress_list[-1] == 46
+    assert progress_list == sorted(progress_list)
+
+    assert tmp_path.joinpath('data', 'SHFE', 'daily', 'rb.csv').exists()
+    # The INE products in the SHFE payload are skipped.
+    assert not tmp_path.joinpath('data', 'SHFE', 'daily', 'sc.csv').exists()
+    assert tmp_path.joinpath('data', 'INE', 'daily', 'sc.csv').exists()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date
+import json
+
+import numpy as np
+
+from FuturesWorkshop.collector.parser import (
+    parse_kx_columns,
+    parse_cffex_columns,
+    column_to_list,
+    columns_to_row_list,
+    columns_to_daily_data,
+    daily_data_to_columns,
+)
+
+
+def make_kx_row(product: str, delivery: str, close, volume) -> dict:
+    return {
+        'PRODUCTID': product,
+        'DELIVERYMONTH': delivery,
+        'OPENPRICE': 355.5,
+        'HIGHESTPRICE': 356,
+        'LOWESTPRICE': 354,
+        'CLOSEPRICE': close,
+        'SETTLEMENTPRICE': 355,
+        'VOLUME': volume,
+        'OPENINTEREST': 20,
+    }
+
+
+KX_CONTENT: bytes = json.dumps(
+    {
+        'o_curinstrument': [
+            make_kx_row('au_f', '2106', 355.5, 10),
+            make_kx_row('au_f', '2108', '', ''),
+            make_kx_row('au_f', '小计', 1, 10),
+            make_kx_row('au_f', 'efp', 1, 10),
+            make_kx_row('sc_f', '2105', 400, 5),
+            make_kx_row('总计', '', 1, 15),
+            make_kx_row('总计1', '', 1, 15),
+        ]
+    },
+    ensure_ascii=False
+).encode('utf-8')
+
+
+def test_parse_kx_columns():
+    day: date = date(2021, 4, 1)
+    columns = parse_kx_columns(day, KX_CONTENT)
+    assert columns['product'].tolist() == ['au', 'au', 'sc']
+    assert columns['delivery'].tolist() == ['2106', '2108', '2105']
+    assert columns['date'].dtype == np.dtype('datetime64[D]')
+    assert columns['date'].tolist() == [day] * 3
+    assert columns['close'].dtype == np.float64
+    assert np.isnan(columns['close'][1])
+    assert np.isnan(columns['volume'][1])
+
+    columns = parse_kx_columns(day, KX_CONTENT, ['sc'])
+    assert columns['product'].tolist() == ['au', 'au']
+
+    columns = parse_kx_columns(day, b'{"o_curinstrument": []}')
+    assert all(len(column) == 0 for column in columns.values())
+
+
+def test_column_to_list():
+    assert column_to_list(np.array([1.0, 2.5, np.nan])) == [1, 2.5, '']
+    assert column_to_list(np.array(['2105'])) == ['2105']
+
+
+def test_columns_round_trip():
+    day: date = date(2021, 4, 1)
+    columns = parse_kx_columns(day, KX_CONTENT, ['sc'])
+    assert columns_to_row_list(columns) == [
+        ['au', '2106', day, 355.5, 356, 354, 355.5, 355, 10, 20],
+        ['au', '2108', day, 355.5, 356, 354, '', 355, '', 20],
+    ]
+    data = columns_to_daily_data(columns)
+    assert list(data.keys()) == ['au']
+    assert data['au'][0].close == 355.5
+    assert columns_to_row_list(daily_data_to_columns(data)) == columns_to_row_list(columns)
+
+
+CFFEX_CONTENT: bytes = b"""<?xml version="1.0" encoding="utf-8"?>
+<dailydatas>
+<dailydata>
+<instrumentid>IF2104</instrumentid>
+<tradingday>20210401</tradingday>
+<openprice>5050.0</openprice>
+<highestprice>5100.2</highestprice>
+<lowestprice>5000.0</lowestprice>
+<closeprice>5090.0</closeprice>
+<openinterest>60000.0</openinterest>
+<settlementprice>5088.4</settlementprice>
+<volume>90000</volume>
+<productid>IF</productid>
+<expiredate>20210416</expiredate>
+</dailydata>
+<dailydata>
+<instrumentid>IO2104-C-5000</instrumentid>
+<openprice>100.0</openprice>
+<productid>IO</productid>
+<expiredate>20210416</expiredate>
+</dailydata>
+<dailydata>
+<instrumentid>IF2105</instrumentid>
+<openprice></openprice>
+<productid>IF</productid>
+<expiredate>20210521</expiredate>
+</dailydata>
+</dailydatas>
+"""
+
+
+def test_parse_cffex_columns():
+    day: date = date(2021, 4, 1)
+    columns = parse_cffex_columns(day, CFFEX_CONTENT)
+    assert columns['product'].tolist() == ['IF', 'IF']
+    assert columns['delivery'].tolist() == ['2104', '2105']
+    assert columns['date'].tolist() == [day, day]
+    assert columns_to_row_list(columns)[0] == ['IF', '2104', day, 5050, 5100.2, 5000, 5090, 5088.4, 90000, 60000]
+    # No value leaks from the earlier records.
+    for field in ['open', 'high', 'low', 'close', 'settlement', 'volume', 'open_interest']:
+        assert np.isnan(columns[field][1])
+
+    columns = parse_cffex_columns(day, b'<?xml version="1.0" encoding="utf-8"?><dailydatas></dailydatas>')
+    assert all(len(column) == 0 for column in columns.values())
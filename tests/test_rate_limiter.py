@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+import pytest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import asyncio
+import time
+
+from FuturesWorkshop.collector.rate_limiter import HostRateLimiter, RateLimiter
+from FuturesWorkshop.collector.transport import HttpTransport, AsyncHttpTransport
+
+
+class SlowRequestHandler(BaseHTTPRequestHandler):
+    """
+    Reply 200, after <latency> seconds, or 429 when <throttled>.
+    """
+    latency: float = 0.0
+    throttled: bool = False
+    request_count: int = 0
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        SlowRequestHandler.request_count += 1
+        time.sleep(self.latency)
+        if self.throttled:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.2')
+            content = b''
+        else:
+            self.send_response(200)
+            content = b'ok'
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    SlowRequestHandler.latency = 0.0
+    SlowRequestHandler.throttled = False
+    SlowRequestHandler.request_count = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_host_rate_limiter():
+    limiter = HostRateLimiter(rate=10.0, burst=2.0, min_rate=1.0, max_rate=12.0, increase=1.0, slow_latency=1.0)
+    # The burst is free, then a request every 1 / rate seconds.
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+    assert limiter.reserve() == pytest.approx(0.2, abs=0.01)
+
+    limiter.record(0.1, congested=False)
+    limiter.record(0.1, congested=False)
+    limiter.record(0.1, congested=False)
+    assert limiter.rate == 12.0
+
+    # Decreased once for the congestion reported by the requests in flight together.
+    limiter.record(0.1, congested=True)
+    limiter.record(0.1, congested=True)
+    assert limiter.rate == 6.0
+    limiter.decreased_at = float('-inf')
+    limiter.record(2.0, congested=False)
+    assert limiter.rate == 3.0
+
+    limiter.pause(1.0)
+    assert limiter.reserve() >= 1.0
+
+    with pytest.raises(ValueError):
+        HostRateLimiter(rate=0.1, min_rate=0.5)
+
+
+def test_http_transport_rate_limited(server):
+    rate_limiter = RateLimiter(rate=20.0, burst=1.0, min_rate=1.0, max_rate=40.0, increase=2.0, slow_latency=0.1)
+    with HttpTransport(backoff_base=0.01, rate_limiter=rate_limiter) as transport:
+        begin = time.monotonic()
+        for _ in range(5):
+            assert transport.get(f'{server}/ok') == b'ok'
+        assert time.monotonic() - begin >= 4 / 20.0 * 0.9
+        assert rate_limiter.get_rate(server) == 30.0
+
+        # Slowed down.
+        SlowRequestHandler.latency = 0.15
+        transport.get(f'{server}/ok')
+        assert rate_limiter.get_rate(server) == 15.0
+
+        # Healthy again, ramp up.
+        SlowRequestHandler.latency = 0.0
+        for _ in range(5):
+            transport.get(f'{server}/ok')
+        assert rate_limiter.get_rate(server) == 25.0
+
+    # Each host has its own rate.
+    assert rate_limiter.get_rate('http://127.0.0.1:1/ok') == 20.0
+
+
+def test_async_http_transport_rate_limited(server):
+    rate_limiter = RateLimiter(rate=20.0, burst=1.0, min_rate=1.0, max_rate=40.0, increase=0.1)
+
+    async def run():
+        async with AsyncHttpTransport(backoff_base=0.01, rate_limiter=rate_limiter) as transport:
+            return await asyncio.gather(*[transport.get(f'{server}/ok') for _ in range(10)])
+
+    # Throttled with Retry-After, all the requests to the host held.
+    SlowRequestHandler.throttled = True
+    threading.Timer(0.1, lambda: setattr(SlowRequestHandler, 'throttled', False)).start()
+    begin = time.monotonic()
+    assert asyncio.run(run()) == [b'ok'] * 10
+    assert time.monotonic() - begin >= 0.2
+    assert rate_limiter.get_rate(server) < 20.0
+    assert SlowRequestHandler.request_count <= 10 + 3
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import time
+import copy
+
+import pytest
+
+from FuturesWorkshop.config import CONFIGS
+from FuturesWorkshop.reference import ReferenceData, get_reference_data
+from FuturesWorkshop.utility import get_exchange_symbol_by_product_symbol, get_product_name_by_symbol
+
+
+def test_reference_data():
+    reference = ReferenceData(CONFIGS)
+    assert reference.exchange_symbol_list == ('SHFE', 'DCE', 'CZCE', 'CFFEX', 'INE')
+    assert reference.exchange_symbol_by_name['郑州商品交易所'] == 'CZCE'
+    assert reference.exchange_name_by_symbol['CFFEX'] == '中国金融期货交易所'
+    assert reference.product_symbol_by_name['螺纹钢'] == 'rb'
+    assert reference.product_name_by_symbol['rb'] == '螺纹钢'
+    assert reference.exchange_by_product['ZC'] == 'CZCE'
+    assert reference.product_by_exchange['INE'] == tuple(CONFIGS['exchange']['INE'])
+    assert len(reference.product_symbol_list) == len(CONFIGS['product']['info'])
+
+    info = reference.get_product_info('rb')
+    assert (info.exchange, info.multiplier, info.fluctuation, info.tick_value) == ('SHFE', 10, 1, 10)
+    assert info.sessions[0] == (time(hour=21), time(hour=23))
+    assert len(info.sessions) == 4 and info.has_night_session is True
+    assert reference.get_product_info('IF').has_night_session is False
+    assert reference.get_product_info('xx') is None
+
+    with pytest.raises(TypeError):
+        reference.product_name_by_symbol['rb'] = 'x'
+    with pytest.raises(AttributeError):
+        info.multiplier = 1
+
+
+def test_get_reference_data():
+    reference = get_reference_data()
+    assert get_reference_data() is reference
+    assert get_product_name_by_symbol('rb') == '螺纹钢'
+    assert get_exchange_symbol_by_product_symbol('xx') is None
+
+    # Replaced, as restored by the preference dialog, built again.
+    backup = copy.deepcopy(CONFIGS['product'])
+    try:
+        CONFIGS['product'] = copy.deepcopy(backup)
+        CONFIGS['product']['info'][0]['name'] = '测试'
+        assert get_reference_data() is not reference
+        assert get_product_name_by_symbol(CONFIGS['product']['info'][0]['symbol']) == '测试'
+    finally:
+        CONFIGS['product'] = backup
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+import pytest
+
+from datetime import date
+
+from FuturesWorkshop.collector import registry
+from FuturesWorkshop.collector.registry import ExchangePlugin, register_exchange, get_exchange_plugin, get_first_date
+from FuturesWorkshop.collector import exchange_crawler
+from FuturesWorkshop.collector.exchange_crawler import crawl_daily_data, crawl_futures_daily_data, check_date
+from FuturesWorkshop.collector.parser import parse_kx_columns
+
+
+def test_registry():
+    assert get_exchange_plugin('shfe').exchange == 'SHFE'
+    assert get_exchange_plugin('INE').concurrency == 8
+    assert get_exchange_plugin('CFFEX').get_url(date(2021, 4, 1)).endswith('/202104/01/index.xml')
+    with pytest.raises(ValueError):
+        get_exchange_plugin('DCE')
+    with pytest.raises(ValueError):
+        crawl_futures_daily_data('CZCE', date(2021, 3, 1), date(2021, 3, 31))
+    # The first dates of the known exchanges, registered or not.
+    assert get_first_date('czce') == date(2005, 4, 29)
+    assert get_first_date('INE') == date(2018, 3, 26)
+    with pytest.raises(ValueError):
+        get_first_date('XX')
+
+
+def test_register_exchange(stand_in_server, monkeypatch):
+    monkeypatch.setattr(registry, 'REGISTRY', dict(registry.REGISTRY))
+    url: str = stand_in_server.get_daily_data_url()['INE']
+    plugin = register_exchange(
+        ExchangePlugin('test', lambda day: url.format(day=day.strftime('%Y%m%d')), parse_kx_columns)
+    )
+    assert get_exchange_plugin('TEST') is plugin
+
+    result = crawl_daily_data('TEST', date(2021, 4, 1))
+    assert sorted(result.keys()) == ['bc', 'lu', 'nr', 'sc']
+    assert crawl_daily_data('TEST', date(2021, 4, 3)) == {}
+
+
+def test_registered_exchange_crawled(stand_in_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, 'REGISTRY', dict(registry.REGISTRY))
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    url: str = stand_in_server.get_daily_data_url()['INE']
+    register_exchange(
+        ExchangePlugin(
+            'GFEX', lambda day: url.format(day=day.strftime('%Y%m%d')), parse_kx_columns, first_date=date(2021, 3, 1)
+        )
+    )
+    assert check_date('GFEX') == (date(2021, 3, 1), date.today())
+    with pytest.raises(ValueError):
+        check_date('GFEX', date(2021, 2, 26))
+
+    crawl_futures_daily_data('GFEX', date(2021, 4, 1), date(2021, 4, 2))
+    assert tmp_path.joinpath('data', 'GFEX', 'daily', 'sc.csv').exists()
+
+    # The first date unknown, <begin> required.
+    register_exchange(ExchangePlugin('TEST', lambda day: url.format(day=day.strftime('%Y%m%d')), parse_kx_columns))
+    with pytest.raises(ValueError):
+        check_date('TEST')
+    assert check_date('TEST', date(1990, 1, 1), date(2021, 4, 2)) == (date(1990, 1, 1), date(2021, 4, 2))
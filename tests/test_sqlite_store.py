@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from FuturesWorkshop.collector import exchange_crawler
+from FuturesWorkshop.collector.exchange_crawler import crawl_futures_daily_data
+from FuturesWorkshop.collector.parser import get_empty_columns
+from FuturesWorkshop.storage import SqliteQuoteStore
+from FuturesWorkshop.storage.column_store import read_csv_columns
+
+
+def make_columns(day: date, product: str, delivery_list, close: float):
+    n = len(delivery_list)
+    columns = {
+        'product': np.array([product] * n),
+        'delivery': np.array(delivery_list),
+        'date': np.full(n, np.datetime64(day, 'D')),
+    }
+    for field in ['open', 'high', 'low', 'close', 'settlement', 'volume', 'open_interest']:
+        columns[field] = np.full(n, close)
+    columns['settlement'][0] = np.nan
+    return columns
+
+
+def test_sqlite_quote_store(tmp_path):
+    with SqliteQuoteStore(tmp_path.joinpath('quote.sqlite3')) as store:
+        assert store.add_columns(get_empty_columns()) == 0
+        assert store.add_columns(make_columns(date(2020, 5, 6), 'rb', ['2010', '2101', '2005'], 3500.0)) == 3
+        store.add_columns(make_columns(date(2020, 5, 7), 'rb', ['2010', '2101'], 3510.0))
+        store.add_columns(make_columns(date(2020, 5, 7), 'cu', ['2006'], 42000.0))
+        # Replaced.
+        store.add_columns(make_columns(date(2020, 5, 7), 'rb', ['2010'], 3520.0))
+
+        columns = store.get_cross_section('rb', date(2020, 5, 6))
+        assert columns['delivery'].tolist() == ['2005', '2010', '2101']
+        assert columns['date'].dtype == np.dtype('datetime64[D]')
+        assert np.isnan(columns['settlement'][1]) and columns['settlement'][0] == 3500.0
+
+        columns = store.query('rb', date(2020, 5, 7), fields=['delivery', 'close'])
+        assert list(columns.keys()) == ['delivery', 'close']
+        assert columns['delivery'].tolist() == ['2010', '2101']
+        assert columns['close'].tolist() == [3520.0, 3510.0]
+
+        columns = store.query('rb', end=date(2020, 5, 7), deliveries=['2010'])
+        assert columns['date'].tolist() == [date(2020, 5, 6), date(2020, 5, 7)]
+        assert len(store.query('au')['date']) == 0
+
+        assert store.get_products() == ['cu', 'rb']
+        assert store.get_products(date(2020, 5, 6)) == ['rb']
+
+        plan = ' '.join(
+            row[-1] for row in store.connection.execute(
+                "EXPLAIN QUERY PLAN SELECT delivery, close, volume FROM daily INDEXED BY daily_product_date "
+                "WHERE product = 'rb' AND date >= '2020-05-06' AND date <= '2020-05-07' ORDER BY date, delivery"
+            )
+        )
+        assert 'COVERING INDEX daily_product_date' in plan
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_crawl_futures_daily_data_sqlite(stand_in_server, tmp_path, monkeypatch, use_async):
+    monkeypatch.setitem(exchange_crawler.DAILY_DATA_URL, 'CFFEX', stand_in_server.get_daily_data_url()['CFFEX'])
+    monkeypatch.setattr(exchange_crawler, 'PACKAGE_PATH', tmp_path)
+    crawl_futures_daily_data('CFFEX', date(2021, 3, 1), date(2021, 3, 14), use_async=use_async, use_sqlite=True)
+
+    with SqliteQuoteStore(tmp_path.joinpath('data', 'quote.sqlite3')) as store:
+        assert store.get_products() == ['IC', 'IF', 'IH', 'T', 'TF', 'TS']
+        for product in store.get_products():
+            columns = store.query(product)
+            expected = read_csv_columns(tmp_path.joinpath('data', 'CFFEX', 'daily', f'{product}.csv'))
+            for field, column in expected.items():
+                np.testing.assert_array_equal(columns[field], column)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from datetime import date
+
+from FuturesWorkshop.collector.stored_day_index import StoredDayIndex
+
+
+def test_stored_day_index(tmp_path):
+    # Built from the product csv files, if no index file.
+    tmp_path.joinpath('daily').mkdir()
+    tmp_path.joinpath('daily', 'rb.csv').write_text(
+        'product,delivery,date,open,high,low,close,settlement,volume,open_interest\n'
+        'rb,2105,2021-03-01,1,1,1,1,1,1,1\n'
+        'rb,2110,2021-03-01,1,1,1,1,1,1,1\n'
+        'rb,2105,2021-03-02,1,1,1,1,1,1,1\n',
+        encoding='utf-8'
+    )
+    index = StoredDayIndex(tmp_path)
+    assert index.load() == {date(2021, 3, 1), date(2021, 3, 2)}
+    assert index.index_file.exists()
+    assert index.get_watermark() == date(2021, 3, 2)
+
+    index.add(date(2021, 3, 4))
+    index.add(date(2021, 3, 4))
+    reopened = StoredDayIndex(tmp_path)
+    assert reopened.get_watermark() == date(2021, 3, 4)
+    assert reopened.get_missing_days(
+        [date(2021, 3, 1), date(2021, 3, 2), date(2021, 3, 3), date(2021, 3, 4)]
+    ) == [date(2021, 3, 3)]
+
+    reopened.rebuild([date(2021, 3, 1)])
+    assert StoredDayIndex(tmp_path).load() == {date(2021, 3, 1)}
+    assert StoredDayIndex(tmp_path.joinpath('nothing')).get_watermark() is None
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+from typing import List
+from datetime import date, timedelta
+
+from FuturesWorkshop.config import CONFIGS
+from FuturesWorkshop.trading_calendar import TradingCalendar, get_trading_calendar
+
+
+def get_trading_days_linear(begin: date, end: date) -> List[date]:
+    holiday_set = set(CONFIGS['holiday']['expanded'])
+    result: List[date] = []
+    for n in range((end - begin).days + 1):
+        day = begin + timedelta(days=n)
+        if day not in holiday_set and day.weekday() < 5:
+            result.append(day)
+    return result
+
+
+def test_trading_calendar():
+    calendar = get_trading_calendar()
+    assert calendar is get_trading_calendar()
+
+    assert calendar.is_trading_day(date(2021, 9, 30)) is True
+    assert calendar.is_holiday(date(2021, 10, 1)) is True
+    assert calendar.is_holiday(date(2021, 10, 9)) is True
+    assert calendar.is_holiday(date(2021, 10, 11)) is False
+
+    assert calendar.get_trading_days(date(2021, 9, 29), date(2021, 10, 11)) == [
+        date(2021, 9, 29), date(2021, 9, 30), date(2021, 10, 8), date(2021, 10, 11)
+    ]
+    assert calendar.get_trading_days(date(2021, 10, 2), date(2021, 10, 7)) == []
+    assert calendar.get_trading_days(date(2021, 10, 11), date(2021, 10, 8)) == []
+    assert calendar.count_trading_days(date(2021, 9, 29), date(2021, 10, 11)) == 4
+    assert calendar.count_trading_days(date(2021, 10, 11), date(2021, 10, 8)) == 0
+
+    assert calendar.get_next_trading_day(date(2021, 9, 30)) == date(2021, 10, 8)
+    assert calendar.get_previous_trading_day(date(2021, 10, 8)) == date(2021, 9, 30)
+    assert calendar.get_previous_trading_day(date(2021, 1, 4)) == date(2020, 12, 31)
+
+    # The same as expanding the holidays.
+    for begin, end in [(date(2001, 1, 1), date(2021, 12, 31)), (date(2015, 2, 1), date(2015, 3, 1))]:
+        trading_days = get_trading_days_linear(begin, end)
+        assert calendar.get_trading_days(begin, end) == trading_days
+        assert calendar.count_trading_days(begin, end) == len(trading_days)
+
+
+def test_trading_calendar_span():
+    calendar = TradingCalendar([(date(2021, 10, 1), date(2021, 10, 7))])
+    assert (calendar.first_day, calendar.last_day) == (date(2021, 1, 1), date(2021, 12, 31))
+
+    # Out of the span, only the weekends are holidays.
+    assert calendar.is_holiday(date(2023, 10, 2)) is False
+    assert calendar.is_holiday(date(2023, 10, 1)) is True
+    assert calendar.last_day == date(2023, 12, 31)
+    assert calendar.get_next_trading_day(date(2023, 12, 29)) == date(2024, 1, 1)
+    assert calendar.get_previous_trading_day(date(2021, 1, 1)) == date(2020, 12, 31)
+    assert calendar.first_day == date(2020, 1, 1)
+    assert calendar.count_trading_days(date(2020, 12, 28), date(2021, 1, 3)) == 5
+    assert calendar.get_trading_days(date(2019, 12, 30), date(2020, 1, 1)) == [
+        date(2019, 12, 30), date(2019, 12, 31), date(2020, 1, 1)
+    ]
+    assert calendar.count_trading_days(date(2021, 9, 27), date(2021, 10, 10)) == 5
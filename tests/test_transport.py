@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Bruce Frank Wong'
+
+
+import pytest
+
+from typing import Dict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import asyncio
+import gzip
+
+from FuturesWorkshop.collector.transport import (
+    TransportError,
+    HttpTransport,
+    AsyncHttpTransport,
+    get_backoff_delay,
+)
+
+
+CONTENT: bytes = b'{"o_curinstrument": []}'
+
+
+class FlakyRequestHandler(BaseHTTPRequestHandler):
+    """
+    /ok             200, gzip encoded if asked.
+    /flaky/<n>      503 for the first <n> requests, then 200.
+    /missing        404.
+    /forbidden      403.
+    """
+    request_count: Dict[str, int] = {}
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        count = self.request_count.get(self.path, 0)
+        self.request_count[self.path] = count + 1
+
+        if self.path.startswith('/flaky/') and count < int(self.path.split('/')[-1]):
+            self.reply(503, b'')
+        elif self.path == '/missing':
+            self.reply(404, b'')
+        elif self.path == '/forbidden':
+            self.reply(403, b'')
+        elif 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self.reply(200, gzip.compress(CONTENT), {'Content-Encoding': 'gzip'})
+        else:
+            self.reply(200, CONTENT)
+
+    def reply(self, status: int, content: bytes, headers: Dict[str, str] = None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FlakyRequestHandler.request_count = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_backoff_delay():
+    for attempt in range(10):
+        delay = get_backoff_delay(attempt, 0.5, 4.0)
+        assert 0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_http_transport(server):
+    with HttpTransport(max_retries=3, backoff_base=0.01) as transport:
+        assert transport.get(f'{server}/ok') == CONTENT
+        assert transport.get(f'{server}/flaky/2') == CONTENT
+        assert FlakyRequestHandler.request_count['/flaky/2'] == 3
+        assert transport.get(f'{server}/missing') is None
+        with pytest.raises(TransportError):
+            transport.get(f'{server}/flaky/5')
+        assert FlakyRequestHandler.request_count['/flaky/5'] == 4
+        with pytest.raises(TransportError):
+            transport.get(f'{server}/forbidden')
+        assert FlakyRequestHandler.request_count['/forbidden'] == 1
+
+
+def test_http_transport_connection_error():
+    with HttpTransport(max_retries=1, backoff_base=0.01) as transport:
+        with pytest.raises(TransportError):
+            transport.get('http://127.0.0.1:1/ok')
+
+
+def test_async_http_transport(server):
+    async def run():
+        async with AsyncHttpTransport(max_retries=3, backoff_base=0.01) as transport:
+            assert await transport.get(f'{server}/ok') == CONTENT
+            assert await transport.get(f'{server}/flaky/2') == CONTENT
+            assert await transport.get(f'{server}/missing') is None
+            with pytest.raises(TransportError):
+                await transport.get(f'{server}/flaky/5')
+            with pytest.raises(TransportError):
+                await transport.get(f'{server}/forbidden')
+
+    asyncio.run(run())
+    assert FlakyRequestHandler.request_count['/flaky/2'] == 3
+    assert FlakyRequestHandler.request_count['/flaky/5'] == 4
@@ -7,6 +7,10 @@ from typing import Dict, List, Tuple
 from datetime import date
 import csv
 
+import numpy as np
+import pandas as pd
+import pytest
+
 from FuturesWorkshop.config import CONFIGS, PACKAGE_PATH
 from FuturesWorkshop.utility import (
     is_holiday,
@@ -20,7 +24,10 @@ from FuturesWorkshop.utility import (
     get_product_trading_time,
     get_stop_loss_settings,
     get_main_contract,
-    split_symbol
+    split_symbol,
+    split_symbol_array,
+    expand_delivery,
+    atomic_write,
 )
 
 
@@ -305,6 +312,54 @@ def test_split_symbol():
         assert split_symbol(k) == v
 
 
+def test_expand_delivery():
+    assert expand_delivery('101', 2020) == '2101'
+    assert expand_delivery('912', 2019) == '1912'
+    assert expand_delivery('912', 2020) == '1912'
+    assert expand_delivery('812', 2020) == '2812'
+    assert expand_delivery('012', 2019) == '2012'
+    assert expand_delivery('009', 2019) == '2009'
+    assert expand_delivery('2101', 2020) == '2101'
+
+
+def test_split_symbol_array():
+    symbols = np.array(['SHFE.rb2101', 'CZCE.SR101', 'DCE.c2105', 'SHFE.rb2101', 'CZCE.MA2009'])
+    result = split_symbol_array(symbols)
+    assert result['exchange'].tolist() == ['SHFE', 'CZCE', 'DCE', 'SHFE', 'CZCE']
+    assert result['product'].tolist() == ['rb', 'SR', 'c', 'rb', 'MA']
+    assert result['delivery'].tolist() == ['2101', '101', '2105', '2101', '2009']
+    assert split_symbol_array(symbols, 2020)['delivery'].tolist() == ['2101', '2101', '2105', '2101', '2009']
+    for k, v in zip(symbols.reshape(-1).tolist(), zip(*result.values())):
+        assert split_symbol(k) == v
+    assert len(split_symbol_array([])['product']) == 0
+
+    df = split_symbol_array(pd.Series(['INE.sc2103', None, 'INE.sc2103'], index=[3, 4, 5]), 2020)
+    assert list(df.columns) == ['exchange', 'product', 'delivery'] and df.index.tolist() == [3, 4, 5]
+    assert df.loc[3].tolist() == ['INE', 'sc', '2103'] and df.loc[4].tolist() == ['', '', '']
+    df = split_symbol_array(pd.Series(['CZCE.ZC101', 'DCE.c2101', 'CZCE.ZC101'], dtype='category'), 2020)
+    assert df['delivery'].tolist() == ['2101', '2101', '2101']
+
+
+def test_atomic_write(tmp_path):
+    file = tmp_path.joinpath('a', 'b.csv')
+    with atomic_write(file, encoding='utf-8', newline='') as f:
+        f.write('old')
+    assert file.read_text(encoding='utf-8') == 'old'
+
+    # Failed, the file untouched and the temporary file removed.
+    with pytest.raises(RuntimeError):
+        with atomic_write(file, encoding='utf-8', newline='') as f:
+            f.write('new')
+            raise RuntimeError()
+    assert file.read_text(encoding='utf-8') == 'old'
+    assert list(file.parent.iterdir()) == [file]
+
+    with atomic_write(file, mode='wb') as f:
+        f.write(b'new')
+    assert file.read_bytes() == b'new'
+    assert list(file.parent.iterdir()) == [file]
+
+
 def test_holiday_csv():
     """
     Test <holiday.csv>. Make sure the end date of holiday is large than the begin date.